@@ -0,0 +1,282 @@
+# Teoria da Informacao, LEI, 2022
+# BGZF (blocked gzip): a series of independent gzip members of at most 64 KiB, each one
+# carrying its own size in a 'BC' FEXTRA subfield. Positions are virtual offsets:
+# (offset of the member in the file << 16) | offset inside the decompressed member
+
+import os
+import sys
+import zlib
+import bisect
+import argparse
+import collections
+import concurrent.futures
+from gzip import GZIP, GZIPHeader
+import encoder
+
+
+# uncompressed data per block: even stored, a block then fits in the 64 KiB limit
+BLOCK_DATA_SIZE = 0xff00
+MAX_BLOCK_SIZE = 0x10000
+
+# blocks being decoded or waiting to be written, per worker of decompressParallel
+BLOCKS_PER_WORKER = 4
+
+# empty block marking the end of a BGZF file
+EOF_BLOCK = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+
+def makeVirtualOffset(blockOffset, inBlockOffset):
+    return (blockOffset << 16) | inBlockOffset
+
+
+def splitVirtualOffset(voffset):
+    ''' returns (offset of the block in the file, offset inside the decompressed block) '''
+    return voffset >> 16, voffset & 0xffff
+
+
+class BGZFReader:
+    ''' random access reader for BGZF files
+
+    The index of the blocks is built from the headers and trailers only (nothing is decoded):
+    index[i] = (offset of block i in the file, offset of its data in the decompressed stream) '''
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.gz = GZIP(fileName)
+        self.index = []
+        self.blockSizes = []
+        self.size = 0              # total decompressed size
+        self.buildIndex()
+
+        self.block = -1            # block currently decoded in data
+        self.data = b''
+        self.pos = 0               # position in the decompressed stream
+
+    def buildIndex(self):
+        ''' walks the blocks reading their BSIZE subfield and the ISIZE of their trailer '''
+
+        f = self.gz.f
+        offset = 0
+        while offset < self.gz.fileSize:
+            f.seek(offset)
+            gzh = GZIPHeader()
+            if gzh.read(f) != 0:
+                raise ValueError('%s: invalid gzip header at offset %d' % (self.fileName, offset))
+
+            BC = gzh.getSubfield(b'BC')
+            if BC is None or len(BC) != 2:
+                raise ValueError('%s: not a BGZF file (no BC subfield at offset %d)' % (self.fileName, offset))
+            blockSize = BC[0] + (BC[1] << 8) + 1
+
+            f.seek(offset + blockSize - 4)
+            ISIZE = int.from_bytes(f.read(4), 'little')
+
+            # the empty EOF block is not indexed
+            if ISIZE > 0:
+                self.index.append((offset, self.size))
+                self.blockSizes.append(blockSize)
+                self.size += ISIZE
+            offset += blockSize
+
+        self.blockOffsets = {offset: i for i, (offset, start) in enumerate(self.index)}
+        self.blockStarts = [start for offset, start in self.index]
+
+    def readBlock(self, i):
+        ''' decodes block i and returns its data '''
+        return inflateBlock(self.gz, self.fileName, self.index[i][0])
+
+    def loadBlock(self, i):
+        if i != self.block:
+            self.data = self.readBlock(i)
+            self.block = i
+
+    def seek(self, voffset):
+        ''' moves to a virtual offset '''
+
+        blockOffset, inBlockOffset = splitVirtualOffset(voffset)
+        if blockOffset not in self.blockOffsets:
+            if blockOffset >= self.gz.fileSize - len(EOF_BLOCK) and inBlockOffset == 0:
+                self.pos = self.size
+                return
+            raise ValueError('%s: no block at offset %d' % (self.fileName, blockOffset))
+        self.pos = self.index[self.blockOffsets[blockOffset]][1] + inBlockOffset
+
+    def tell(self):
+        ''' returns the virtual offset of the current position '''
+        return self.virtualOffset(self.pos)
+
+    def virtualOffset(self, pos):
+        ''' converts a position in the decompressed stream to a virtual offset '''
+        if pos >= self.size:
+            return makeVirtualOffset(self.gz.fileSize - len(EOF_BLOCK), 0)
+        i = bisect.bisect_right(self.blockStarts, pos) - 1
+        return makeVirtualOffset(self.index[i][0], pos - self.index[i][1])
+
+    def read(self, n=-1):
+        ''' reads up to n bytes (until the end if n < 0) from the current position, decoding only the blocks it spans '''
+
+        if n < 0:
+            n = self.size - self.pos
+        chunks = []
+        while n > 0 and self.pos < self.size:
+            i = bisect.bisect_right(self.blockStarts, self.pos) - 1
+            self.loadBlock(i)
+            start = self.pos - self.index[i][1]
+            chunk = self.data[start : start + n]
+            chunks.append(chunk)
+            self.pos += len(chunk)
+            n -= len(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        self.gz.f.close()
+
+
+def inflateBlock(gz, fileName, offset):
+    ''' decodes the block at offset and checks the CRC32 and ISIZE of its trailer '''
+
+    output = []
+    gz.seek(offset)
+    gz.getHeader()
+    try:
+        gz.inflate(output.append)
+        data = b''.join(output)
+
+        gz.alignToByte()
+        trailer = gz.readBytes(8)
+        if int.from_bytes(trailer[0:4], 'little') != zlib.crc32(data):
+            raise ValueError('CRC32 mismatch')
+        if int.from_bytes(trailer[4:8], 'little') != len(data):
+            raise ValueError('ISIZE mismatch')
+    except (ValueError, EOFError) as e:
+        raise ValueError('%s: block at offset %d: %s' % (fileName, offset, e)) from None
+    return data
+
+
+def decodeBlock(fileName, offset):
+    ''' decodes the block at offset of a BGZF file (worker function of decompressParallel) '''
+    gz = GZIP(fileName)
+    try:
+        return inflateBlock(gz, fileName, offset)
+    finally:
+        gz.f.close()
+
+
+def decompressParallel(fileName, outName, workers=None):
+    ''' decompresses a BGZF file decoding its blocks in parallel over a pool of worker processes
+    (blocks are independent) and writing them in order. Returns the number of blocks
+
+    At most BLOCKS_PER_WORKER blocks per worker are submitted ahead of the one being written,
+    so memory does not grow with the size of the file. '''
+
+    reader = BGZFReader(fileName)
+    offsets = [offset for offset, start in reader.index]
+    reader.close()
+
+    workers = workers or os.cpu_count() or 1
+    pending = collections.deque()
+    with open(outName, 'wb') as f, concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for offset in offsets:
+            if len(pending) == workers * BLOCKS_PER_WORKER:
+                f.write(pending.popleft().result())
+            pending.append(pool.submit(decodeBlock, fileName, offset))
+        while pending:
+            f.write(pending.popleft().result())
+
+    return len(offsets)
+
+
+class BGZFWriter:
+    ''' writes a BGZF file: data is cut in blocks of BLOCK_DATA_SIZE bytes, each compressed
+    as an independent gzip member (stored if deflate does not fit in 64 KiB) '''
+
+    def __init__(self, fileName, level=6):
+        self.f = open(fileName, 'wb')
+        self.level = level
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BLOCK_DATA_SIZE:
+            self.writeBlock(bytes(self.buffer[:BLOCK_DATA_SIZE]))
+            del self.buffer[:BLOCK_DATA_SIZE]
+
+    def tell(self):
+        ''' virtual offset at which the next byte written will be found '''
+        return makeVirtualOffset(self.f.tell(), len(self.buffer))
+
+    def flush(self):
+        ''' ends the current block, so that the next write starts a new one '''
+        if self.buffer:
+            self.writeBlock(bytes(self.buffer))
+            self.buffer = bytearray()
+
+    def writeBlock(self, data):
+        cdata = encoder.deflate(data, self.level)
+        # header (18 bytes) + CDATA + trailer (8 bytes)
+        if 18 + len(cdata) + 8 > MAX_BLOCK_SIZE:
+            cdata = encoder.deflate(data, 0)
+
+        BSIZE = 18 + len(cdata) + 8 - 1
+        extra = b'BC' + (2).to_bytes(2, 'little') + BSIZE.to_bytes(2, 'little')
+        self.f.write(encoder.gzipHeader(extra=extra) + cdata + encoder.gzipTrailer(data))
+
+    def close(self):
+        self.flush()
+        self.f.write(EOF_BLOCK)
+        self.f.close()
+
+
+def compressFile(fileName, outName, level=6):
+    ''' compresses a file into BGZF '''
+    writer = BGZFWriter(outName, level)
+    with open(fileName, 'rb') as f:
+        while True:
+            data = f.read(BLOCK_DATA_SIZE * 16)
+            if not data:
+                break
+            writer.write(data)
+    writer.close()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='BGZF (blocked gzip) compression and random access')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cmd = commands.add_parser('compress', help='compress FILE into FILE.gz')
+    cmd.add_argument('file')
+    cmd.add_argument('-l', '--level', type=int, default=6)
+
+    cmd = commands.add_parser('decompress', help='decompress FILE.gz, decoding blocks in parallel')
+    cmd.add_argument('file')
+    cmd.add_argument('-j', '--jobs', type=int, default=None)
+
+    cmd = commands.add_parser('index', help='print the block index (file offset, decompressed offset)')
+    cmd.add_argument('file')
+
+    cmd = commands.add_parser('read', help='print LENGTH bytes from a virtual offset')
+    cmd.add_argument('file')
+    cmd.add_argument('voffset', type=int)
+    cmd.add_argument('length', type=int)
+
+    args = parser.parse_args()
+
+    if args.command == 'compress':
+        compressFile(args.file, args.file + '.gz', args.level)
+
+    elif args.command == 'decompress':
+        outName = args.file[:-3] if args.file.endswith('.gz') else args.file + '.out'
+        print("End: %d block(s) decoded." % decompressParallel(args.file, outName, args.jobs))
+
+    elif args.command == 'index':
+        reader = BGZFReader(args.file)
+        for offset, start in reader.index:
+            print(offset, start)
+        reader.close()
+
+    elif args.command == 'read':
+        reader = BGZFReader(args.file)
+        reader.seek(args.voffset)
+        sys.stdout.buffer.write(reader.read(args.length))
+        reader.close()
@@ -0,0 +1,295 @@
+# Teoria da Informacao, LEI, 2022
+# Per block statistics of a gzip file: code lengths, symbol frequencies and match distributions
+# collected while decoding, compared with the Shannon entropy of the data and with the fixed Huffman code
+
+import sys
+import math
+import json
+import argparse
+from gzip import GZIP, FIXED_LITLEN_LENS, FIXED_DIST_LENS
+
+
+BLOCK_TYPES = ('stored', 'fixed', 'dynamic')
+
+
+def entropy(counts):
+    ''' Shannon entropy, in bits per symbol, of a list of symbol counts '''
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    return -sum(c * math.log2(c / total) for c in counts if c) / total
+
+
+def codeBits(counts, lens):
+    ''' bits taken by the symbols counted in counts when coded with the code lengths lens '''
+    return sum(c * l for c, l in zip(counts, lens))
+
+
+def lensFromTree(tree, size):
+    ''' code length of each of the size symbols of a Huffman tree (0 if not in the tree; symbols past
+    size, like 286 and 287 of the fixed code, can never be used and are left out) '''
+    lens = [0] * size
+    for code, index in tree.codes():
+        if index < size:
+            lens[index] = len(code)
+    return lens
+
+
+class BlockStats:
+    ''' what the decoder learned about one deflate block '''
+
+    def __init__(self, number, member, startBit):
+        self.number = number
+        self.member = member
+        self.type = None           # 0: stored, 1: fixed, 2: dynamic
+        self.startBit = startBit   # offset in bits of the block in the file
+        self.headerBits = 0        # BFINAL, BTYPE and, for dynamic blocks, the code trees (for stored blocks, LEN, NLEN and padding)
+        self.dataBits = 0          # coded symbols with their extra bits, end of block included
+        self.outputBytes = 0
+        self.HLIT = self.HDIST = self.HCLEN = 0
+        self.clenLens = []         # code lengths of the code lengths alphabet (dynamic blocks)
+        self.litLens = []          # code lengths of the literal/length alphabet (286 symbols)
+        self.distLens = []         # code lengths of the distance alphabet (30 symbols)
+        self.litCounts = [0] * 286
+        self.distCounts = [0] * 30
+        self.byteCounts = [0] * 256   # histogram of the decoded bytes
+
+    def totalBits(self):
+        return self.headerBits + self.dataBits
+
+    def literals(self):
+        return sum(self.litCounts[:256])
+
+    def matches(self):
+        return sum(self.litCounts[257:])
+
+    def averageMatch(self):
+        ''' average match length, in bytes '''
+        matches = self.matches()
+        return (self.outputBytes - self.literals()) / matches if matches else 0.0
+
+    def symbolBits(self):
+        ''' bits of the Huffman codes alone (extra bits excluded) '''
+        return codeBits(self.litCounts, self.litLens) + codeBits(self.distCounts, self.distLens)
+
+    def extraBits(self):
+        return self.dataBits - self.symbolBits() if self.type else 0
+
+    def literalBits(self):
+        ''' average code length of the literals, in bits '''
+        literals = self.literals()
+        return codeBits(self.litCounts[:256], self.litLens) / literals if literals else 0.0
+
+    def literalEntropy(self):
+        ''' Shannon entropy of the decoded literals, in bits per literal '''
+        return entropy(self.litCounts[:256])
+
+    def byteEntropy(self):
+        ''' order-0 entropy of the decoded bytes, in bits per byte '''
+        return entropy(self.byteCounts)
+
+    def entropyBits(self):
+        ''' lower bound for the data of the block with this LZ77 parse: every symbol coded with
+        its information content (-log2 p) in its alphabet, plus the extra bits '''
+        bits = 0.0
+        for counts in (self.litCounts, self.distCounts):
+            total = sum(counts)
+            bits -= sum(c * math.log2(c / total) for c in counts if c)
+        return bits + self.extraBits()
+
+    def fixedBits(self):
+        ''' size of the same symbols in a block coded with the fixed Huffman code '''
+        if not self.type:
+            return None
+        return 3 + codeBits(self.litCounts, FIXED_LITLEN_LENS) + codeBits(self.distCounts, FIXED_DIST_LENS) + self.extraBits()
+
+    def storedBits(self):
+        ''' size of the decoded bytes as stored blocks (byte aligned, LEN and NLEN every 65535 bytes) '''
+        return 8 * self.outputBytes + 40 * max(1, -(-self.outputBytes // 65535))
+
+    def toDict(self):
+        fixedBits = self.fixedBits()
+        return {
+            'block': self.number,
+            'member': self.member,
+            'type': BLOCK_TYPES[self.type],
+            'startBit': self.startBit,
+            'headerBits': self.headerBits,
+            'dataBits': self.dataBits,
+            'extraBits': self.extraBits(),
+            'outputBytes': self.outputBytes,
+            'literals': self.literals(),
+            'matches': self.matches(),
+            'averageMatch': self.averageMatch(),
+            'literalBits': self.literalBits(),
+            'literalEntropy': self.literalEntropy(),
+            'byteEntropy': self.byteEntropy(),
+            'entropyBits': self.entropyBits(),
+            'fixedBits': fixedBits,
+            'fixedGap': None if fixedBits is None else fixedBits - self.totalBits(),
+            'storedBits': self.storedBits(),
+            'HLIT': self.HLIT,
+            'HDIST': self.HDIST,
+            'HCLEN': self.HCLEN,
+            'clenLens': self.clenLens,
+            'litLens': self.litLens,
+            'distLens': self.distLens,
+            'litCounts': self.litCounts,
+            'distCounts': self.distCounts,
+        }
+
+    def __str__(self):
+        total = self.totalBits()
+        lines = ["block %d (member %d, %s): %d -> %d bytes, %.3f bits/byte (order-0 entropy %.3f)"
+                 % (self.number, self.member, BLOCK_TYPES[self.type], self.outputBytes, (total + 7) // 8,
+                    total / self.outputBytes if self.outputBytes else 0.0, self.byteEntropy())]
+        if self.type:
+            lines.append("  header %d bits (%.2f%%), data %d bits (%d extra)"
+                         % (self.headerBits, 100 * self.headerBits / total, self.dataBits, self.extraBits()))
+            lines.append("  %d literals at %.3f bits (entropy %.3f), %d matches of %.1f bytes on average"
+                         % (self.literals(), self.literalBits(), self.literalEntropy(), self.matches(), self.averageMatch()))
+            lines.append("  data %d bits vs entropy bound %.0f bits (+%.2f%%)"
+                         % (self.dataBits, self.entropyBits(), 100 * (self.dataBits / self.entropyBits() - 1) if self.entropyBits() else 0.0))
+            lines.append("  fixed Huffman %d bits: %+d bits vs this block" % (self.fixedBits(), self.fixedBits() - total))
+        else:
+            lines.append("  header %d bits" % self.headerBits)
+        return '\n'.join(lines)
+
+
+class BlockAnalyzer(GZIP):
+    ''' GZIP decoder that records a BlockStats for every block it decodes (see analyze).
+    The decoding itself is the one of GZIP: only the hooks below are added, so GZIP pays nothing for them '''
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.blocks = []
+        self.current = None
+        self.litTable = self.distTable = None
+
+    def analyze(self):
+        ''' decodes every member of the file, discarding the output, and returns the list of BlockStats '''
+
+        self.blocks = []
+        try:
+            if self.getHeader() != 0:
+                raise ValueError('Formato invalido!')
+            self.inflateMembers(lambda data: None)
+        finally:
+            self.f.close()
+        return self.blocks
+
+    def startBlock(self):
+        self.current = BlockStats(len(self.blocks) + 1, self.numMembers + 1, self.bitPosition())
+
+    def endBlock(self, data):
+        ''' closes the current block, data being its decoded bytes '''
+        block = self.current
+        block.dataBits = self.bitPosition() - block.startBit - block.headerBits
+        block.outputBytes = len(data)
+        for byte in data:
+            block.byteCounts[byte] += 1
+        self.blocks.append(block)
+        self.startBlock()
+
+    def inflate(self, write, limit=None, output=None, onBlock=None):
+        self.startBlock()
+        return super().inflate(write, limit, output, onBlock)
+
+    def readStoredBlock(self):
+        self.current.type = 0
+        data = super().readStoredBlock()
+        # everything but the data itself is overhead
+        self.current.headerBits = self.bitPosition() - self.current.startBit - 8 * len(data)
+        self.endBlock(data)
+        return data
+
+    def readDynamicBlock(self):
+        HLIT, HDIST, HCLEN = super().readDynamicBlock()
+        self.current.type = 2
+        self.current.HLIT, self.current.HDIST, self.current.HCLEN = HLIT, HDIST, HCLEN
+        return HLIT, HDIST, HCLEN
+
+    def storeCLENLengths(self, HCLEN):
+        self.current.clenLens = super().storeCLENLengths(HCLEN)
+        return self.current.clenLens
+
+    def decompressLZ77(self, HuffmanTreeLITLEN, HuffmanTreeDIST, output, stopAt=None, flush=None):
+        block = self.current
+        if block.type is None:
+            block.type = 1
+        block.headerBits = self.bitPosition() - block.startBit
+        block.litLens = lensFromTree(HuffmanTreeLITLEN, 286)
+        block.distLens = lensFromTree(HuffmanTreeDIST, 30)
+
+        self.litTable = HuffmanTreeLITLEN.decodeTable()
+        self.distTable = HuffmanTreeDIST.decodeTable()
+        start = len(output)
+        try:
+            # no flush: the whole block stays in output, to be counted
+            output = super().decompressLZ77(HuffmanTreeLITLEN, HuffmanTreeDIST, output, stopAt)
+        finally:
+            self.litTable = self.distTable = None
+        self.endBlock(output[start:])
+        return output
+
+    def decodeSymbol(self, table):
+        symbol = super().decodeSymbol(table)
+        if table is self.litTable:
+            self.current.litCounts[symbol] += 1
+        elif table is self.distTable:
+            self.current.distCounts[symbol] += 1
+        return symbol
+
+
+def summary(blocks):
+    ''' totals over every block of a file '''
+
+    outputBytes = sum(block.outputBytes for block in blocks)
+    totalBits = sum(block.totalBits() for block in blocks)
+    headerBits = sum(block.headerBits for block in blocks)
+    byteCounts = [sum(block.byteCounts[i] for block in blocks) for i in range(256)]
+    huffman = [block for block in blocks if block.type]
+    return {
+        'blocks': len(blocks),
+        'outputBytes': outputBytes,
+        'compressedBits': totalBits,
+        'bitsPerByte': totalBits / outputBytes if outputBytes else 0.0,
+        'byteEntropy': entropy(byteCounts),
+        'headerBits': headerBits,
+        'headerShare': headerBits / totalBits if totalBits else 0.0,
+        'fixedBits': sum(block.fixedBits() for block in huffman) + sum(block.totalBits() for block in blocks if not block.type),
+        'averageMatch': ((outputBytes - sum(block.literals() for block in huffman)) / sum(block.matches() for block in huffman)
+                         if sum(block.matches() for block in huffman) else 0.0),
+    }
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='per block compression statistics and entropy report of .gz files')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--json', action='store_true', help='print the statistics as JSON (one object per file, with the symbol counts)')
+    args = parser.parse_args()
+
+    failures = 0
+    for fileName in args.files:
+        try:
+            blocks = BlockAnalyzer(fileName).analyze()
+        except (OSError, ValueError, EOFError, IndexError) as e:
+            print("Error: %s: %s" % (fileName, e), file=sys.stderr)
+            failures += 1
+            continue
+
+        total = summary(blocks)
+        if args.json:
+            print(json.dumps({'file': fileName, 'summary': total, 'blocks': [block.toDict() for block in blocks]}))
+            continue
+
+        print("%s:" % fileName)
+        for block in blocks:
+            print(block)
+        print("total: %d block(s), %d -> %d bytes, %.3f bits/byte (order-0 entropy %.3f), headers %.2f%%, "
+              "all fixed Huffman %+d bits, matches of %.1f bytes on average"
+              % (total['blocks'], total['outputBytes'], (total['compressedBits'] + 7) // 8, total['bitsPerByte'],
+                 total['byteEntropy'], 100 * total['headerShare'], total['fixedBits'] - total['compressedBits'], total['averageMatch']))
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,927 @@
+# Teoria da Informacao, LEI, 2022
+# Deflate (RFC 1951) encoder: the counterpart of the GZIP decoder in gzip.py
+
+import re
+import zlib
+import math
+import itertools
+import collections
+from huffmantree import packageMerge, canonicalCodes, HuffmanEncodeTable
+
+
+# Lengths 3..258 are coded with symbols 257..285 plus extra bits
+LENGTH_BASE = (3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258)
+LENGTH_EXTRA = (0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0)
+
+# Distances 1..32768 are coded with symbols 0..29 plus extra bits
+DIST_BASE = (1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145, 8193, 12289, 16385, 24577)
+DIST_EXTRA = (0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13)
+
+WINDOW_SIZE = 32768
+MIN_MATCH = 3
+MAX_MATCH = 258
+MAX_STORED = 65535
+
+
+def symbolTable(bases, size):
+    ''' for every value in [0, size[ returns the index of the last base not above it '''
+    table = [0] * size
+    sym = 0
+    for value in range(bases[0], size):
+        while sym + 1 < len(bases) and bases[sym + 1] <= value:
+            sym += 1
+        table[value] = sym
+    return tuple(table)
+
+
+# LENGTH_SYMBOL[length] and DIST_SYMBOL[distance]: index in the *_BASE / *_EXTRA tables
+LENGTH_SYMBOL = symbolTable(LENGTH_BASE, MAX_MATCH + 1)
+DIST_SYMBOL = symbolTable(DIST_BASE, WINDOW_SIZE + 1)
+
+
+# Order in which the code lengths of the code lengths alphabet are written (see GZIP.storeCLENLengths)
+CLEN_ORDER = (16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15)
+CLEN_EXTRA = {16: 2, 17: 3, 18: 7}
+
+# maximum code lengths: literal/length and distance codes, code lengths code
+MAX_BITS = 15
+MAX_CLEN_BITS = 7
+
+
+def huffmanLengths(freqs, maxLen):
+    ''' optimal code lengths for the symbol frequencies freqs with no code longer than maxLen
+    (package-merge, see huffmantree.packageMerge). At least two symbols get a code, so that the code is complete '''
+
+    freqs = list(freqs)
+    for i in range(len(freqs)):
+        if sum(1 for f in freqs if f) >= 2:
+            break
+        if not freqs[i]:
+            freqs[i] = 1
+    return packageMerge(freqs, maxLen)
+
+
+def runLengthCodeLengths(lens):
+    ''' codes an array of code lengths with the code lengths alphabet (the reverse of GZIP.storeTreeCodeLens):
+    returns a list of (symbol, extra bits value) with 16 repeating the previous length 3-6 times,
+    17 and 18 coding 3-10 and 11-138 zeros '''
+
+    out = []
+    i = 0
+    n = len(lens)
+    while i < n:
+        length = lens[i]
+        run = 1
+        while i + run < n and lens[i + run] == length:
+            run += 1
+
+        if length == 0:
+            left = run
+            while left >= 11:
+                r = min(left, 138)
+                out.append((18, r - 11))
+                left -= r
+            if left >= 3:
+                out.append((17, left - 3))
+                left = 0
+            out += [(0, 0)] * left
+        else:
+            # the length itself, then repeats of it
+            out.append((length, 0))
+            left = run - 1
+            while left >= 3:
+                r = min(left, 6)
+                out.append((16, r - 3))
+                left -= r
+            out += [(length, 0)] * left
+        i += run
+
+    return out
+
+
+def encodeTable(lens):
+    ''' the canonical Huffman code for an array of code lengths, as a huffmantree.HuffmanEncodeTable '''
+    return HuffmanEncodeTable(canonicalCodes(lens), len(lens))
+
+
+class CodeLengthsHeader:
+    ''' the code lengths of one or more alphabets, run-length coded with the code lengths alphabet, and the
+    Huffman code of that alphabet: the part of a dynamic block header that follows HDIST (RFC 1951, 3.2.7).
+    Runs do not cross from one array of lengths to the next (see GZIP.storeTreeCodeLens) '''
+
+    def __init__(self, *lensArrays):
+        self.lensRLE = []
+        for lens in lensArrays:
+            self.lensRLE += runLengthCodeLengths(lens)
+
+        clenFreqs = [0] * 19
+        for sym, extra in self.lensRLE:
+            clenFreqs[sym] += 1
+        self.clenTable = encodeTable(huffmanLengths(clenFreqs, MAX_CLEN_BITS))
+        clenLens = self.clenTable.lengths
+        self.HCLEN = max(4, max(i for i, sym in enumerate(CLEN_ORDER) if clenLens[sym]) + 1)
+
+        # HCLEN, the code lengths code and the code lengths
+        self.bits = 4 + 3 * self.HCLEN + sum(clenLens[sym] + CLEN_EXTRA.get(sym, 0) for sym, extra in self.lensRLE)
+
+    def write(self, out):
+        clenCodes = self.clenTable.codes
+        clenLens = self.clenTable.lengths
+        out.writeBits(self.HCLEN - 4, 4)
+        for sym in CLEN_ORDER[:self.HCLEN]:
+            out.writeBits(clenLens[sym], 3)
+        for sym, extra in self.lensRLE:
+            out.writeBits(clenCodes[sym], clenLens[sym])
+            if sym in CLEN_EXTRA:
+                out.writeBits(extra, CLEN_EXTRA[sym])
+
+
+class DynamicCode:
+    ''' Huffman codes of a dynamic block built from the symbol frequencies of its tokens,
+    with the header that describes them (RFC 1951, 3.2.7) '''
+
+    def __init__(self, litFreqs, distFreqs):
+        self.litTable = encodeTable(huffmanLengths(litFreqs, MAX_BITS))
+        self.distTable = encodeTable(huffmanLengths(distFreqs, MAX_BITS))
+
+        # unused symbols at the end of the alphabets are not sent
+        litLens = self.litTable.lengths
+        distLens = self.distTable.lengths
+        self.HLIT = max(257, max(i for i, length in enumerate(litLens) if length) + 1)
+        self.HDIST = max(1, max(i for i, length in enumerate(distLens) if length) + 1)
+        self.lengthsHeader = CodeLengthsHeader(litLens[:self.HLIT], distLens[:self.HDIST])
+
+        # HLIT, HDIST and the code lengths
+        self.headerBits = 10 + self.lengthsHeader.bits
+
+    def dataBits(self, litFreqs, distFreqs):
+        ''' bits of the Huffman codes of the symbols counted in litFreqs and distFreqs (extra bits excluded) '''
+        return (sum(f * length for f, length in zip(litFreqs, self.litTable.lengths))
+                + sum(f * length for f, length in zip(distFreqs, self.distTable.lengths)))
+
+    def writeHeader(self, out):
+        out.writeBits(self.HLIT - 257, 5)
+        out.writeBits(self.HDIST - 1, 5)
+        self.lengthsHeader.write(out)
+
+
+# Fixed Huffman code (RFC 1951, 3.2.6)
+FIXED_LITLEN_LENS = (8,) * 144 + (9,) * 112 + (7,) * 24 + (8,) * 8
+FIXED_DIST_LENS = (5,) * 30
+FIXED_LITLEN_TABLE = encodeTable(FIXED_LITLEN_LENS)
+FIXED_DIST_TABLE = encodeTable(FIXED_DIST_LENS)
+
+
+class BitWriter:
+    ''' accumulates bits LSB first (deflate bit order) and emits them 64 bits at a time '''
+
+    def __init__(self):
+        self.out = bytearray()
+        self.bits_buffer = 0
+        self.available_bits = 0
+
+    def writeBits(self, value, n):
+        ''' appends the n low bits of value '''
+        self.bits_buffer |= value << self.available_bits
+        self.available_bits += n
+        if self.available_bits >= 64:
+            self.out += (self.bits_buffer & 0xffffffffffffffff).to_bytes(8, 'little')
+            self.bits_buffer >>= 64
+            self.available_bits -= 64
+
+    def alignToByte(self):
+        ''' pads with zero bits up to the next byte boundary and moves the whole bytes to out '''
+        nbytes = (self.available_bits + 7) // 8
+        self.out += self.bits_buffer.to_bytes(nbytes, 'little')
+        self.bits_buffer = 0
+        self.available_bits = 0
+
+    def writeBytes(self, data):
+        ''' appends bytes (the writer must be on a byte boundary) '''
+        self.alignToByte()
+        self.out += data
+
+    def take(self):
+        ''' returns and removes the whole bytes written so far (a partial byte stays in the buffer) '''
+        nbytes = self.available_bits // 8
+        if nbytes:
+            self.out += (self.bits_buffer & ((1 << (8 * nbytes)) - 1)).to_bytes(nbytes, 'little')
+            self.bits_buffer >>= 8 * nbytes
+            self.available_bits -= 8 * nbytes
+        data = bytes(self.out)
+        self.out = bytearray()
+        return data
+
+
+def matchLength(data, cand, pos, limit):
+    ''' length of the common prefix of data[cand:] and data[pos:], up to limit '''
+    length = 0
+    while length + 8 <= limit and data[cand + length : cand + length + 8] == data[pos + length : pos + length + 8]:
+        length += 8
+    while length < limit and data[cand + length] == data[pos + length]:
+        length += 1
+    return length
+
+
+def hashChains(data, start=0):
+    ''' hash chains over the 3-byte prefixes of data, for the positions from start - 32 KiB on: prev[i] is the
+    previous position with the same prefix as i, -1 if none (a list of len(data) - 2 entries) '''
+
+    m = max(0, len(data) - MIN_MATCH + 1)
+    prev = [-1] * m
+    head = {}        # 3-byte prefix -> latest position
+    for i in range(max(0, start - WINDOW_SIZE), m):
+        key = data[i : i + MIN_MATCH]
+        prev[i] = head.get(key, -1)
+        head[key] = i
+    return prev
+
+
+def greedyParse(data, prev, maxChain, start=0):
+    ''' greedy LZ77 parse of data[start:], following the hash chains prev up to maxChain candidates per position
+    (data[:start] is history that matches may refer to). Returns a list of tokens: an int for a literal,
+    a (length, distance) tuple for a match '''
+
+    n = len(data)
+    m = len(prev)
+    tokens = []
+    i = start
+    while i < n:
+        bestLen = 0
+        if i < m:
+            cand = prev[i]
+            limit = min(MAX_MATCH, n - i)
+            bestDist = 0
+            chain = maxChain
+            while cand >= 0 and i - cand <= WINDOW_SIZE and chain > 0:
+                # quick reject: a longer match must also match at bestLen
+                if data[cand + bestLen] == data[i + bestLen]:
+                    length = matchLength(data, cand, i, limit)
+                    if length > bestLen:
+                        bestLen, bestDist = length, i - cand
+                        if length == limit:
+                            break
+                cand = prev[cand]
+                chain -= 1
+
+        if bestLen >= MIN_MATCH:
+            tokens.append((bestLen, bestDist))
+            i += bestLen
+        else:
+            tokens.append(data[i])
+            i += 1
+
+    return tokens
+
+
+def findMatches(data, maxChain, start=0):
+    ''' greedy LZ77 parse of data[start:] with hash chains over 3-byte prefixes (see greedyParse) '''
+    return greedyParse(data, hashChains(data, start), maxChain, start)
+
+
+# runs of 4 or more copies of a byte: the first one is a literal, the others a match at distance 1
+RUN_PATTERN = re.compile(rb'(.)\1{3,}', re.DOTALL)
+
+
+def findRuns(data, start=0):
+    ''' LZ77 parse of data[start:] with matches at distance 1 only (runs of a repeated byte), found by a regular
+    expression instead of a match search. Returns tokens like findMatches '''
+
+    tokens = []
+    pos = start
+    for m in RUN_PATTERN.finditer(data, start):
+        tokens += data[pos : m.start() + 1]
+        left = m.end() - m.start() - 1
+        while left >= MIN_MATCH:
+            # the last match must not leave less than MIN_MATCH bytes behind
+            length = min(left, MAX_MATCH) if left - MAX_MATCH >= MIN_MATCH or left <= MAX_MATCH else left - MIN_MATCH
+            tokens.append((length, 1))
+            left -= length
+        tokens += data[m.end() - left : m.end()]
+        pos = m.end()
+    tokens += data[pos:]
+    return tokens
+
+
+# maximum hash chain length searched for each compression level (0: stored blocks only)
+LEVEL_CHAIN = (0, 4, 8, 16, 32, 64, 128, 256, 1024, 4096)
+
+# Strategies, as in zlib: LZ77 with hash chains, literals only, or runs only
+DEFAULT_STRATEGY = 'default'
+HUFFMAN_ONLY = 'huffman'
+RLE = 'rle'
+ULTRA = 'ultra'
+STRATEGIES = (DEFAULT_STRATEGY, HUFFMAN_ONLY, RLE, ULTRA)
+
+# Incompressible data detection: the input is probed in chunks of PROBE_SIZE bytes, looking for
+# repeats from SAMPLE_SLICES slices of SAMPLE_SLICE bytes spread over the chunk
+PROBE_SIZE = 1 << 16
+SAMPLE_SLICES = 16
+SAMPLE_SLICE = 256
+# chunks whose entropy (bits per byte, over the whole chunk) reaches this are stored, unless they
+# repeat themselves. Media (mp3, jpeg) sits around 7.8-7.94 and still gains 4-8% from deflate;
+# compressed or encrypted data is above 7.99
+STORED_ENTROPY = 7.95
+
+
+def sampleEntropy(sample):
+    ''' order-0 entropy of sample in bits per byte, with the Miller-Madow correction
+    (the entropy of a small sample underestimates the entropy of the source) '''
+    counts = collections.Counter(sample).values()
+    n = len(sample)
+    if n == 0:
+        return 0.0
+    return -sum(c * math.log2(c / n) for c in counts) / n + (len(counts) - 1) / (2 * n * math.log(2))
+
+
+def isIncompressible(chunk, storedEntropy=STORED_ENTROPY):
+    ''' guesses, without searching matches, if deflate would not gain on chunk: its byte histogram is
+    close to uniform (Huffman coding cannot gain) and the starts of at most a few slices appear earlier
+    in the window (encrypted or already compressed data) '''
+
+    if sampleEntropy(chunk) < storedEntropy:
+        return False
+
+    if len(chunk) <= SAMPLE_SLICES * SAMPLE_SLICE:
+        starts = range(0, len(chunk), SAMPLE_SLICE)
+    else:
+        step = (len(chunk) - SAMPLE_SLICE) // (SAMPLE_SLICES - 1)
+        starts = range(0, step * SAMPLE_SLICES, step)
+    # repeated data with a high entropy (a random block repeated) is still compressible
+    repeated = sum(1 for i in starts if i and chunk.find(chunk[i : i + 8], max(0, i - WINDOW_SIZE), i + 7) >= 0)
+    return repeated < len(starts) // 4
+
+
+# tokens per segment in block splitting: segments are the smallest blocks
+SPLIT_TOKENS = 4096
+
+
+def storedBits(nbytes, bitPos=0):
+    ''' exact size of nbytes as stored blocks, the first one starting at bit bitPos of a byte:
+    3 header bits and padding to a byte boundary, LEN and NLEN, then the bytes, every 65535 bytes '''
+    chunks = max(1, -(-nbytes // MAX_STORED))
+    return 3 + (-(bitPos + 3)) % 8 + 32 + 40 * (chunks - 1) + 8 * nbytes
+
+
+class TokenBlock:
+    ''' a run of LZ77 tokens (a candidate block) with the statistics needed to cost it '''
+
+    def __init__(self, tokens, start):
+        self.tokens = tokens
+        self.start = start          # offset of the first byte of the block in the data
+        self.litFreqs = [0] * 286
+        self.distFreqs = [0] * 30
+        self.extraBits = 0
+        self.nbytes = 0
+
+        litFreqs = self.litFreqs
+        for token in tokens:
+            if token.__class__ is int:
+                litFreqs[token] += 1
+                self.nbytes += 1
+            else:
+                length, distance = token
+                sym = LENGTH_SYMBOL[length]
+                litFreqs[257 + sym] += 1
+                dsym = DIST_SYMBOL[distance]
+                self.distFreqs[dsym] += 1
+                self.extraBits += LENGTH_EXTRA[sym] + DIST_EXTRA[dsym]
+                self.nbytes += length
+        litFreqs[256] = 1
+
+    def merge(self, other):
+        ''' returns the block made of this block followed by other '''
+        block = TokenBlock([], self.start)
+        block.tokens = self.tokens + other.tokens
+        block.litFreqs = [a + b for a, b in zip(self.litFreqs, other.litFreqs)]
+        block.litFreqs[256] = 1
+        block.distFreqs = [a + b for a, b in zip(self.distFreqs, other.distFreqs)]
+        block.extraBits = self.extraBits + other.extraBits
+        block.nbytes = self.nbytes + other.nbytes
+        return block
+
+    def fixedBits(self):
+        return (3 + sum(f * length for f, length in zip(self.litFreqs, FIXED_LITLEN_LENS))
+                + sum(f * length for f, length in zip(self.distFreqs, FIXED_DIST_LENS)) + self.extraBits)
+
+    def dynamicBits(self, code=None):
+        if code is None:
+            code = DynamicCode(self.litFreqs, self.distFreqs)
+        return 3 + code.headerBits + code.dataBits(self.litFreqs, self.distFreqs) + self.extraBits
+
+    def bestBits(self, bitPos=0):
+        ''' exact size of the block as the cheapest of stored, fixed and dynamic '''
+        return min(storedBits(self.nbytes, bitPos), self.fixedBits(), self.dynamicBits())
+
+
+def splitBlocks(tokens, start=0):
+    ''' cuts tokens in blocks where the symbol statistics change: the tokens are cut in segments of
+    SPLIT_TOKENS and each segment joins the current block if one block costs less than two, otherwise
+    it starts a new one. Returns a list of TokenBlock (at least one) '''
+
+    blocks = []
+    current = None
+    for i in range(0, len(tokens), SPLIT_TOKENS):
+        segment = TokenBlock(tokens[i : i + SPLIT_TOKENS], start)
+        start += segment.nbytes
+        if current is None:
+            current = segment
+            continue
+        merged = current.merge(segment)
+        if merged.bestBits() <= current.bestBits() + segment.bestBits():
+            current = merged
+        else:
+            blocks.append(current)
+            current = segment
+
+    blocks.append(current if current is not None else TokenBlock([], start))
+    return blocks
+
+
+# Optimal parsing (ULTRA strategy): hash chain length searched for all the matches of a position,
+# and default number of parse / cost model iterations
+ULTRA_CHAIN = 8192
+ULTRA_ITERATIONS = 10
+
+
+def findAllMatches(data, maxChain=ULTRA_CHAIN, start=0):
+    ''' for every position of data[start:], the matches worth considering: a list of (length, distance) with
+    growing lengths, each one at the smallest distance that reaches it (a match of any length up to the
+    last one can then be taken at the distance of the first entry at least as long) '''
+
+    n = len(data)
+    head = {}
+    prev = {}
+    for i in range(max(0, start - WINDOW_SIZE), start):
+        if i + MIN_MATCH <= n:
+            key = data[i : i + MIN_MATCH]
+            prev[i] = head.get(key, -1)
+            head[key] = i
+
+    matches = []
+    for i in range(start, n):
+        found = []
+        if i + MIN_MATCH <= n:
+            key = data[i : i + MIN_MATCH]
+            cand = head.get(key, -1)
+            head[key] = i
+            prev[i] = cand
+
+            limit = min(MAX_MATCH, n - i)
+            bestLen = MIN_MATCH - 1
+            chain = maxChain
+            while cand >= 0 and i - cand <= WINDOW_SIZE and chain > 0:
+                if data[cand + bestLen] == data[i + bestLen]:
+                    length = matchLength(data, cand, i, limit)
+                    if length > bestLen:
+                        bestLen = length
+                        found.append((length, i - cand))
+                        if length == limit:
+                            break
+                cand = prev[cand]
+                chain -= 1
+        matches.append(found)
+
+    return matches
+
+
+class CostModel:
+    ''' estimated cost in bits of every literal, length and distance, from the symbol frequencies of a parse:
+    -log2 of the symbol probability (symbols not seen cost as if seen once) plus the extra bits '''
+
+    def __init__(self, litFreqs=None, distFreqs=None):
+        if litFreqs is None:
+            # first parse: the fixed Huffman code
+            litBits = list(FIXED_LITLEN_LENS[:286])
+            distBits = list(FIXED_DIST_LENS)
+        else:
+            litBits = self.symbolBits(litFreqs)
+            distBits = self.symbolBits(distFreqs)
+
+        self.literal = litBits[:256]
+        self.length = [0.0] * (MAX_MATCH + 1)
+        for length in range(MIN_MATCH, MAX_MATCH + 1):
+            sym = LENGTH_SYMBOL[length]
+            self.length[length] = litBits[257 + sym] + LENGTH_EXTRA[sym]
+        self.distance = [distBits[sym] + DIST_EXTRA[sym] for sym in range(30)]
+
+    @staticmethod
+    def symbolBits(freqs):
+        total = sum(freqs)
+        if total == 0:
+            return [1.0] * len(freqs)
+        unseen = math.log2(total) + 1
+        return [math.log2(total / f) if f else unseen for f in freqs]
+
+
+def optimalTokens(data, start, matches, model):
+    ''' cheapest parse of data[start:] under a cost model: shortest path where position i + L is reached from i
+    by a literal (L = 1) or by a match of length L. Returns the tokens of the path '''
+
+    n = len(data) - start
+    literal, lengthCost, distance = model.literal, model.length, model.distance
+    inf = float('inf')
+    cost = [inf] * (n + 1)
+    cost[0] = 0.0
+    choice = [None] * (n + 1)    # token ending at each position of the best path
+
+    for i in range(n):
+        c = cost[i]
+        byte = data[start + i]
+        if c + literal[byte] < cost[i + 1]:
+            cost[i + 1] = c + literal[byte]
+            choice[i + 1] = byte
+
+        prevLen = MIN_MATCH - 1
+        for length, dist in matches[i]:
+            dc = c + distance[DIST_SYMBOL[dist]]
+            # a maximal match is taken whole: trying every shorter length of long runs costs a lot and gains little
+            first = length if length == MAX_MATCH else prevLen + 1
+            for L in range(first, length + 1):
+                if dc + lengthCost[L] < cost[i + L]:
+                    cost[i + L] = dc + lengthCost[L]
+                    choice[i + L] = (L, dist)
+            prevLen = length
+
+    tokens = []
+    i = n
+    while i > 0:
+        token = choice[i]
+        tokens.append(token)
+        i -= 1 if token.__class__ is int else token[0]
+    tokens.reverse()
+    return tokens
+
+
+def optimalParse(data, start=0, iterations=ULTRA_ITERATIONS):
+    ''' LZ77 parse of data[start:] for maximum compression (as zopfli): all the matches are found once, then
+    the data is parsed along the cheapest path under a cost model, the model is rebuilt from the symbol
+    frequencies of that parse, and so on for iterations parses. Returns the tokens of the parse whose blocks
+    (see splitBlocks) are the smallest '''
+
+    matches = findAllMatches(data, ULTRA_CHAIN, start)
+    model = CostModel()
+    best = None
+    bestBits = 0
+    for iteration in range(max(1, iterations)):
+        tokens = optimalTokens(data, start, matches, model)
+        blocks = splitBlocks(tokens, start)
+        bits = sum(block.bestBits() for block in blocks)
+        if best is None or bits < bestBits:
+            best, bestBits = tokens, bits
+
+        litFreqs = [0] * 286
+        distFreqs = [0] * 30
+        for block in blocks:
+            litFreqs = [a + b for a, b in zip(litFreqs, block.litFreqs)]
+            distFreqs = [a + b for a, b in zip(distFreqs, block.distFreqs)]
+        model = CostModel(litFreqs, distFreqs)
+
+    return best
+
+
+# flush modes of DeflateEncoder.flush: SYNC_FLUSH ends the stream so far on a byte boundary,
+# FULL_FLUSH also forgets the window, so that decoding can start again from that point
+SYNC_FLUSH = 'sync'
+FULL_FLUSH = 'full'
+FLUSH_MODES = (SYNC_FLUSH, FULL_FLUSH)
+
+# bytes buffered by DeflateEncoder.write before they are compressed
+STREAM_BUFFER = 1 << 16
+
+# rsyncable mode: a cut is made where the rolling sum of the last RSYNC_WINDOW input bytes is a
+# multiple of RSYNC_WINDOW (as in gzip --rsyncable), but never less than RSYNC_WINDOW bytes after
+# the previous one. The bytes are summed through a table of 32-bit values: the sum of the bytes
+# themselves barely moves on text and would rarely cross a multiple
+RSYNC_WINDOW = 4096
+RSYNC_TABLE = tuple(zlib.crc32(bytes((i,))) for i in range(256))
+
+
+class RsyncChunker:
+    ''' finds content defined cut points in a stream with a rolling sum of its bytes: the cuts
+    depend only on the bytes around them, so after a change the cuts (and everything compressed
+    between two of them) are the same as before once the rolling window has moved past it '''
+
+    def __init__(self, window=RSYNC_WINDOW):
+        self.window = window
+        self.tail = b''        # last window bytes of the stream
+        self.sinceCut = 0      # bytes since the last cut
+
+    def scan(self, data):
+        ''' advances over data and returns the offsets in data of the cuts it holds '''
+
+        window = self.window
+        tail = self.tail
+        sums = list(itertools.accumulate(map(RSYNC_TABLE.__getitem__, tail + data), initial=0))
+        # rolling sum of the window ending after each byte of data
+        n = len(tail)
+        candidates = [j - n for j in range(n + 1, len(sums))
+                      if (sums[j] - sums[max(0, j - window)]) % window == 0]
+
+        cuts = []
+        last = -self.sinceCut
+        for pos in candidates:
+            if pos - last >= window:
+                cuts.append(pos)
+                last = pos
+        self.sinceCut = len(data) - last
+        self.tail = (tail + data)[-window:]
+        return cuts
+
+
+
+class DeflateEncoder:
+    ''' class for deflate compressing data (the output is a raw deflate stream)
+
+    level 0 emits stored blocks; levels 1-9 search LZ77 matches with longer hash chains
+    as the level grows. The matches are cut in blocks where their statistics change (see
+    splitBlocks) and every block is written as stored, fixed or dynamic, whichever is smallest.
+    Matches may refer to the data of previous compress calls and to a preset dictionary
+    (which the decoder must load in its window before decoding).
+
+    Chunks of the input that look incompressible (see isIncompressible) skip match finding
+    and are copied as stored blocks; storedEntropy=None turns the detection off.
+
+    strategy HUFFMAN_ONLY codes every byte as a literal and RLE only looks for runs of a
+    repeated byte (matches at distance 1): no match search, for data with skewed byte
+    frequencies but few long matches (images, audio samples). ULTRA spends iterations
+    optimal parses per input (see optimalParse) for the smallest output.
+
+    As a stream: write buffers data and compresses it STREAM_BUFFER bytes at a time, flush
+    makes everything written so far decodable (see flush) and finish ends the stream.
+
+    rsyncable: the input is cut at content defined points (see RsyncChunker) and the stream is
+    sync flushed at each one, so that a small change in the input only changes the output up to
+    the next cut after the window has forgotten it: rsync and deduplication find the rest unchanged '''
+
+    def __init__(self, level=6, dictionary=b'', storedEntropy=STORED_ENTROPY, strategy=DEFAULT_STRATEGY,
+                 iterations=ULTRA_ITERATIONS, rsyncable=False):
+        if not 0 <= level <= 9:
+            raise ValueError('compression level must be between 0 and 9')
+        if strategy not in STRATEGIES:
+            raise ValueError('unknown strategy %r' % (strategy,))
+        self.level = level
+        self.strategy = strategy
+        self.iterations = iterations
+        self.storedEntropy = storedEntropy
+        self.out = BitWriter()
+        self.history = bytes(dictionary[-WINDOW_SIZE:])   # last 32 KiB seen, for matches
+        self.pending = bytearray()                         # data given to write, not compressed yet
+        self.chunker = RsyncChunker() if rsyncable else None
+        self.pendingCuts = []                              # rsyncable cut points in pending
+
+    def compress(self, data, final=True):
+        ''' encodes data as one or more blocks (the last one with BFINAL set if final)
+        and returns the bytes completed so far '''
+        return self.compressChunks(data, self.chunker.scan(data) if self.chunker else [], final)
+
+    def compressChunks(self, data, cuts, final):
+        ''' compresses data, with a sync flush at each of the offsets in cuts '''
+
+        out = b''
+        pos = 0
+        for cut in cuts:
+            out += self.compressData(data[pos:cut], False) + self.syncFlush()
+            pos = cut
+        if pos == len(data) and not final:
+            return out + self.out.take()
+        return out + self.compressData(data[pos:], final)
+
+    def compressData(self, data, final):
+        ''' compress without cut points '''
+        if self.level == 0:
+            self.writeStoredBlocks(data, final)
+            self.history = (self.history + data)[-WINDOW_SIZE:]
+        elif data or final:
+            pieces = self.probe(data)
+            for k, (start, end, stored) in enumerate(pieces):
+                last = final and k == len(pieces) - 1
+                piece = data[start:end]
+                if stored:
+                    self.writeStoredBlocks(piece, last)
+                else:
+                    window = self.history + piece
+                    blocks = splitBlocks(self.tokenize(window, len(self.history)), len(self.history))
+                    for i, block in enumerate(blocks):
+                        self.writeBlock(block, window, last and i == len(blocks) - 1)
+                self.history = (self.history + piece)[-WINDOW_SIZE:]
+
+        if final:
+            self.out.alignToByte()
+        return self.out.take()
+
+    def write(self, data):
+        ''' adds data to the stream and returns the compressed bytes completed so far '''
+
+        if self.chunker:
+            self.pendingCuts += [len(self.pending) + cut for cut in self.chunker.scan(data)]
+        self.pending += data
+        if len(self.pending) < STREAM_BUFFER:
+            return self.out.take()
+
+        # rsyncable: only up to the last cut, the rest waits to be cut with what follows
+        end = len(self.pending) if not self.chunker else self.pendingCuts[-1] if self.pendingCuts else 0
+        if end == 0:
+            return self.out.take()
+        data = bytes(self.pending[:end])
+        cuts = self.pendingCuts
+        del self.pending[:end]
+        self.pendingCuts = []
+        return self.compressChunks(data, cuts, False)
+
+    def takePending(self):
+        ''' removes the buffered data and its cut points '''
+        data = bytes(self.pending)
+        cuts = self.pendingCuts
+        self.pending = bytearray()
+        self.pendingCuts = []
+        return data, cuts
+
+    def syncFlush(self):
+        ''' ends the stream so far with an empty stored block (on a byte boundary) '''
+        self.writeStoredBlocks(b'', False)
+        return self.out.take()
+
+    def flush(self, mode=SYNC_FLUSH):
+        ''' compresses the data written so far and ends it with an empty stored block, so that the
+        returned bytes (up to a byte boundary) can be decoded without waiting for more.
+        FULL_FLUSH also empties the window: nothing after it refers to data before it '''
+
+        if mode not in FLUSH_MODES:
+            raise ValueError('unknown flush mode %r' % (mode,))
+        data, cuts = self.takePending()
+        out = self.compressChunks(data, cuts, False) if data else b''
+        out += self.syncFlush()
+        if mode == FULL_FLUSH:
+            self.history = b''
+        return out
+
+    def finish(self):
+        ''' compresses the data still buffered and ends the stream (last block) '''
+        data, cuts = self.takePending()
+        return self.compressChunks(data, cuts, True)
+
+    def tokenize(self, window, start):
+        ''' LZ77 tokens of window[start:] for the strategy of the encoder '''
+        if self.strategy == HUFFMAN_ONLY:
+            return list(window[start:])
+        if self.strategy == RLE:
+            return findRuns(window, start)
+        if self.strategy == ULTRA:
+            return optimalParse(window, start, self.iterations)
+        return findMatches(window, LEVEL_CHAIN[self.level], start)
+
+    def probe(self, data):
+        ''' cuts data in runs of PROBE_SIZE chunks that are all compressible or all incompressible:
+        returns a list of (start, end, stored), at least one '''
+
+        if self.storedEntropy is None or len(data) < SAMPLE_SLICES * SAMPLE_SLICE:
+            return [(0, len(data), False)]
+
+        pieces = []
+        for start in range(0, len(data), PROBE_SIZE):
+            end = min(start + PROBE_SIZE, len(data))
+            stored = isIncompressible(data[start:end], self.storedEntropy)
+            if pieces and pieces[-1][2] == stored:
+                pieces[-1] = (pieces[-1][0], end, stored)
+            else:
+                pieces.append((start, end, stored))
+        return pieces
+
+    def writeStoredBlocks(self, data, final):
+        ''' writes data as stored blocks of at most 65535 bytes '''
+
+        pos = 0
+        while True:
+            chunk = data[pos : pos + MAX_STORED]
+            pos += len(chunk)
+            last = final and pos >= len(data)
+
+            self.out.writeBits(1 if last else 0, 1)
+            self.out.writeBits(0, 2)
+            self.out.alignToByte()
+            self.out.writeBytes(len(chunk).to_bytes(2, 'little') + (len(chunk) ^ 0xffff).to_bytes(2, 'little'))
+            self.out.writeBytes(chunk)
+
+            if pos >= len(data):
+                return
+
+    def writeBlock(self, block, window, final):
+        ''' writes a TokenBlock as the cheapest of stored, fixed and dynamic '''
+
+        code = DynamicCode(block.litFreqs, block.distFreqs)
+        stored = storedBits(block.nbytes, self.out.available_bits)
+        fixed = block.fixedBits()
+        dynamic = block.dynamicBits(code)
+
+        if stored < min(fixed, dynamic):
+            self.writeStoredBlocks(window[block.start : block.start + block.nbytes], final)
+        elif fixed <= dynamic:
+            self.writeFixedBlock(block.tokens, final)
+        else:
+            self.writeDynamicBlock(block.tokens, code, final)
+
+    def writeFixedBlock(self, tokens, final):
+        ''' writes tokens as a block coded with the fixed Huffman code '''
+
+        self.out.writeBits(1 if final else 0, 1)
+        self.out.writeBits(1, 2)
+        self.writeTokens(tokens, FIXED_LITLEN_TABLE, FIXED_DIST_TABLE)
+
+    def writeDynamicBlock(self, tokens, code, final):
+        ''' writes tokens as a block coded with the Huffman codes of a DynamicCode '''
+
+        self.out.writeBits(1 if final else 0, 1)
+        self.out.writeBits(2, 2)
+        code.writeHeader(self.out)
+        self.writeTokens(tokens, code.litTable, code.distTable)
+
+    def writeTokens(self, tokens, litTable, distTable):
+        ''' writes LZ77 tokens with the codes of two HuffmanEncodeTables, followed by the end of block symbol '''
+
+        writeBits = self.out.writeBits
+        litCodes, litLens = litTable.codes, litTable.lengths
+        distCodes, distLens = distTable.codes, distTable.lengths
+        for token in tokens:
+            if token.__class__ is int:
+                writeBits(litCodes[token], litLens[token])
+            else:
+                length, distance = token
+                sym = LENGTH_SYMBOL[length]
+                writeBits(litCodes[257 + sym], litLens[257 + sym])
+                if LENGTH_EXTRA[sym]:
+                    writeBits(length - LENGTH_BASE[sym], LENGTH_EXTRA[sym])
+                sym = DIST_SYMBOL[distance]
+                writeBits(distCodes[sym], distLens[sym])
+                if DIST_EXTRA[sym]:
+                    writeBits(distance - DIST_BASE[sym], DIST_EXTRA[sym])
+
+        writeBits(litCodes[256], litLens[256])
+
+
+def deflate(data, level=6, dictionary=b'', strategy=DEFAULT_STRATEGY, iterations=ULTRA_ITERATIONS, rsyncable=False):
+    ''' compresses data into a raw deflate stream '''
+    return DeflateEncoder(level, dictionary, strategy=strategy, iterations=iterations, rsyncable=rsyncable).compress(data, final=True)
+
+
+def gzipHeader(fName='', mTime=0, extra=None, fComment=''):
+    ''' builds a GZIP header (RFC 1952) with the optional FEXTRA, FNAME and FCOMMENT fields '''
+
+    FLG = 0
+    fields = b''
+    if extra is not None:
+        FLG |= 0x04
+        fields += len(extra).to_bytes(2, 'little') + extra
+    if fName:
+        FLG |= 0x08
+        fields += fName.encode('latin-1') + b'\0'
+    if fComment:
+        FLG |= 0x10
+        fields += fComment.encode('latin-1') + b'\0'
+
+    # ID1 ID2 CM FLG MTIME XFL OS(255: unknown)
+    return bytes((0x1f, 0x8b, 0x08, FLG)) + mTime.to_bytes(4, 'little') + bytes((0, 255)) + fields
+
+
+def gzipTrailer(data):
+    ''' builds a GZIP trailer: CRC32 and ISIZE of the uncompressed data '''
+    return zlib.crc32(data).to_bytes(4, 'little') + (len(data) & 0xffffffff).to_bytes(4, 'little')
+
+
+def gzipCompress(data, level=6, fName='', mTime=0, strategy=DEFAULT_STRATEGY, rsyncable=False):
+    ''' compresses data into a single-member gzip file image '''
+    return gzipHeader(fName, mTime) + deflate(data, level, strategy=strategy, rsyncable=rsyncable) + gzipTrailer(data)
+
+
+class GzipWriter:
+    ''' writes a gzip member to the binary file f as a stream: header first, then the data given
+    to write compressed as it comes, and the trailer on close. flush (see DeflateEncoder.flush)
+    also flushes f, so that a reader (e.g. gzip.InflateStream) gets every line written so far '''
+
+    def __init__(self, f, level=6, fName='', mTime=0, strategy=DEFAULT_STRATEGY, rsyncable=False):
+        self.f = f
+        self.encoder = DeflateEncoder(level, strategy=strategy, rsyncable=rsyncable)
+        self.crc = 0
+        self.size = 0
+        self.f.write(gzipHeader(fName, mTime))
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self.f.write(self.encoder.write(data))
+
+    def flush(self, mode=SYNC_FLUSH):
+        self.f.write(self.encoder.flush(mode))
+        self.f.flush()
+
+    def close(self):
+        ''' ends the member (the file f itself is left open) '''
+        self.f.write(self.encoder.finish())
+        self.f.write(self.crc.to_bytes(4, 'little') + (self.size & 0xffffffff).to_bytes(4, 'little'))
+        self.f.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,176 @@
+# Teoria da Informacao, LEI, 2022
+# The deflate core on data in memory, with its three framings: raw deflate (RFC 1951),
+# zlib (RFC 1950, Adler-32 check and optional preset dictionary) and gzip (RFC 1952)
+
+import io
+import sys
+import zlib
+import operator
+import argparse
+from gzip import GZIP
+import encoder
+
+
+ADLER_BASE = 65521
+# bytes summed before reducing: Python ints do not overflow, so the blocks can be much
+# larger than zlib's NMAX (5552) and the per-block work stays in sum/map
+ADLER_BLOCK = 1 << 16
+
+
+def adler32(data, value=1):
+    ''' Adler-32 of data (RFC 1950, 9), continuing from value. Computed per block:
+    for a block of n bytes, A grows by their sum and B by n*A plus their sum weighted n, n-1, ..., 1 '''
+
+    a = value & 0xffff
+    b = value >> 16
+    for pos in range(0, len(data), ADLER_BLOCK):
+        block = data[pos : pos + ADLER_BLOCK]
+        n = len(block)
+        b = (b + n * a + sum(map(operator.mul, block, range(n, 0, -1)))) % ADLER_BASE
+        a = (a + sum(block)) % ADLER_BASE
+    return (b << 16) | a
+
+
+def inflateStream(gz, dictionary=b''):
+    ''' decodes the raw deflate stream at the current position of the decoder gz and returns its data.
+    dictionary: preset dictionary, loaded in the window before decoding (and not returned) '''
+
+    chunks = []
+    skip = [len(dictionary[-32768:])]
+    def write(data):
+        # the dictionary is the start of the window: it leaves it first
+        if skip[0]:
+            n = min(skip[0], len(data))
+            skip[0] -= n
+            data = data[n:]
+        chunks.append(data)
+
+    gz.inflate(write, output=list(dictionary[-32768:]))
+    return b''.join(chunks)
+
+
+# Raw deflate
+
+def rawCompress(data, level=6, dictionary=b'', rsyncable=False):
+    return encoder.deflate(data, level, dictionary, rsyncable=rsyncable)
+
+
+def rawDecompress(data, dictionary=b''):
+    return inflateStream(GZIP(io.BytesIO(data)), dictionary)
+
+
+# Zlib
+
+def zlibHeader(level=6, dictionary=None):
+    ''' CMF (deflate, 32 KiB window), FLG (FLEVEL, FDICT, FCHECK) and, with a dictionary, its DICTID '''
+
+    CMF = 0x78
+    FLEVEL = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    FLG = (FLEVEL << 6) | (0x20 if dictionary is not None else 0)
+    FLG |= (31 - (CMF * 256 + FLG) % 31) % 31
+    header = bytes((CMF, FLG))
+    if dictionary is not None:
+        header += adler32(dictionary).to_bytes(4, 'big')
+    return header
+
+
+def zlibCompress(data, level=6, dictionary=None, rsyncable=False):
+    ''' compresses data into a zlib stream, with a preset dictionary if given '''
+    return (zlibHeader(level, dictionary) + encoder.deflate(data, level, dictionary or b'', rsyncable=rsyncable)
+            + adler32(data).to_bytes(4, 'big'))
+
+
+def zlibDecompress(data, dictionary=None):
+    ''' decodes a zlib stream. The dictionary must be given if the stream was compressed with one
+    (FDICT), and is ignored otherwise. Raises ValueError on an invalid stream '''
+
+    if len(data) < 6:
+        raise ValueError('zlib stream too short')
+    CMF, FLG = data[0], data[1]
+    if CMF & 0x0f != 8 or CMF >> 4 > 7:
+        raise ValueError('not a deflate zlib stream')
+    if (CMF * 256 + FLG) % 31 != 0:
+        raise ValueError('invalid zlib header check')
+
+    gz = GZIP(io.BytesIO(data))
+    gz.readBytes(2)
+    if FLG & 0x20:
+        DICTID = int.from_bytes(gz.readBytes(4), 'big')
+        if dictionary is None:
+            raise ValueError('zlib stream needs a preset dictionary (DICTID %08x)' % DICTID)
+        if adler32(dictionary) != DICTID:
+            raise ValueError('wrong preset dictionary (DICTID %08x)' % DICTID)
+    else:
+        dictionary = b''
+
+    output = inflateStream(gz, dictionary)
+    gz.alignToByte()
+    if int.from_bytes(gz.readBytes(4), 'big') != adler32(output):
+        raise ValueError('Adler-32 mismatch')
+    return output
+
+
+# Gzip
+
+def gzipCompress(data, level=6, fName='', mTime=0, rsyncable=False):
+    return encoder.gzipCompress(data, level, fName, mTime, rsyncable=rsyncable)
+
+
+def gzipDecompress(data):
+    ''' decodes every member of a gzip file image, checking the CRC32 and ISIZE of each one '''
+
+    gz = GZIP(io.BytesIO(data))
+    if gz.getHeader() != 0:
+        raise ValueError('Formato invalido!')
+    chunks = []
+    while True:
+        member = inflateStream(gz)
+        gz.alignToByte()
+        trailer = gz.readBytes(8)
+        if int.from_bytes(trailer[0:4], 'little') != zlib.crc32(member):
+            raise ValueError('CRC32 mismatch')
+        if int.from_bytes(trailer[4:8], 'little') != len(member) & 0xffffffff:
+            raise ValueError('ISIZE mismatch')
+        chunks.append(member)
+        if not gz.nextHeader():
+            return b''.join(chunks)
+
+
+FORMATS = {
+    'raw': (rawCompress, rawDecompress),
+    'zlib': (zlibCompress, zlibDecompress),
+    'gzip': (gzipCompress, gzipDecompress),
+}
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='compress or decompress stdin to stdout as raw deflate, zlib or gzip')
+    parser.add_argument('command', choices=('compress', 'decompress'))
+    parser.add_argument('-f', '--format', choices=sorted(FORMATS), default='zlib')
+    parser.add_argument('-l', '--level', type=int, default=6)
+    parser.add_argument('-D', '--dictionary', default=None, help='preset dictionary file (raw and zlib)')
+    parser.add_argument('--rsyncable', action='store_true', help='cut the stream at content defined points, for rsync and deduplication')
+    args = parser.parse_args()
+
+    dictionary = None
+    if args.dictionary is not None:
+        if args.format == 'gzip':
+            parser.error('gzip has no preset dictionaries')
+        with open(args.dictionary, 'rb') as f:
+            dictionary = f.read()
+
+    compress, decompress = FORMATS[args.format]
+    data = sys.stdin.buffer.read()
+    try:
+        if args.command == 'compress':
+            if dictionary is None:
+                result = compress(data, args.level, rsyncable=args.rsyncable)
+            else:
+                result = compress(data, args.level, dictionary, rsyncable=args.rsyncable)
+        else:
+            result = decompress(data) if dictionary is None else decompress(data, dictionary)
+    except (ValueError, EOFError) as e:
+        print("Error: %s" % e, file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.buffer.write(result)
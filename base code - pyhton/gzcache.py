@@ -0,0 +1,200 @@
+# Teoria da Informacao, LEI, 2022
+# On-disk cache of decompressed files, keyed by a fingerprint of the compressed file
+
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+import tempfile
+from gzip import GZIP, GZIPHeader
+
+
+class DecompressionCache:
+    ''' cache of decompressed outputs in a directory, with LRU eviction under a byte budget
+
+    Entries are named after the fingerprint of the compressed file (see fingerprint) and
+    their modification time records the last use, so the cache is shared by every process
+    using the same directory and survives between jobs '''
+
+    def __init__(self, directory, maxBytes=1 << 30):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def fingerprint(self, fileName):
+        ''' cheap key of a gzip file: its size, its trailer (CRC32 and ISIZE) and a hash of its header.
+        Nothing is decoded. Raises ValueError if the file is not a gzip file '''
+
+        with open(fileName, 'rb') as f:
+            gzh = GZIPHeader()
+            try:
+                error = gzh.read(f)
+            except IndexError:
+                error = -1
+            if error != 0:
+                raise ValueError('%s: Formato invalido!' % fileName)
+            headerSize = f.tell()
+            f.seek(0)
+            header = f.read(headerSize)
+
+            f.seek(0, 2)
+            fileSize = f.tell()
+            f.seek(fileSize - 8)
+            trailer = f.read(8)
+
+        h = hashlib.blake2b(digest_size=20)
+        h.update(fileSize.to_bytes(8, 'little'))
+        h.update(trailer)
+        h.update(header)
+        return h.hexdigest()
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, key)
+
+    def lookup(self, fileName):
+        ''' returns the path of the cached output for fileName (marking it as recently used), or None '''
+
+        path = self.entryPath(self.fingerprint(fileName))
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def store(self, fileName):
+        ''' decompresses fileName into the cache and returns the path of the entry. The CRC32 and ISIZE
+        of every member are checked first: a corrupt file raises ValueError and is never cached '''
+
+        path = self.entryPath(self.fingerprint(fileName))
+        fd, tmpPath = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                gz = GZIP(fileName)
+                try:
+                    result = gz.test(f.write)
+                finally:
+                    gz.f.close()
+            if not result.ok:
+                raise ValueError(str(result))
+            # atomic: concurrent readers see either no entry or a complete one.
+            # Read-only: entries are shared with hard linked outputs (see decompress)
+            os.chmod(tmpPath, 0o444)
+            os.replace(tmpPath, path)
+        except BaseException:
+            os.unlink(tmpPath)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def get(self, fileName):
+        ''' returns the path of the decompressed data of fileName, decompressing it on a miss '''
+        return self.lookup(fileName) or self.store(fileName)
+
+    def read(self, fileName):
+        ''' returns the decompressed data of fileName '''
+        with open(self.get(fileName), 'rb') as f:
+            return f.read()
+
+    def decompress(self, fileName, outName, link=False):
+        ''' writes the decompressed data of fileName to outName as a copy of the cache entry or, if link,
+        as a hard link to it (where possible). A linked output is the entry itself: it is read-only, a
+        write to it would change the cache, and its modification time moves with every cache hit '''
+
+        path = self.get(fileName)
+        if os.path.exists(outName):
+            os.unlink(outName)
+        if link:
+            try:
+                os.link(path, outName)
+                return outName
+            except OSError:
+                pass
+        shutil.copyfile(path, outName)
+        return outName
+
+    def entries(self):
+        ''' returns (last use, size, path) of every entry, least recently used first '''
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp-'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:  # evicted by another process
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self, keep=None):
+        ''' removes least recently used entries until the cache fits in maxBytes (keep is never removed) '''
+
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        ''' returns a dict with the hit/miss/eviction counters of this object and the cache usage '''
+
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'bytes': sum(size for mtime, size, path in entries),
+            'maxBytes': self.maxBytes,
+        }
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='decompress .gz files through an on-disk cache of decompressed outputs')
+    parser.add_argument('files', nargs='*', help='files to decompress (output named after the input without .gz)')
+    parser.add_argument('-d', '--cache-dir', default=os.path.join(tempfile.gettempdir(), 'gzcache'))
+    parser.add_argument('-m', '--max-bytes', type=int, default=1 << 30, help='cache budget in bytes (default: 1 GiB)')
+    parser.add_argument('--link', action='store_true', help='hard link the outputs to the cache entries (read-only) instead of copying them')
+    parser.add_argument('--clear', action='store_true', help='empty the cache')
+    args = parser.parse_args()
+
+    cache = DecompressionCache(args.cache_dir, args.max_bytes)
+    if args.clear:
+        cache.clear()
+
+    failures = 0
+    for fileName in args.files:
+        outName = fileName[:-3] if fileName.endswith('.gz') else fileName + '.out'
+        try:
+            cache.decompress(fileName, outName, link=args.link)
+        except (OSError, ValueError, EOFError, IndexError) as e:
+            print("Error: %s: %s" % (fileName, e))
+            failures += 1
+
+    print(cache.stats())
+    sys.exit(1 if failures else 0)
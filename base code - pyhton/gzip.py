@@ -1,507 +1,1693 @@
-# Author: Marco Simoes
-# Adapted from Java's implementation of Rui Pedro Paiva
-# Teoria da Informacao, LEI, 2022
-
-import sys
-from huffmantree import HuffmanTree
-
-
-class GZIPHeader:
-    ''' class for reading and storing GZIP header fields '''
-
-    ID1 = ID2 = CM = FLG = XFL = OS = 0
-    MTIME = []
-    lenMTIME = 4
-    mTime = 0
-
-    # bits 0, 1, 2, 3 and 4, respectively (remaining 3 bits: reserved)
-    FLG_FTEXT = FLG_FHCRC = FLG_FEXTRA = FLG_FNAME = FLG_FCOMMENT = 0
-
-    # FLG_FTEXT --> ignored (usually 0)
-    # if FLG_FEXTRA == 1
-    XLEN, extraField = [], []
-    lenXLEN = 2
-
-    # if FLG_FNAME == 1
-    fName = ''  # ends when a byte with value 0 is read
-
-    # if FLG_FCOMMENT == 1
-    fComment = ''  # ends when a byte with value 0 is read
-
-    # if FLG_HCRC == 1
-    HCRC = []
-
-    def read(self, f):
-        ''' reads and processes the Huffman header from file. Returns 0 if no error, -1 otherwise '''
-
-        # ID 1 and 2: fixed values
-        self.ID1 = f.read(1)[0]
-        if self.ID1 != 0x1f: return -1  # error in the header
-
-        self.ID2 = f.read(1)[0]
-        if self.ID2 != 0x8b: return -1  # error in the header
-
-        # CM - Compression Method: must be the value 8 for deflate
-        self.CM = f.read(1)[0]
-        if self.CM != 0x08: return -1  # error in the header
-
-        # Flags
-        self.FLG = f.read(1)[0]
-
-        # MTIME
-        self.MTIME = [0] * self.lenMTIME
-        self.mTime = 0
-        for i in range(self.lenMTIME):
-            self.MTIME[i] = f.read(1)[0]
-            self.mTime += self.MTIME[i] << (8 * i)
-
-        # XFL (not processed...)
-        self.XFL = f.read(1)[0]
-
-        # OS (not processed...)
-        self.OS = f.read(1)[0]
-
-        # --- Check Flags
-        self.FLG_FTEXT = self.FLG & 0x01
-        self.FLG_FHCRC = (self.FLG & 0x02) >> 1
-        self.FLG_FEXTRA = (self.FLG & 0x04) >> 2
-        self.FLG_FNAME = (self.FLG & 0x08) >> 3
-        self.FLG_FCOMMENT = (self.FLG & 0x10) >> 4
-
-        # FLG_EXTRA
-        if self.FLG_FEXTRA == 1:
-            # read 2 bytes XLEN + XLEN bytes de extra field
-            # 1st byte: LSB, 2nd: MSB
-            self.XLEN = [0] * self.lenXLEN
-            self.XLEN[0] = f.read(1)[0]
-            self.XLEN[1] = f.read(1)[0]
-            self.xlen = self.XLEN[1] << 8 + self.XLEN[0]
-
-            # read extraField and ignore its values
-            self.extraField = f.read(self.xlen)
-
-        def read_str_until_0(f):
-            s = ''
-            while True:
-                c = f.read(1)[0]
-                if c == 0:
-                    return s
-                s += chr(c)
-
-        # FLG_FNAME
-        if self.FLG_FNAME == 1:
-            self.fName = read_str_until_0(f)
-
-        # FLG_FCOMMENT
-        if self.FLG_FCOMMENT == 1:
-            self.fComment = read_str_until_0(f)
-
-        # FLG_FHCRC (not processed...)
-        if self.FLG_FHCRC == 1:
-            self.HCRC = f.read(2)
-
-        return 0
-
-
-class GZIP:
-    ''' class for GZIP decompressing file (if compressed with deflate) '''
-
-    gzh = None
-    gzFile = ''
-    fileSize = origFileSize = -1
-    numBlocks = 0
-    f = None
-
-    bits_buffer = 0
-    available_bits = 0
-
-    def __init__(self, filename):
-        self.gzFile = filename
-        self.f = open(filename, 'rb')
-        self.f.seek(0, 2)
-        self.fileSize = self.f.tell()
-        self.f.seek(0)
-
-# Ponto 1
-    def readDynamicBlock (self):
-        '''Interprets Dinamic Huffman compressed blocks'''
-  
-        HLIT = self.readBits(5)
-        HDIST = self.readBits(5)
-        HCLEN = self.readBits(4)
-  
-        return HLIT, HDIST, HCLEN
-
-# Ponto 2
-    def storeCLENLengths(self, HCLEN):
-        '''Stores the code lengths for the code lengths alphabet in an array'''
-     
-        # Order of lengths in which the bits are read
-        idxCLENcodeLens = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
-        CLENcodeLens = [0 for i in range(19)]
-
-		# CLENcodeLens[idx] = N translates to: "the code for idx in the code lengths alphabet has a length of N"
-		# if N == 0, that indexes' code length is not used
-        for i in range(0, HCLEN+4):
-            temp = self.readBits(3)
-            CLENcodeLens[idxCLENcodeLens[i]] = temp
-        return CLENcodeLens
-    
-# Ponto 3
-    def createHuffmanFromLens(self, lenArray, verbose=False):
-        '''Takes an array with symbols' Huffman codes' lengths and returns
-		a formated Huffman tree with said codes
-  
-		If verbose==True, it prints the codes as they're added to the tree'''
-  
-        tree = HuffmanTree()
-		# max_len is the code with the largest length 
-        max_len = max(lenArray)
-		# max_symbol é o maior símbolo a codificar
-        max_symbol = len(lenArray)
-		
-        bl_count = [0 for i in range(max_len+1)]
-		# Get array with number of codes with length N (bl_count)
-        for N in range(1, max_len+1):
-            bl_count[N] += lenArray.count(N)
-        
-        # Get first code of each code length
-        code = 0
-        next_code = [0 for i in range(max_len+1)]
-        for bits in range(1, max_len+1):
-            code = (code + bl_count[bits-1]) << 1
-            next_code[bits] = code
-  
-		# Define codes for each symbol in lexicographical order
-        for n in range(max_symbol):
-			# Length associated with symbol n 
-            length = lenArray[n]
-            if(length != 0):
-                code = bin(next_code[length])[2:]
-                # In case there are 0s at the start of the code, we have to add them manualy
-                # length-len(code) 0s have to be added
-                extension = "0"*(length-len(code)) 
-                tree.addNode(extension + code, n, verbose)
-                next_code[length] += 1
-
-        return tree;
-
-# Pontos 4 e 5
-    def storeTreeCodeLens(self, size, CLENTree):
-        # Takes the code lengths huffmantree and stores the code lengths accordingly
-
-        # Array where the code lengths will be stored 
-        treeCodeLens = [] 
-
-        prevCode = 0
-        while (len(treeCodeLens) < size):
-			# Sets the current node to the root of the tree
-            CLENTree.resetCurNode()
-            found = False
-   
-			# While reading, if a leaf hasn't been found, keep searching bit by bit
-            while(not found):
-                curBit = self.readBits(1) # Read 1 bit from the stream
-                code = CLENTree.nextNode(str(curBit)) # Advance the Huffman tree
-                if(code != -1 and code != -2):
-                    found = True
-
-			# SPECIAL CHARACTERS
-			# 18 - Reads 7 extra bits 
-			# 17 - Reads 3 extra bits
-			# 16 - Reads 2 extra bits
-            if(code == 18):
-                amount = self.readBits(7)
-				# According to the 7 bits just read, set the following 11-138 values on the length array to 0 
-                treeCodeLens += [0]*(11 + amount)
-            if(code == 17):
-                amount = self.readBits(3)
-				# According to the 3 bits just read, set the following 3-10 values on the length array to 0 
-                treeCodeLens += [0]*(3 + amount)
-            if(code == 16):
-                amount = self.readBits(2)
-				# According to the 2 bits just read, set the following 3-6 values on the length array to the latest length read
-                treeCodeLens += [prevCode]*(3 + amount)
-            elif(code >= 0 and code <= 15):
-				# If a special character isn't found, just set the next code length to the value found
-                treeCodeLens += [code]
-                prevCode = code
-
-        return treeCodeLens
-
-# Ponto 7
-    def decompressLZ77(self, HuffmanTreeLITLEN, HuffmanTreeDIST, output):
-     
-		# How many extra bits are required to read if length code read is larger than 265
-        ExtraLITLENBits = [1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0]
-		# Length required to add if the length code read if larger than 265
-        ExtraLITLENLens = [11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258]
-	
-		# How many extra bits are required to read if the distance code read is larger than 4
-        ExtraDISTBits = [1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13]		
-		# Distance required to add if the special character read if larger than 4
-        ExtraDISTLens = [5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145, 8193, 12289, 16385, 24577]
-
-        codeLITLEN = -1
-		# Read from the input stream until 256 is found
-        while(codeLITLEN != 256):
-			# Resets the current node to the tree's root
-            HuffmanTreeLITLEN.resetCurNode()
-
-            foundLITLEN = False
-			# A distance is considered "found" by default in case the character read is just a literal
-            distFound = True
-
-			# While a literal or length isn't found in the LITLEN tree, keep searching bit by bit
-            while(not foundLITLEN):
-                curBit = str(self.readBits(1))
-				# Updates the current node according the the bit just read
-                codeLITLEN = HuffmanTreeLITLEN.nextNode(curBit)
-    
-				# If a leaf is reached in the LITLEN tree, follow the instructions according to the value found
-                if (codeLITLEN != -1 and codeLITLEN != -2):
-                    foundLITLEN = True
-     
-					# If the code reached is in the interval [0, 256[, just append the value read corresponding a the literal to the output array
-                    if(codeLITLEN < 256):
-                        output.append(codeLITLEN)
-
-					# If the code is in the interval [257, 285], it is refering to the length of the string to copy
-                    if(codeLITLEN > 256):
-                        distFound = False
-      
-						# if the code is in the interval [257, 265[, sets the length of the string to copy to the code read - 257 + 3
-                        if(codeLITLEN < 265):
-                            length = codeLITLEN - 257 + 3
-       
-						# the codes in the interval [265, 285] are special and require more bits to be read
-                        else:
-							# dif defines the indices in the "Extra array's" to be used 
-                            dif = codeLITLEN - 265
-							# How many extra bits will need to be read
-                            readExtra = ExtraLITLENBits[dif]
-							# How much extra length to add
-                            lenExtra = ExtraLITLENLens[dif]
-                            length = lenExtra + self.readBits(readExtra)
-
-						# Resets the curent node in the distance tree to it's root
-                        HuffmanTreeDIST.resetCurNode()
-						# While a distance isn's found in the DIST tree, keep searching bit by bit
-                        while(not distFound):
-                            distBit = str(self.readBits(1))
-							# Updates the current node according to the bit just read
-                            codeDIST = HuffmanTreeDIST.nextNode(distBit)
-
-							# If a leaf is reached in the LITLEN tree, follow the instructions according to the value found
-                            if(codeDIST != -1 and codeDIST != -2):
-                                distFound = True
-
-								# If the code read is in the interval [0, 4[ define the distance to go back to the code read + 1
-                                if(codeDIST < 4):
-                                    distance = codeDIST + 1
-
-								# The codes in the interval [4, 29] are special and require more bits to be read
-                                else:
-									# dif defines the indices in the "Extra arrays" to be used
-                                    dif = codeDIST - 4
-                                    readExtra = ExtraDISTBits[dif]
-									# How many extra bits need to be read
-                                    distExtra = ExtraDISTLens[dif]
-									# How much extra distance to add
-                                    distance = distExtra + self.readBits(readExtra)
-								
-								# For each one of the range(length) iterations, copy the character at index len(output)-distance to the end of the output array
-                                for i in range(length):
-                                    output.append(output[-distance])
-		#print(output)
-        return output
-    '''
-    def testGZIPFunctions(self):
-        """ Test individual functions of the GZIP decompression process """
-    
-        # Exibe informações iniciais
-        print(f"Testing GZIP decompression functions for file: {self.gzFile}")
-    
-        
-        # Passo 1: Testar a leitura de HLIT, HDIST e HCLEN
-        HLIT, HDIST, HCLEN = self.readDynamicBlock()
-        print(f"HLIT: {HLIT}, HDIST: {HDIST}, HCLEN: {HCLEN}")
-    
-        # Passo 2: Testar a leitura dos comprimentos de código CLEN
-        CLENcodeLens = self.storeCLENLengths(HCLEN)
-        print(f"CLEN Code Lengths: {CLENcodeLens}")
-    
-        # Passo 3: Testar a criação da árvore de Huffman para CLEN
-        HuffmanTreeCLENs = self.createHuffmanFromLens(CLENcodeLens, verbose=True)
-        print("Huffman Tree for CLEN created successfully!")
-    
-        # Passo 4: Testar a decodificação dos comprimentos de códigos LITLEN
-        LITLENcodeLens = self.storeTreeCodeLens(HLIT + 257, HuffmanTreeCLENs)
-        print(f"LITLEN Code Lengths: {LITLENcodeLens}")
-    
-        # Passo 5: Testar a decodificação dos comprimentos de códigos DIST
-        DISTcodeLens = self.storeTreeCodeLens(HDIST + 1, HuffmanTreeCLENs)
-        print(f"DIST Code Lengths: {DISTcodeLens}") 
-    
-        HLIT, HDIST, HCLEN = self.readDynamicBlock()
-        CLENcodeLens = self.storeCLENLengths(HCLEN)
-        HuffmanTreeCLENs = self.createHuffmanFromLens(CLENcodeLens, verbose=True)
-        LITLENcodeLens = self.storeTreeCodeLens(HLIT + 257, HuffmanTreeCLENs)
-        DISTcodeLens = self.storeTreeCodeLens(HDIST + 1, HuffmanTreeCLENs)
-
-        # Passo 6: Testar a criação das árvores Huffman para LITLEN e DIST
-        HuffmanTreeLITLEN = self.createHuffmanFromLens(LITLENcodeLens, verbose=False)
-        print("Huffman Tree for LITLEN created successfully!")
-        HuffmanTreeDIST = self.createHuffmanFromLens(DISTcodeLens, verbose=False)
-        print("Huffman Tree for DIST created successfully!")
-    
-        # Passo 7: Testar a descompressão usando LZ77
-        output = []
-        output = self.decompressLZ77(HuffmanTreeLITLEN, HuffmanTreeDIST, output)
-        print(f"Decompressed data (first 100 bytes): {output[:100]}")
-    
-        # Verifica os primeiros 100 bytes do output (para análise e debugging)
-        return output
-    '''
-    def decompress(self):
-        ''' main function for decompressing the gzip file with deflate algorithm '''
-        numBlocks = 0
-
-		# get original file size: size of file before compression
-        origFileSize = self.getOrigFileSize()
-        print(origFileSize)
-		
-		# read GZIP header
-        error = self.getHeader()
-        if error != 0:
-            print('Formato invalido!')
-            return
-		
-		# show filename read from GZIP header
-        print(self.gzh.fName)
-		
-		
-		# MAIN LOOP - decode block by block
-        BFINAL = 0	
-
-		# Opens the output file in "write" binary mode
-        f = open(self.gzh.fName, 'wb')		
-  
-        output = []
-        while not BFINAL == 1:	
-            BFINAL = self.readBits(1)
-			
-			# if BTYPE == 10 in base 2 -> read the dinamic Huffman compression format 
-            BTYPE = self.readBits(2)					
-            if BTYPE == 2:
-                # Chama a função de teste para os passos 1 a 7
-                # output = self.testGZIPFunctions()
-                print(f"Test completed for block {numBlocks + 1}.")
-                break  # Para evitar a continuação da descompressão completa durante os testes
-
-            else:
-                print(f"Error: Block {numBlocks + 1} not coded with Huffman Dynamic coding.")
-                return
-			
-			# HLIT: # of literal/length  codes
-			# HDIST: # of distance codes 
-			# HCLEN: # of code length codes
-            HLIT, HDIST, HCLEN = self.readDynamicBlock()
-			
-			# Store the CLEN tree's code lens in a pre-determined order 
-            CLENcodeLens = self.storeCLENLengths(HCLEN)   
-            # print("Code Lengths of indices i from the code length tree:", CLENcodeLens)
-
-            # Ponto 6	
-			# Based on the CLEN tree's code lens, define an huffman tree for CLEN
-            HuffmanTreeCLENs = self.createHuffmanFromLens(CLENcodeLens, verbose=False)
-
-			# Store the literal and length tree code lens based on the CLEN tree codes
-			#LITLENcodeLens = self.storeLITLENcodeLens(HLIT, HuffmanTreeCLENs)
-            LITLENcodeLens = self.storeTreeCodeLens(HLIT + 257, HuffmanTreeCLENs)
-
-			# Define the literal and length huffman tree based on the lengths of it's codes
-            HuffmanTreeLITLEN = self.createHuffmanFromLens(LITLENcodeLens, verbose=False)
-	
-			# Store the distance tree code lens based on the CLEN tree codes
-            DISTcodeLens = self.storeTreeCodeLens(HDIST + 1, HuffmanTreeCLENs)
-
-			# Define the distance huffman tree based on the lengths of it's codes
-            HuffmanTreeDIST = self.createHuffmanFromLens(DISTcodeLens, verbose=False)
-
-			# Based on the trees defined so far, decompress the data according to the Lempel-Ziv77 algorthm 
-            output = self.decompressLZ77(HuffmanTreeLITLEN, HuffmanTreeDIST, output)
-   
-
-			# Only the last 32768 characters should be kept in memory
-            if(len(output) > 32768):
-				# Write every charater that exceeds the 327680 range to the file
-                f.write(bytes(output[0 : len(output) - 32768]))
-				# Keep the rest in the output array
-                output = output[len(output) - 32768 :]
-
-		# update number of blocks read
-        numBlocks += 1
-
-		# Write the bytes corresponding to the output array elements
-        f.write(bytes(output))
-  
-		# Close the file
-        f.close()	
-
-        self.f.close()	
-        print("End: %d block(s) analyzed." % numBlocks)
-
-    def getOrigFileSize(self):
-        ''' reads file size of original file (before compression) - ISIZE '''
-
-        # saves current position of file pointer
-        fp = self.f.tell()
-
-        # jumps to end-4 position
-        self.f.seek(self.fileSize - 4)
-
-        # reads the last 4 bytes (LITTLE ENDIAN)
-        sz = 0
-        for i in range(4):
-            byte = self.f.read(1)[0]
-            sz += byte << (8 * i)
-
-        # restores file pointer to its original position
-        self.f.seek(fp)
-
-        return sz
-
-    def getHeader(self):
-        ''' reads GZIP header'''
-
-        self.gzh = GZIPHeader()
-        header_error = self.gzh.read(self.f)
-        return header_error
-
-    def readBits(self, n, keep=False):
-        ''' reads n bits from bits_buffer. if keep = True, leaves bits in the buffer for future accesses '''
-
-        while n > self.available_bits:
-            self.bits_buffer = self.f.read(1)[0] << self.available_bits | self.bits_buffer
-            self.available_bits += 8
-
-        mask = (2 ** n) - 1
-        value = self.bits_buffer & mask
-
-        if not keep:
-            self.bits_buffer >>= n
-            self.available_bits -= n
-
-        return value
-
-if __name__ == '__main__':
-
-    # gets filename from command line if provided
-    fileName = "sample_large_text.txt.gz"
-    if len(sys.argv) > 1:
-        fileName = sys.argv[1]
-
-    # decompress file
-    gz = GZIP(fileName)
-    gz.decompress()
+# Author: Marco Simoes
+# Adapted from Java's implementation of Rui Pedro Paiva
+# Teoria da Informacao, LEI, 2022
+
+import io
+import os
+import sys
+import json
+import base64
+import glob
+import time
+import queue
+import re
+import zlib
+import argparse
+import functools
+import threading
+import concurrent.futures
+from huffmantree import HuffmanTree, canonicalCodes
+
+
+# Extra bits tables for LZ77 lengths and distances (tuples: shared read-only by every decoder)
+
+# How many extra bits are required to read if length code read is larger than 265
+ExtraLITLENBits = (1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0)
+# Length required to add if the length code read if larger than 265
+ExtraLITLENLens = (11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258)
+
+# How many extra bits are required to read if the distance code read is larger than 4
+ExtraDISTBits = (1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13)
+# Distance required to add if the special character read if larger than 4
+ExtraDISTLens = (5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145, 8193, 12289, 16385, 24577)
+
+# Bytes leaving the 32 KiB window that are passed on in the middle of a block
+FLUSH_SIZE = 65536
+
+# Output bytes decoded by InflateStream between two points it can resume from in the middle of a block
+STREAM_STEP = 1024
+
+# Code lengths of the fixed Huffman codes (BTYPE == 01)
+FIXED_LITLEN_LENS = (8,) * 144 + (9,) * 112 + (7,) * 24 + (8,) * 8
+FIXED_DIST_LENS = (5,) * 30
+
+
+class GZIPHeader:
+    ''' class for reading and storing GZIP header fields '''
+
+    lenMTIME = 4
+    lenXLEN = 2
+
+    def __init__(self):
+        # every field is instance state: headers never share mutable values
+        self.ID1 = self.ID2 = self.CM = self.FLG = self.XFL = self.OS = 0
+        self.MTIME = []
+        self.mTime = 0
+
+        # bits 0, 1, 2, 3 and 4, respectively (remaining 3 bits: reserved)
+        self.FLG_FTEXT = self.FLG_FHCRC = self.FLG_FEXTRA = self.FLG_FNAME = self.FLG_FCOMMENT = 0
+
+        # FLG_FTEXT --> ignored (usually 0)
+        # if FLG_FEXTRA == 1
+        self.XLEN, self.extraField = [], []
+        self.xlen = 0
+        self.subfields = []  # (SI1 SI2 as 2 bytes, data) pairs of the extra field
+
+        # if FLG_FNAME == 1
+        self.fName = ''  # ends when a byte with value 0 is read
+
+        # if FLG_FCOMMENT == 1
+        self.fComment = ''  # ends when a byte with value 0 is read
+
+        # if FLG_HCRC == 1
+        self.HCRC = []
+
+    def read(self, f):
+        ''' reads and processes the Huffman header from file. Returns 0 if no error, -1 otherwise '''
+
+        # ID 1 and 2: fixed values
+        self.ID1 = f.read(1)[0]
+        if self.ID1 != 0x1f: return -1  # error in the header
+
+        self.ID2 = f.read(1)[0]
+        if self.ID2 != 0x8b: return -1  # error in the header
+
+        # CM - Compression Method: must be the value 8 for deflate
+        self.CM = f.read(1)[0]
+        if self.CM != 0x08: return -1  # error in the header
+
+        # Flags
+        self.FLG = f.read(1)[0]
+
+        # MTIME
+        self.MTIME = [0] * self.lenMTIME
+        self.mTime = 0
+        for i in range(self.lenMTIME):
+            self.MTIME[i] = f.read(1)[0]
+            self.mTime += self.MTIME[i] << (8 * i)
+
+        # XFL (not processed...)
+        self.XFL = f.read(1)[0]
+
+        # OS (not processed...)
+        self.OS = f.read(1)[0]
+
+        # --- Check Flags
+        self.FLG_FTEXT = self.FLG & 0x01
+        self.FLG_FHCRC = (self.FLG & 0x02) >> 1
+        self.FLG_FEXTRA = (self.FLG & 0x04) >> 2
+        self.FLG_FNAME = (self.FLG & 0x08) >> 3
+        self.FLG_FCOMMENT = (self.FLG & 0x10) >> 4
+
+        # FLG_EXTRA
+        if self.FLG_FEXTRA == 1:
+            # read 2 bytes XLEN + XLEN bytes de extra field
+            # 1st byte: LSB, 2nd: MSB
+            self.XLEN = [0] * self.lenXLEN
+            self.XLEN[0] = f.read(1)[0]
+            self.XLEN[1] = f.read(1)[0]
+            self.xlen = (self.XLEN[1] << 8) + self.XLEN[0]
+
+            # read extraField and split it in subfields: SI1 SI2 LEN(2 bytes, LSB first) data
+            self.extraField = f.read(self.xlen)
+            pos = 0
+            while pos + 4 <= len(self.extraField):
+                SI = self.extraField[pos : pos + 2]
+                LEN = self.extraField[pos + 2] + (self.extraField[pos + 3] << 8)
+                self.subfields.append((SI, self.extraField[pos + 4 : pos + 4 + LEN]))
+                pos += 4 + LEN
+
+        def read_str_until_0(f):
+            s = ''
+            while True:
+                c = f.read(1)[0]
+                if c == 0:
+                    return s
+                s += chr(c)
+
+        # FLG_FNAME
+        if self.FLG_FNAME == 1:
+            self.fName = read_str_until_0(f)
+
+        # FLG_FCOMMENT
+        if self.FLG_FCOMMENT == 1:
+            self.fComment = read_str_until_0(f)
+
+        # FLG_FHCRC (not processed...)
+        if self.FLG_FHCRC == 1:
+            self.HCRC = f.read(2)
+
+        return 0
+
+    def getSubfield(self, SI):
+        ''' returns the data of the first extra subfield with identifier SI (2 bytes, e.g. b'BC'), or None '''
+        for subfieldSI, data in self.subfields:
+            if subfieldSI == SI:
+                return data
+        return None
+
+
+class PrefetchReader:
+    ''' file-like reader whose input is prefetched by a background thread into a bounded queue of chunks '''
+
+    def __init__(self, f, chunkSize=65536, maxChunks=16):
+        self.f = f
+        self.chunkSize = chunkSize
+        self.chunks = queue.Queue(maxChunks)
+        self.buffer = b''
+        self.pos = 0
+        self.offset = f.tell()  # file offset of the next byte returned by read
+        self.eof = False
+        self.stopped = False
+        self.thread = threading.Thread(target=self.prefetch, daemon=True)
+        self.thread.start()
+
+    def prefetch(self):
+        ''' reader thread: queues chunks of f until EOF, which is signalled with an empty chunk '''
+        try:
+            while not self.stopped:
+                chunk = self.f.read(self.chunkSize)
+                self.chunks.put(chunk)
+                if not chunk:
+                    return
+        except OSError as e:
+            self.chunks.put(e)
+
+    def read(self, n=-1):
+        ''' reads up to n bytes (all remaining bytes if n < 0) from the prefetched chunks '''
+
+        # fast path for the small reads of GZIP.readBits: the bytes are in the current chunk
+        pos = self.pos
+        if 0 <= n <= len(self.buffer) - pos:
+            self.pos = pos + n
+            self.offset += n
+            return self.buffer[pos : pos + n]
+
+        data = b''
+        while n < 0 or len(data) < n:
+            if self.pos >= len(self.buffer):
+                if self.eof:
+                    break
+                self.buffer = self.chunks.get()
+                self.pos = 0
+                if isinstance(self.buffer, OSError):
+                    raise self.buffer
+                if not self.buffer:
+                    self.eof = True
+                    break
+
+            end = len(self.buffer) if n < 0 else min(len(self.buffer), self.pos + n - len(data))
+            data += self.buffer[self.pos : end]
+            self.pos = end
+
+        self.offset += len(data)
+        return data
+
+    def tell(self):
+        return self.offset
+
+    def close(self):
+        ''' stops the reader thread (unblocking it if the queue is full) and closes the file '''
+        self.stopped = True
+        while self.thread.is_alive():
+            try:
+                self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self.f.close()
+
+
+class BackgroundWriter:
+    ''' file-like writer whose chunks are written to f by a background thread, through a bounded queue '''
+
+    def __init__(self, f, maxChunks=16):
+        self.f = f
+        self.chunks = queue.Queue(maxChunks)
+        self.error = None
+        self.thread = threading.Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def drain(self):
+        ''' writer thread: writes queued chunks until None is received '''
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            if self.error is None:
+                try:
+                    self.f.write(chunk)
+                except OSError as e:
+                    self.error = e
+
+    def write(self, data):
+        ''' queues data to be written; errors from the writer thread are raised here or on close '''
+        if self.error is not None:
+            raise self.error
+        self.chunks.put(bytes(data))
+
+    def close(self):
+        ''' waits for every queued chunk to be written and closes the file '''
+        self.chunks.put(None)
+        self.thread.join()
+        self.f.close()
+        if self.error is not None:
+            raise self.error
+
+
+class StopDecoding(Exception):
+    ''' raised by an output sink to stop decoding early (e.g. once enough matches were found) '''
+
+
+class LineSearch:
+    ''' output sink that searches the decompressed chunks line by line for a regular expression.
+    The partial line at the end of a chunk is kept until the rest of it arrives, so matches
+    that straddle chunk boundaries are found '''
+
+    def __init__(self, pattern, maxCount=None, onMatch=None):
+        ''' pattern: compiled bytes regular expression. onMatch(offset, line) is called for every
+        matching line (offset: position of the line in the decompressed data); StopDecoding is raised
+        after maxCount matching lines '''
+        self.regex = pattern
+        self.maxCount = maxCount
+        self.onMatch = onMatch
+        self.count = 0
+        self.pending = []   # chunks of the partial last line
+        self.offset = 0     # offset of the partial last line in the decompressed data
+
+    def write(self, data):
+        # only the new data is scanned for newlines: a long line without any (binary data)
+        # is kept in pieces and joined once, when it ends
+        end = data.rfind(b'\n') + 1
+        if not end:
+            if data:
+                self.pending.append(data)
+            return
+        self.pending.append(data[:end])
+        buf = b''.join(self.pending)
+        self.searchLines(buf, len(buf))
+        self.pending = [data[end:]] if end < len(data) else []
+        self.offset += len(buf)
+
+    def close(self):
+        ''' searches the last line, if it has no newline '''
+        if self.pending:
+            buf = b''.join(self.pending)
+            self.searchLines(buf, len(buf))
+            self.offset += len(buf)
+            self.pending = []
+
+    def searchLines(self, buf, end):
+        ''' reports the lines of buf[:end] (complete lines) with a match. The regular expression runs over
+        many lines at once: a match that crosses a newline only counts if its line matches on its own '''
+
+        pos = 0  # start of the first line not reported nor rejected yet
+        while pos < end:
+            m = self.regex.search(buf, pos, end)
+            # (an empty match at the very end, after the last newline, is not a line)
+            if m is None or (m.start() == end and buf[end - 1 : end] == b'\n'):
+                break
+            lineStart = buf.rfind(b'\n', pos, m.start()) + 1 or pos
+            lineEnd = buf.find(b'\n', m.start(), end)
+            if lineEnd == -1:
+                lineEnd = end
+            pos = lineEnd + 1
+            if m.end() > lineEnd and self.regex.search(buf, lineStart, lineEnd) is None:
+                continue
+
+            self.count += 1
+            self.onMatch(self.offset + lineStart, buf[lineStart : lineEnd])
+            if self.maxCount is not None and self.count >= self.maxCount:
+                raise StopDecoding()
+
+
+class ProgressReport:
+    ''' progress of a decompression, passed to progress callbacks '''
+
+    def __init__(self):
+        self.compressedBytes = 0     # compressed bytes consumed
+        self.compressedSize = 0      # size of the compressed file
+        self.outputBytes = 0         # decompressed bytes produced
+        self.expectedSize = 0        # ISIZE (size of the original file, modulo 2^32); None once known to be wrong
+        self.numBlocks = 0           # blocks decoded
+        self.elapsed = 0.0           # seconds since the start
+        self.rate = 0.0              # output MB/s
+        self.eta = None              # estimated seconds to the end (None if unknown)
+        self.done = False
+
+    def __str__(self):
+        eta = '?' if self.eta is None else '%.0fs' % self.eta
+        expected = '?' if self.expectedSize is None else self.expectedSize
+        return "%d/%d bytes in, %d/%s bytes out, %d block(s), %.2f MB/s, ETA %s" % (
+            self.compressedBytes, self.compressedSize, self.outputBytes, expected, self.numBlocks, self.rate, eta)
+
+
+class ProgressTracker:
+    ''' output sink wrapper that calls progress(ProgressReport) after every block (see block)
+    and every progressBytes of output. Blocks are counted by the decoder (GZIP.numBlocks).
+
+    The ETA is projected from ISIZE while it can be trusted; ISIZE is only the size of the last
+    member (modulo 2^32), so past the first member or the announced size it is projected from
+    the fraction of the compressed file consumed instead '''
+
+    def __init__(self, gz, progress, progressBytes, expectedSize, write):
+        self.gz = gz
+        self.progress = progress
+        self.progressBytes = progressBytes
+        self.out = write
+        self.report = ProgressReport()
+        self.report.compressedSize = gz.fileSize
+        self.report.expectedSize = expectedSize
+        self.start = time.perf_counter()
+        self.nextReport = progressBytes
+        self.firstBlock = gz.numBlocks
+
+    def write(self, data):
+        self.out(data)
+        self.report.outputBytes += len(data)
+        if self.report.outputBytes >= self.nextReport:
+            self.nextReport = self.report.outputBytes + self.progressBytes
+            self.notify()
+
+    def block(self, window):
+        self.notify()
+
+    def finish(self):
+        self.report.done = True
+        self.notify()
+
+    def notify(self):
+        report = self.report
+        report.compressedBytes = min(self.gz.bytePosition(), report.compressedSize)
+        report.numBlocks = self.gz.numBlocks - self.firstBlock
+        report.elapsed = time.perf_counter() - self.start
+        report.rate = report.outputBytes / report.elapsed / 1e6 if report.elapsed > 0 else 0.0
+        # decoding past the end of a member (other than at the very end), or more output than announced
+        if report.expectedSize is not None and ((self.gz.numMembers > 0 and not report.done) or report.outputBytes > report.expectedSize):
+            report.expectedSize = None
+
+        if report.done:
+            report.eta = 0.0
+        elif report.expectedSize is not None and report.rate > 0:
+            report.eta = (report.expectedSize - report.outputBytes) / (report.rate * 1e6)
+        elif report.compressedBytes > 0 and report.elapsed > 0:
+            fraction = report.compressedBytes / report.compressedSize
+            report.eta = report.elapsed * (1 - fraction) / fraction
+        else:
+            report.eta = None
+        self.progress(report)
+
+
+class TestResult:
+    ''' result of GZIP.test: integrity check of a gzip file '''
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.ok = False
+        self.numBlocks = 0
+        self.compressedSize = 0
+        self.origSize = 0       # ISIZE, from the trailer (summed over the members)
+        self.decodedSize = 0    # number of bytes actually decoded
+        self.crc = 0            # CRC32 of all the decoded bytes
+        self.errorOffset = -1   # offset of the compressed byte where the error was found
+        self.error = None       # error message, None if ok
+
+    def __str__(self):
+        if self.ok:
+            return "%s: OK (%d block(s), %d -> %d bytes)" % (self.fileName, self.numBlocks, self.compressedSize, self.decodedSize)
+        return "%s: %s (at byte %d)" % (self.fileName, self.error, self.errorOffset)
+
+
+class FileInfo:
+    ''' metadata of a gzip file, from its header and trailer only (see listFile) '''
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.fName = ''          # original name, from the header (FNAME)
+        self.fComment = ''       # comment, from the header (FCOMMENT)
+        self.mTime = 0           # modification time, from the header (MTIME)
+        self.compressedSize = 0
+        self.origSize = 0        # ISIZE, from the trailer
+        self.crc = 0             # CRC32, from the trailer
+        self.error = None        # error message, None if the header is valid
+
+    def ratio(self):
+        ''' space saving, as reported by gzip -l: 1 - compressed / uncompressed '''
+        if self.origSize == 0:
+            return 0.0
+        return 1 - self.compressedSize / self.origSize
+
+    def __str__(self):
+        if self.error is not None:
+            return "%s: %s" % (self.fileName, self.error)
+        mTime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.mTime)) if self.mTime else '-'
+        return "%12d %12d %6.1f%%  %s  %s" % (self.compressedSize, self.origSize, 100 * self.ratio(), mTime, self.fName or self.fileName)
+
+
+class InflateStream:
+    ''' incremental decoder for a deflate stream that arrives in pieces (e.g. sent by a streaming
+    encoder with sync or full flushes, see encoder.DeflateEncoder.flush): feed returns the data of
+    every symbol received whole so far. The decoder state (position, 32 KiB window and the codes of
+    the current block) is kept between calls, so the input is decoded once: only a block header,
+    or the last STREAM_STEP bytes of output of a block, cut at the end are decoded again once more data arrives.
+
+    gzipMember: the stream is a gzip member (header, deflate stream, then the trailer, checked)
+    instead of raw deflate. dictionary: preset dictionary of a raw stream (see framing.py) '''
+
+    def __init__(self, gzipMember=False, dictionary=b''):
+        self.gzipMember = gzipMember
+        self.buffer = bytearray()    # compressed bytes not fully consumed yet
+        self.bitPos = 0              # position in buffer, in bits, of the next block (or next step of the current one)
+        self.window = list(dictionary[-32768:])
+        self.codes = None            # (literal/length tree, distance tree, BFINAL) of the Huffman block being decoded
+        self.gzh = None
+        self.crc = 0
+        self.size = 0
+        self.ended = False           # last block decoded
+        self.finished = False        # last block decoded and, for a gzip member, trailer checked
+
+    def feed(self, data):
+        ''' adds data to the compressed stream and returns the bytes it completes '''
+
+        self.buffer += data
+        if self.finished:
+            return b''
+        gz = GZIP(io.BytesIO(self.buffer))
+
+        if self.gzipMember and self.gzh is None:
+            if not self.readHeader(gz):
+                return b''
+
+        new = b''
+        if not self.ended:
+            new = self.inflateBlocks(gz)
+            self.crc = zlib.crc32(new, self.crc)
+            self.size += len(new)
+
+        if self.ended and self.gzipMember:
+            self.readTrailer(gz)
+        elif self.ended:
+            self.finished = True
+
+        # drop the bytes consumed
+        drop = self.bitPos // 8
+        del self.buffer[:drop]
+        self.bitPos -= 8 * drop
+        return new
+
+    def readHeader(self, gz):
+        ''' reads the gzip header if it is complete. Returns False if more data is needed '''
+        gzh = GZIPHeader()
+        try:
+            error = gzh.read(gz.f)
+        except IndexError:
+            return False
+        if error != 0:
+            raise ValueError('Formato invalido!')
+        if len(gzh.extraField) != gzh.xlen or (gzh.FLG_FHCRC and len(gzh.HCRC) != 2):
+            return False
+        self.gzh = gzh
+        self.bitPos = 8 * gz.f.tell()
+        return True
+
+    def inflateBlocks(self, gz):
+        ''' decodes from bitPos as far as the data available allows and returns the new data '''
+
+        gz.seekBit(self.bitPos)
+        output = self.window
+        start = mark = len(output)   # output up to mark was decoded before bitPos
+        try:
+            while not self.ended:
+                if self.codes is None:
+                    BFINAL = gz.readBits(1)
+                    BTYPE = gz.readBits(2)
+                    if BTYPE == 0:
+                        output += gz.readStoredBlock()
+                        self.ended = BFINAL == 1
+                    elif BTYPE == 1:
+                        self.codes = (cachedHuffmanFromLens(FIXED_LITLEN_LENS), cachedHuffmanFromLens(FIXED_DIST_LENS), BFINAL)
+                    elif BTYPE == 2:
+                        self.codes = gz.readDynamicTrees() + (BFINAL,)
+                    else:
+                        raise ValueError('invalid block type')
+                else:
+                    # a step of the block: decompressLZ77 stops short of stop only at the end of the block
+                    stop = len(output) + STREAM_STEP
+                    output = gz.decompressLZ77(self.codes[0], self.codes[1], output, stop)
+                    if len(output) < stop:
+                        self.ended = self.codes[2] == 1
+                        self.codes = None
+
+                # a point to come back to if what follows is cut
+                self.bitPos = gz.bitPosition()
+                mark = len(output)
+        except EOFError:
+            del output[mark:]
+
+        new = bytes(output[start:])
+        self.window = output[-32768:]
+        return new
+
+    def readTrailer(self, gz):
+        ''' checks the CRC32 and ISIZE of the gzip trailer once it is complete '''
+        gz.seekBit((self.bitPos + 7) // 8 * 8)
+        trailer = gz.f.read(8)
+        if len(trailer) < 8:
+            return
+        if int.from_bytes(trailer[0:4], 'little') != self.crc:
+            raise ValueError('CRC32 mismatch')
+        if int.from_bytes(trailer[4:8], 'little') != self.size & 0xffffffff:
+            raise ValueError('ISIZE mismatch')
+        self.bitPos = 8 * gz.f.tell()
+        self.finished = True
+
+
+class GZIP:
+    ''' class for GZIP decompressing file (if compressed with deflate)
+
+    All decoding state lives in the instance and the decode tables are immutable,
+    so independent GZIP objects can run concurrently in different threads.
+    filename may also be an open binary file (e.g. io.BytesIO), to decode data from memory '''
+
+    def __init__(self, filename):
+        self.gzh = None
+        self.origFileSize = -1
+        self.numBlocks = 0    # blocks decoded by inflate, over every member
+        self.numMembers = 0   # members fully decoded by inflateMembers
+        self.trailer = b''    # trailer of the last member decoded by inflateMembers
+
+        self.bits_buffer = 0
+        self.available_bits = 0
+
+        self.gzFile = filename
+        self.f = filename if hasattr(filename, 'read') else open(filename, 'rb')
+        self.f.seek(0, 2)
+        self.fileSize = self.f.tell()
+        self.f.seek(0)
+
+# Ponto 1
+    def readDynamicBlock (self):
+        '''Interprets Dinamic Huffman compressed blocks'''
+  
+        HLIT = self.readBits(5)
+        HDIST = self.readBits(5)
+        HCLEN = self.readBits(4)
+  
+        return HLIT, HDIST, HCLEN
+
+# Ponto 2
+    def storeCLENLengths(self, HCLEN):
+        '''Stores the code lengths for the code lengths alphabet in an array'''
+     
+        # Order of lengths in which the bits are read
+        idxCLENcodeLens = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
+        CLENcodeLens = [0 for i in range(19)]
+
+		# CLENcodeLens[idx] = N translates to: "the code for idx in the code lengths alphabet has a length of N"
+		# if N == 0, that indexes' code length is not used
+        for i in range(0, HCLEN+4):
+            temp = self.readBits(3)
+            CLENcodeLens[idxCLENcodeLens[i]] = temp
+        return CLENcodeLens
+    
+# Ponto 3
+    @staticmethod
+    def createHuffmanFromLens(lenArray, verbose=False):
+        '''Takes an array with symbols' Huffman codes' lengths and returns
+		a formated Huffman tree with said codes
+  
+		If verbose==True, it prints the codes as they're added to the tree'''
+  
+        tree = HuffmanTree()
+        for code, n in canonicalCodes(lenArray):
+            tree.addNode(code, n, verbose)
+
+        return tree;
+
+# Pontos 4 e 5
+    def storeTreeCodeLens(self, size, CLENTree):
+        # Takes the code lengths huffmantree and stores the code lengths accordingly
+
+        # Immutable lookup table for the tree: the tree itself is never traversed, so it can be shared
+        CLENTable = CLENTree.decodeTable()
+
+        # Array where the code lengths will be stored 
+        treeCodeLens = [] 
+
+        prevCode = 0
+        while (len(treeCodeLens) < size):
+			# Decode the next code length symbol
+            code = self.decodeSymbol(CLENTable)
+
+			# SPECIAL CHARACTERS
+			# 18 - Reads 7 extra bits 
+			# 17 - Reads 3 extra bits
+			# 16 - Reads 2 extra bits
+            if(code == 18):
+                amount = self.readBits(7)
+				# According to the 7 bits just read, set the following 11-138 values on the length array to 0 
+                treeCodeLens += [0]*(11 + amount)
+            if(code == 17):
+                amount = self.readBits(3)
+				# According to the 3 bits just read, set the following 3-10 values on the length array to 0 
+                treeCodeLens += [0]*(3 + amount)
+            if(code == 16):
+                amount = self.readBits(2)
+				# According to the 2 bits just read, set the following 3-6 values on the length array to the latest length read
+                treeCodeLens += [prevCode]*(3 + amount)
+            elif(code >= 0 and code <= 15):
+				# If a special character isn't found, just set the next code length to the value found
+                treeCodeLens += [code]
+                prevCode = code
+
+        return treeCodeLens
+
+# Ponto 7
+    def decompressLZ77(self, HuffmanTreeLITLEN, HuffmanTreeDIST, output, stopAt=None, flush=None):
+        ''' decodes the data of a Huffman block, appended to output. If stopAt is given,
+        decoding stops early (in the middle of the block) once output holds stopAt bytes.
+        If flush is given, whenever FLUSH_SIZE bytes have left the 32 KiB window they are
+        removed from output and passed to flush, instead of waiting for the end of the block '''
+
+		# Immutable lookup tables for both trees (see HuffmanTree.decodeTable)
+        LITLENTable = HuffmanTreeLITLEN.decodeTable()
+        DISTTable = HuffmanTreeDIST.decodeTable()
+        stop = sys.maxsize if stopAt is None else stopAt
+        flushAt = sys.maxsize if flush is None else 32768 + FLUSH_SIZE
+        limit = min(stop, flushAt)
+
+        codeLITLEN = -1
+		# Read from the input stream until 256 is found
+        while(codeLITLEN != 256):
+            if len(output) >= limit:
+                if len(output) >= stop:
+                    break
+                n = len(output) - 32768
+                flush(bytes(output[:n]))
+                del output[:n]
+                stop -= n
+                limit = min(stop, flushAt)
+
+            codeLITLEN = self.decodeSymbol(LITLENTable)
+
+			# If the code reached is in the interval [0, 256[, just append the value read corresponding a the literal to the output array
+            if(codeLITLEN < 256):
+                output.append(codeLITLEN)
+
+			# If the code is in the interval [257, 285], it is refering to the length of the string to copy
+            elif(codeLITLEN > 256):
+				# if the code is in the interval [257, 265[, sets the length of the string to copy to the code read - 257 + 3
+                if(codeLITLEN < 265):
+                    length = codeLITLEN - 257 + 3
+
+				# the codes in the interval [265, 285] are special and require more bits to be read
+                else:
+					# dif defines the indices in the "Extra array's" to be used 
+                    dif = codeLITLEN - 265
+                    length = ExtraLITLENLens[dif] + self.readBits(ExtraLITLENBits[dif])
+
+                codeDIST = self.decodeSymbol(DISTTable)
+
+				# If the code read is in the interval [0, 4[ define the distance to go back to the code read + 1
+                if(codeDIST < 4):
+                    distance = codeDIST + 1
+
+				# The codes in the interval [4, 29] are special and require more bits to be read
+                else:
+					# dif defines the indices in the "Extra arrays" to be used
+                    dif = codeDIST - 4
+                    distance = ExtraDISTLens[dif] + self.readBits(ExtraDISTBits[dif])
+
+				# For each one of the range(length) iterations, copy the character at index len(output)-distance to the end of the output array
+                for i in range(length):
+                    output.append(output[-distance])
+
+        return output
+
+    def decodeSymbol(self, table):
+        ''' decodes the next symbol of the stream with a HuffmanTable: peeks maxLen bits,
+        looks them up and consumes only the length of the code found '''
+
+        entry = table.entries[self.readBits(table.maxLen, keep=True)]
+        if entry is None:
+            raise ValueError('invalid Huffman code in compressed data')
+
+        symbol, length = entry
+        self.readBits(length)
+        return symbol
+    '''
+    def testGZIPFunctions(self):
+        """ Test individual functions of the GZIP decompression process """
+    
+        # Exibe informações iniciais
+        print(f"Testing GZIP decompression functions for file: {self.gzFile}")
+    
+        
+        # Passo 1: Testar a leitura de HLIT, HDIST e HCLEN
+        HLIT, HDIST, HCLEN = self.readDynamicBlock()
+        print(f"HLIT: {HLIT}, HDIST: {HDIST}, HCLEN: {HCLEN}")
+    
+        # Passo 2: Testar a leitura dos comprimentos de código CLEN
+        CLENcodeLens = self.storeCLENLengths(HCLEN)
+        print(f"CLEN Code Lengths: {CLENcodeLens}")
+    
+        # Passo 3: Testar a criação da árvore de Huffman para CLEN
+        HuffmanTreeCLENs = self.createHuffmanFromLens(CLENcodeLens, verbose=True)
+        print("Huffman Tree for CLEN created successfully!")
+    
+        # Passo 4: Testar a decodificação dos comprimentos de códigos LITLEN
+        LITLENcodeLens = self.storeTreeCodeLens(HLIT + 257, HuffmanTreeCLENs)
+        print(f"LITLEN Code Lengths: {LITLENcodeLens}")
+    
+        # Passo 5: Testar a decodificação dos comprimentos de códigos DIST
+        DISTcodeLens = self.storeTreeCodeLens(HDIST + 1, HuffmanTreeCLENs)
+        print(f"DIST Code Lengths: {DISTcodeLens}") 
+    
+        HLIT, HDIST, HCLEN = self.readDynamicBlock()
+        CLENcodeLens = self.storeCLENLengths(HCLEN)
+        HuffmanTreeCLENs = self.createHuffmanFromLens(CLENcodeLens, verbose=True)
+        LITLENcodeLens = self.storeTreeCodeLens(HLIT + 257, HuffmanTreeCLENs)
+        DISTcodeLens = self.storeTreeCodeLens(HDIST + 1, HuffmanTreeCLENs)
+
+        # Passo 6: Testar a criação das árvores Huffman para LITLEN e DIST
+        HuffmanTreeLITLEN = self.createHuffmanFromLens(LITLENcodeLens, verbose=False)
+        print("Huffman Tree for LITLEN created successfully!")
+        HuffmanTreeDIST = self.createHuffmanFromLens(DISTcodeLens, verbose=False)
+        print("Huffman Tree for DIST created successfully!")
+    
+        # Passo 7: Testar a descompressão usando LZ77
+        output = []
+        output = self.decompressLZ77(HuffmanTreeLITLEN, HuffmanTreeDIST, output)
+        print(f"Decompressed data (first 100 bytes): {output[:100]}")
+    
+        # Verifica os primeiros 100 bytes do output (para análise e debugging)
+        return output
+    '''
+    def decompress(self, pipeline=False, progress=None, progressBytes=1 << 20, verbose=True):
+        ''' main function for decompressing the gzip file with deflate algorithm
+
+        If pipeline==True, the compressed input is prefetched by a reader thread and the
+        decoded output is written by a writer thread, so decoding never waits on I/O.
+        If progress is given, progress(report) is called with a ProgressReport after every
+        block and every progressBytes of output. If verbose==False nothing is printed '''
+
+		# get original file size: size of file before compression
+        origFileSize = self.getOrigFileSize()
+        if verbose:
+            print(origFileSize)
+		
+		# read GZIP header
+        error = self.getHeader()
+        if error != 0:
+            print('Formato invalido!')
+            return
+		
+		# show filename read from GZIP header
+        if verbose:
+            print(self.gzh.fName)
+
+		# Opens the output file in "write" binary mode
+        f = open(self.gzh.fName, 'wb')
+
+        if pipeline:
+			# input and output are handled by background threads from here on
+            self.f = PrefetchReader(self.f)
+            f = BackgroundWriter(f)
+
+        try:
+            if progress is None:
+                numBlocks = self.inflateMembers(f.write)
+            else:
+                tracker = ProgressTracker(self, progress, progressBytes, origFileSize, f.write)
+                numBlocks = self.inflateMembers(tracker.write, onBlock=tracker.block)
+                tracker.finish()
+        finally:
+			# Close the files (and stop the reader and writer threads), also on a decoding error
+            f.close()
+            self.f.close()
+        if verbose:
+            print("End: %d block(s) analyzed." % numBlocks)
+
+    def inflate(self, write, limit=None, output=None, onBlock=None):
+        ''' decodes the deflate blocks that follow the header, passing the decoded bytes to write
+        as they leave the 32 KiB window. Returns the number of blocks read; raises ValueError
+        on an invalid block type
+
+        If limit is given, decoding stops as soon as limit bytes have been produced,
+        possibly in the middle of a block.
+        output: window to start from (bytes decoded but not yet written), when resuming a stream.
+        onBlock(output): called after every block but the last one, with the current window '''
+        numBlocks = 0
+
+        emitted = [0]  # bytes already passed to write
+        def flush(data):
+            emitted[0] += len(data)
+            write(data)
+
+		# MAIN LOOP - decode block by block
+        BFINAL = 0	
+  
+        output = [] if output is None else output
+        while not BFINAL == 1:	
+            BFINAL = self.readBits(1)
+			
+            BTYPE = self.readBits(2)					
+
+			# if BTYPE == 00 in base 2 -> stored block, copied as is
+            if BTYPE == 0:
+                output += self.readStoredBlock()
+
+			# if BTYPE == 01 in base 2 -> fixed Huffman codes
+            elif BTYPE == 1:
+                output = self.decompressLZ77(cachedHuffmanFromLens(FIXED_LITLEN_LENS), cachedHuffmanFromLens(FIXED_DIST_LENS), output,
+                                             None if limit is None else limit - emitted[0], flush)
+
+			# if BTYPE == 10 in base 2 -> read the dinamic Huffman compression format 
+            elif BTYPE == 2:
+                output = self.readDynamicHuffmanBlock(output, None if limit is None else limit - emitted[0], flush)
+
+            else:
+                raise ValueError('block %d has an invalid block type' % (numBlocks + 1))
+
+			# Only the last 32768 characters should be kept in memory
+            if(len(output) > 32768):
+				# Write every charater that exceeds the 327680 range to the file
+                flush(bytes(output[0 : len(output) - 32768]))
+				# Keep the rest in the output array
+                output = output[len(output) - 32768 :]
+
+			# update number of blocks read
+            numBlocks += 1
+            self.numBlocks += 1
+
+			# enough output produced: stop without reading the rest of the stream
+            if limit is not None and emitted[0] + len(output) >= limit:
+                break
+
+            if onBlock is not None and not BFINAL:
+                onBlock(output)
+
+		# Write the bytes corresponding to the output array elements
+        flush(bytes(output))
+
+        return numBlocks
+
+    def inflateMembers(self, write, limit=None, output=None, onBlock=None):
+        ''' decodes the current member and every gzip member concatenated after it (RFC 1952, 2.2),
+        passing the decoded bytes to write. Returns the total number of blocks read.
+        limit, output and onBlock: see inflate (output only applies to the current member) '''
+
+        produced = [0]
+        def count(data):
+            produced[0] += len(data)
+            write(data)
+
+        numBlocks = 0
+        while True:
+            n = self.inflate(count, None if limit is None else limit - produced[0], output, onBlock)
+            output = None
+            numBlocks += n
+            if limit is not None and produced[0] >= limit:
+                return numBlocks
+
+			# skip the trailer (CRC32 and ISIZE, checked by test)
+            self.alignToByte()
+            self.trailer = self.readBytes(8)
+            self.numMembers += 1
+
+            if not self.nextHeader():
+                return numBlocks
+
+    def nextHeader(self):
+        ''' after the trailer of a member: reads the header of the next member and returns True if there is one.
+        Anything after the last member that is not a gzip header (garbage, a truncated header) is ignored, as gzip does '''
+
+        if self.bytePosition() >= self.fileSize:
+            return False
+        try:
+            return self.getHeader() == 0
+        except IndexError:
+            return False
+
+    def readStoredBlock(self):
+        ''' reads the bytes of a stored block: LEN and NLEN (its one's complement) from the next byte boundary, then LEN bytes '''
+
+        self.alignToByte()
+        header = self.readBytes(4)
+        LEN = header[0] + (header[1] << 8)
+        NLEN = header[2] + (header[3] << 8)
+        if LEN != NLEN ^ 0xffff:
+            raise ValueError('invalid stored block length')
+        return self.readBytes(LEN)
+
+    def readDynamicHuffmanBlock(self, output, stopAt=None, flush=None):
+        ''' reads the code trees of a dynamic Huffman block and decodes its data, appended to output
+        (until the end of the block, or until output holds stopAt bytes; see decompressLZ77) '''
+
+        HuffmanTreeLITLEN, HuffmanTreeDIST = self.readDynamicTrees()
+
+			# Based on the trees defined so far, decompress the data according to the Lempel-Ziv77 algorthm 
+        return self.decompressLZ77(HuffmanTreeLITLEN, HuffmanTreeDIST, output, stopAt, flush)
+
+    def readDynamicTrees(self):
+        ''' reads the header of a dynamic Huffman block: returns its literal/length and distance trees '''
+
+			# HLIT: # of literal/length  codes
+			# HDIST: # of distance codes 
+			# HCLEN: # of code length codes
+        HLIT, HDIST, HCLEN = self.readDynamicBlock()
+			
+			# Store the CLEN tree's code lens in a pre-determined order 
+        CLENcodeLens = self.storeCLENLengths(HCLEN)   
+        # print("Code Lengths of indices i from the code length tree:", CLENcodeLens)
+
+        # Ponto 6	
+			# Based on the CLEN tree's code lens, define an huffman tree for CLEN
+        HuffmanTreeCLENs = cachedHuffmanFromLens(tuple(CLENcodeLens))
+
+			# Store the literal and length tree code lens based on the CLEN tree codes
+			#LITLENcodeLens = self.storeLITLENcodeLens(HLIT, HuffmanTreeCLENs)
+        LITLENcodeLens = self.storeTreeCodeLens(HLIT + 257, HuffmanTreeCLENs)
+
+			# Define the literal and length huffman tree based on the lengths of it's codes
+        HuffmanTreeLITLEN = cachedHuffmanFromLens(tuple(LITLENcodeLens))
+	
+			# Store the distance tree code lens based on the CLEN tree codes
+        DISTcodeLens = self.storeTreeCodeLens(HDIST + 1, HuffmanTreeCLENs)
+
+			# Define the distance huffman tree based on the lengths of it's codes
+        HuffmanTreeDIST = cachedHuffmanFromLens(tuple(DISTcodeLens))
+
+        return HuffmanTreeLITLEN, HuffmanTreeDIST
+
+    def test(self, write=None):
+        ''' verifies the file like gzip -t: decodes every block of every member and checks CRC32
+        and ISIZE from each trailer, without writing any output. Returns a TestResult.
+        write: also passes the decoded bytes to write, to decompress and check in one pass
+        (the output is then only valid if the result is ok). The header is read unless it already was '''
+
+        result = TestResult(self.gzFile)
+        result.compressedSize = self.fileSize
+
+        # the decoded bytes are only fed to running CRC and size counters: [member CRC, member size, total CRC]
+        state = [0, 0, 0]
+        def check(data):
+            state[0] = zlib.crc32(data, state[0])
+            state[1] += len(data)
+            state[2] = zlib.crc32(data, state[2])
+            if write is not None:
+                write(data)
+
+        try:
+            if self.gzh is None and self.getHeader() != 0:
+                result.error = 'Formato invalido!'
+                result.errorOffset = 0
+                return result
+
+            while True:
+                state[0] = state[1] = 0
+                numBlocks = self.inflate(check)
+                result.decodedSize += state[1]
+                result.crc = state[2]
+                result.numBlocks += numBlocks
+
+                # trailer: CRC32 and ISIZE (LITTLE ENDIAN), starting on the byte after the last block
+                self.alignToByte()
+                trailerOffset = self.bytePosition()
+                trailer = self.readBytes(8)
+                crc = int.from_bytes(trailer[0:4], 'little')
+                origSize = int.from_bytes(trailer[4:8], 'little')
+                result.origSize += origSize
+
+                if crc != state[0]:
+                    result.error = 'CRC32 mismatch'
+                    result.errorOffset = trailerOffset
+                    return result
+                if origSize != state[1] & 0xffffffff:
+                    result.error = 'ISIZE mismatch'
+                    result.errorOffset = trailerOffset + 4
+                    return result
+
+                # concatenated members: continue while another gzip header follows
+                if not self.nextHeader():
+                    break
+
+            result.ok = True
+
+        except (ValueError, EOFError, IndexError) as e:
+            result.decodedSize += state[1]
+            result.crc = state[2]
+            result.error = str(e) or type(e).__name__
+            result.errorOffset = self.bytePosition()
+
+        finally:
+            self.f.close()
+
+        return result
+
+    def decompressRange(self, start, length):
+        ''' returns the bytes [start, start + length[ of the decompressed data. Decoding stops as soon as
+        the range is produced and the bytes before start are decoded but never copied or kept '''
+
+        chunks = []
+        pos = [0]
+        def keep(data):
+            begin = pos[0]
+            pos[0] += len(data)
+            if pos[0] > start:
+                chunks.append(data[max(0, start - begin) :])
+
+        try:
+            if self.getHeader() != 0:
+                raise ValueError('Formato invalido!')
+            if length > 0:
+                self.inflateMembers(keep, start + length)
+        finally:
+            self.f.close()
+
+        return b''.join(chunks)[:length]
+
+    def head(self, n):
+        ''' returns the first n bytes of the decompressed data (e.g. to sniff its format or preview it) '''
+        return self.decompressRange(0, n)
+
+    def decompressInto(self, buffer):
+        ''' decodes every member into buffer, any writable object with the buffer protocol (bytearray,
+        memoryview, array.array, mmap, NumPy array...), with no file and no copy of the whole output.
+        Returns the number of bytes written; raises ValueError if buffer is too small '''
+
+        view = memoryview(buffer).cast('B')
+        if view.readonly:
+            raise TypeError('buffer is read-only')
+
+        pos = [0]
+        def write(data):
+            end = pos[0] + len(data)
+            if end > len(view):
+                raise ValueError('buffer too small: more than %d bytes of output' % len(view))
+            view[pos[0] : end] = data
+            pos[0] = end
+
+        try:
+            if self.getHeader() != 0:
+                raise ValueError('Formato invalido!')
+            self.inflateMembers(write)
+        finally:
+            view.release()
+            self.f.close()
+
+        return pos[0]
+
+    def decompressToNumpy(self):
+        ''' decodes every member into a NumPy uint8 array allocated once from ISIZE (and returned as a
+        view of it, without copy). ISIZE is the size of the last member modulo 2**32: for larger or
+        multi-member files the array is grown as needed '''
+
+        # optional, and imported here only: NumPy would add more to the start of every command than most files take to decode
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError('decompressToNumpy needs NumPy') from None
+
+        array = [np.empty(self.getOrigFileSize(), np.uint8)]
+        pos = [0]
+        def write(data):
+            end = pos[0] + len(data)
+            if end > len(array[0]):
+                grown = np.empty(max(end, 2 * len(array[0])), np.uint8)
+                grown[: pos[0]] = array[0][: pos[0]]
+                array[0] = grown
+            array[0][pos[0] : end] = np.frombuffer(data, np.uint8)
+            pos[0] = end
+
+        try:
+            if self.getHeader() != 0:
+                raise ValueError('Formato invalido!')
+            self.inflateMembers(write)
+        finally:
+            self.f.close()
+
+        return array[0][: pos[0]]
+
+    def search(self, pattern, maxCount=None, ignoreCase=False, fixed=False, onMatch=None):
+        ''' searches the decompressed data for pattern (a regular expression, or a literal string if fixed)
+        as it is decoded, without writing any output. Decoding stops after maxCount matching lines.
+        onMatch(offset, line) is called for each matching line; if not given, the list of
+        (offset, line) pairs is returned '''
+
+        if isinstance(pattern, str):
+            pattern = pattern.encode('utf-8')
+        if fixed:
+            pattern = re.escape(pattern)
+        regex = re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignoreCase else 0))
+
+        matches = []
+        searcher = LineSearch(regex, maxCount, onMatch or (lambda offset, line: matches.append((offset, line))))
+
+        try:
+            if self.getHeader() != 0:
+                raise ValueError('Formato invalido!')
+            if maxCount != 0:
+                self.inflateMembers(searcher.write)
+                searcher.close()
+        except StopDecoding:
+            pass
+        finally:
+            self.f.close()
+
+        return matches if onMatch is None else searcher.count
+
+    def decompressResumable(self, outName=None, checkpointName=None, interval=60):
+        ''' decompresses to outName (default: the FNAME header field) saving, at most every interval seconds,
+        a snapshot of the decoder at a block boundary in checkpointName (default: outName + '.checkpoint'):
+        bit offset in the compressed file, output offset, 32 KiB window, and running CRC32 and size of the member.
+        If the checkpoint of a previous run of the same file exists, decoding resumes from it and
+        appends to the partial output. The CRC32 and ISIZE of every member are checked against its
+        trailer (ValueError on a mismatch). The checkpoint is removed once decompression ends.
+        Returns the number of blocks decoded by this run '''
+
+        if self.getHeader() != 0:
+            self.f.close()
+            raise ValueError('Formato invalido!')
+        if outName is None:
+            outName = self.gzh.fName
+        if checkpointName is None:
+            checkpointName = outName + '.checkpoint'
+
+        st = os.stat(self.gzFile)
+        snapshot = loadCheckpoint(checkpointName)
+        if snapshot is not None and ('memberSize' not in snapshot or snapshot['fileSize'] != st.st_size or snapshot['mTime'] != st.st_mtime_ns
+                                     or not os.path.exists(outName) or os.path.getsize(outName) < snapshot['outputOffset']):
+            snapshot = None  # checkpoint of another file, or output missing: start over
+
+        # [bytes written, CRC32 and size of the bytes written of the current member]
+        state = [0, 0, 0]
+        if snapshot is None:
+            f = open(outName, 'wb')
+            output = None
+        else:
+            f = open(outName, 'r+b')
+            f.truncate(snapshot['outputOffset'])
+            f.seek(snapshot['outputOffset'])
+            state = [snapshot['outputOffset'], snapshot['crc'], snapshot['memberSize']]
+            output = list(base64.b64decode(snapshot['window']))
+            self.numMembers = snapshot['numMembers']
+            self.seekBit(snapshot['bitPosition'])
+
+        def write(data):
+            f.write(data)
+            state[0] += len(data)
+            state[1] = zlib.crc32(data, state[1])
+            state[2] += len(data)
+
+        lastSave = [time.monotonic()]
+        def save(window):
+            if time.monotonic() - lastSave[0] < interval:
+                return
+            # the output must be on disk before the checkpoint that refers to it
+            f.flush()
+            os.fsync(f.fileno())
+            saveCheckpoint(checkpointName, {
+                'gzFile': os.path.abspath(self.gzFile), 'fileSize': st.st_size, 'mTime': st.st_mtime_ns,
+                'bitPosition': self.bitPosition(), 'outputOffset': state[0], 'crc': state[1],
+                'memberSize': state[2], 'numMembers': self.numMembers, 'window': base64.b64encode(bytes(window)).decode('ascii'),
+            })
+            lastSave[0] = time.monotonic()
+
+        try:
+            numBlocks = 0
+            while True:
+                numBlocks += self.inflate(write, None, output, save)
+                output = None
+
+                # trailer: the CRC32 and size of the member must match, as in test
+                self.alignToByte()
+                trailerOffset = self.bytePosition()
+                self.trailer = self.readBytes(8)
+                self.numMembers += 1
+                if int.from_bytes(self.trailer[0:4], 'little') != state[1]:
+                    raise ValueError('CRC32 mismatch at offset %d' % trailerOffset)
+                if int.from_bytes(self.trailer[4:8], 'little') != state[2] & 0xffffffff:
+                    raise ValueError('ISIZE mismatch at offset %d' % (trailerOffset + 4))
+                state[1] = state[2] = 0
+
+                if not self.nextHeader():
+                    break
+        finally:
+            f.close()
+            self.f.close()
+
+        if os.path.exists(checkpointName):
+            os.remove(checkpointName)
+        return numBlocks
+
+    def getOrigFileSize(self):
+        ''' reads file size of original file (before compression) - ISIZE '''
+
+        # saves current position of file pointer
+        fp = self.f.tell()
+
+        # jumps to end-4 position
+        self.f.seek(self.fileSize - 4)
+
+        # reads the last 4 bytes (LITTLE ENDIAN)
+        sz = 0
+        for i in range(4):
+            byte = self.f.read(1)[0]
+            sz += byte << (8 * i)
+
+        # restores file pointer to its original position
+        self.f.seek(fp)
+
+        return sz
+
+    def getHeader(self):
+        ''' reads GZIP header'''
+
+        self.gzh = GZIPHeader()
+        header_error = self.gzh.read(self.f)
+        return header_error
+
+    def readBits(self, n, keep=False):
+        ''' reads n bits from bits_buffer. if keep = True, leaves bits in the buffer for future accesses '''
+
+        if n > self.available_bits:
+            # the bytes missing, in a single read (never more: the file position stays on the next unread byte)
+            data = self.f.read((n - self.available_bits + 7) >> 3)
+            self.bits_buffer |= (data[0] if len(data) == 1 else int.from_bytes(data, 'little')) << self.available_bits
+            self.available_bits += 8 * len(data)
+            # peeking past the end of the stream: missing bits are read as 0
+            if n > self.available_bits and not keep:
+                raise EOFError('unexpected end of compressed data')
+
+        mask = (2 ** n) - 1
+        value = self.bits_buffer & mask
+
+        if not keep:
+            self.bits_buffer >>= n
+            self.available_bits -= n
+
+        return value
+
+    def seek(self, offset):
+        ''' moves to offset in the file (e.g. the start of another member), discarding the bits buffer '''
+        self.f.seek(offset)
+        self.bits_buffer = 0
+        self.available_bits = 0
+
+    def alignToByte(self):
+        ''' discards the bits left in the current byte, so that the next read starts on a byte boundary '''
+        self.readBits(self.available_bits % 8)
+
+    def readBytes(self, n):
+        ''' reads n bytes from a byte boundary: first the whole bytes already in bits_buffer, then from the file '''
+
+        data = bytearray()
+        while len(data) < n and self.available_bits >= 8:
+            data.append(self.readBits(8))
+        data += self.f.read(n - len(data))
+
+        if len(data) < n:
+            raise EOFError('unexpected end of compressed data')
+        return bytes(data)
+
+    def bitPosition(self):
+        ''' offset in bits, from the start of the file, of the next unread bit '''
+        return self.f.tell() * 8 - self.available_bits
+
+    def seekBit(self, bitPosition):
+        ''' moves the bit reader to an offset in bits from the start of the file '''
+        self.seek(bitPosition // 8)
+        self.readBits(bitPosition % 8)
+
+    def bytePosition(self):
+        ''' offset in the file of the byte holding the next unread bit '''
+        return self.f.tell() - (self.available_bits + 7) // 8
+
+@functools.lru_cache(maxsize=1024)
+def cachedHuffmanFromLens(lens):
+    ''' returns the Huffman tree for a tuple of code lengths, cached per process: trees are never
+    traversed while decoding (only their immutable decode tables are), so they can be shared by every decoder '''
+    return GZIP.createHuffmanFromLens(list(lens))
+
+
+def loadCheckpoint(checkpointName):
+    ''' returns the snapshot saved by GZIP.decompressResumable, or None '''
+    try:
+        with open(checkpointName) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def saveCheckpoint(checkpointName, snapshot):
+    ''' writes a snapshot atomically: a crash leaves either the previous or the new checkpoint '''
+    tmpName = checkpointName + '.tmp'
+    with open(tmpName, 'w') as f:
+        json.dump(snapshot, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpName, checkpointName)
+
+
+def outputPath(fileName, outDir=None, fName=None):
+    ''' path of the output of decompressFile: named after the input without .gz (or after the FNAME header
+    field, read from the file if fName is None, if the input has no .gz suffix), in outDir or next to the input '''
+
+    outName = os.path.basename(fileName)
+    if outName.endswith('.gz') and len(outName) > 3:
+        outName = outName[:-3]
+    else:
+        if fName is None:
+            gzh = GZIPHeader()
+            try:
+                with open(fileName, 'rb') as f:
+                    fName = gzh.fName if gzh.read(f) == 0 else ''
+            except (OSError, IndexError):
+                fName = ''
+        outName = os.path.basename(fName) or outName + '.out'
+    return os.path.join(outDir if outDir is not None else os.path.dirname(fileName), outName)
+
+
+def decompressFile(fileName, outDir=None):
+    ''' decompresses one file without printing, to outputPath(fileName, outDir). The CRC32 and ISIZE of every
+    member are checked as it is decoded; on error the output is removed.
+    Returns (fileName, compressed size, decompressed size, error message or None): the decompressed size
+    of a file that failed is 0 '''
+
+    try:
+        gz = GZIP(fileName)
+    except OSError as e:
+        return fileName, 0, 0, str(e)
+
+    outPath = None
+    try:
+        if gz.getHeader() != 0:
+            return fileName, gz.fileSize, 0, 'Formato invalido!'
+
+        outPath = outputPath(fileName, outDir, gz.gzh.fName)
+        with open(outPath, 'wb') as f:
+            result = gz.test(f.write)
+            outSize = f.tell()
+
+        if not result.ok:
+            os.remove(outPath)
+            return fileName, gz.fileSize, 0, '%s (at byte %d)' % (result.error, result.errorOffset)
+        return fileName, gz.fileSize, outSize, None
+
+    except (OSError, ValueError, EOFError, IndexError) as e:
+        if outPath is not None and os.path.exists(outPath):
+            os.remove(outPath)
+        return fileName, gz.fileSize, 0, str(e) or type(e).__name__
+    finally:
+        gz.f.close()
+
+
+def decompressBatch(fileNames, workers=None, outDir=None):
+    ''' decompresses many files over a pool of worker processes. Each worker decodes many files,
+    so interpreter startup is paid once per worker and its Huffman tree cache is reused.
+    outDir is created if needed. Inputs whose output path is already taken by a previous input
+    (e.g. a/x.gz and b/x.gz with the same outDir) are not decoded and fail.
+    Returns the list of decompressFile results, in the order of fileNames '''
+
+    fileNames = list(fileNames)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if outDir is not None:
+        os.makedirs(outDir, exist_ok=True)
+
+    results = [None] * len(fileNames)
+    owners = {}
+    todo = []
+    for i, fileName in enumerate(fileNames):
+        outPath = os.path.realpath(outputPath(fileName, outDir))
+        if outPath in owners:
+            results[i] = (fileName, 0, 0, 'output %s is also the output of %s' % (outPath, owners[outPath]))
+        else:
+            owners[outPath] = fileName
+            todo.append(i)
+
+    # hand files out in chunks to cut scheduling overhead, while keeping the workers balanced
+    chunkSize = max(1, len(todo) // (workers * 4))
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        done = pool.map(decompressFile, [fileNames[i] for i in todo], [outDir] * len(todo), chunksize=chunkSize)
+        for i, result in zip(todo, done):
+            results[i] = result
+    return results
+
+
+def batchMain(argv):
+    ''' command line for: gzip.py batch [-j N] [-o DIR] [-T LIST] PATTERN... '''
+
+    parser = argparse.ArgumentParser(prog='gzip.py batch', description='decompress many .gz files with a pool of worker processes')
+    parser.add_argument('patterns', nargs='*', help='files or glob patterns')
+    parser.add_argument('-T', '--files-from', help='file with one input file name per line')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('-o', '--output-dir', default=None, help='directory for the decompressed files (default: next to each input)')
+    args = parser.parse_args(argv)
+
+    fileNames = []
+    for pattern in args.patterns:
+        fileNames += sorted(glob.glob(pattern)) or [pattern]
+    if args.files_from:
+        with open(args.files_from) as f:
+            fileNames += [line.strip() for line in f if line.strip()]
+
+    start = time.perf_counter()
+    results = decompressBatch(fileNames, args.jobs, args.output_dir)
+    elapsed = time.perf_counter() - start
+
+    # sizes and rates count the files decoded successfully only
+    inBytes = outBytes = 0
+    failures = 0
+    for fileName, inSize, outSize, error in results:
+        if error is not None:
+            failures += 1
+            print("Error: %s: %s" % (fileName, error))
+        else:
+            inBytes += inSize
+            outBytes += outSize
+
+    print("%d file(s), %d failed, %d -> %d bytes in %.2f s (%.2f MB/s compressed, %.2f MB/s decompressed)"
+          % (len(results), failures, inBytes, outBytes, elapsed,
+             inBytes / elapsed / 1e6 if elapsed else 0, outBytes / elapsed / 1e6 if elapsed else 0))
+    return 1 if failures else 0
+
+
+def testMain(argv):
+    ''' command line for: gzip.py test FILE... (like gzip -t) '''
+
+    parser = argparse.ArgumentParser(prog='gzip.py test', description='check the integrity of .gz files without writing any output')
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for fileName in args.files:
+        try:
+            result = GZIP(fileName).test()
+        except OSError as e:
+            print("%s: %s" % (fileName, e))
+            failures += 1
+            continue
+        print(result)
+        if not result.ok:
+            failures += 1
+
+    return 1 if failures else 0
+
+
+def listFile(fileName, headerBytes=4096):
+    ''' reads the metadata of a gzip file without decoding it: the header is parsed from a single bulk
+    read of headerBytes (the file is re-read only if the header is longer) and ISIZE/CRC32 from the
+    8-byte trailer. Returns a FileInfo '''
+
+    info = FileInfo(fileName)
+    try:
+        with open(fileName, 'rb') as f:
+            head = f.read(headerBytes)
+            gzh = GZIPHeader()
+            try:
+                error = gzh.read(io.BytesIO(head))
+            except IndexError:
+                # header longer than the bulk read (or truncated file)
+                f.seek(0)
+                gzh = GZIPHeader()
+                error = gzh.read(f)
+
+            if error != 0:
+                info.error = 'Formato invalido!'
+                return info
+
+            f.seek(0, 2)
+            info.compressedSize = f.tell()
+            f.seek(max(0, info.compressedSize - 8))
+            trailer = f.read(8)
+
+    except (OSError, IndexError) as e:
+        info.error = str(e) or 'unexpected end of file'
+        return info
+
+    info.fName = gzh.fName
+    info.fComment = gzh.fComment
+    info.mTime = gzh.mTime
+    info.crc = int.from_bytes(trailer[0:4], 'little')
+    info.origSize = int.from_bytes(trailer[4:8], 'little')
+    return info
+
+
+def listFiles(paths, workers=None):
+    ''' lists many gzip files (directories are searched recursively for .gz files) with a thread pool:
+    the work is I/O bound, so threads overlap the reads. Returns a list of FileInfo '''
+
+    fileNames = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirPath, dirNames, names in os.walk(path):
+                dirNames.sort()
+                fileNames += [os.path.join(dirPath, name) for name in sorted(names) if name.endswith('.gz')]
+        else:
+            fileNames.append(path)
+
+    if workers == 1 or len(fileNames) < 2:
+        return [listFile(fileName) for fileName in fileNames]
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(listFile, fileNames))
+
+
+def listMain(argv):
+    ''' command line for: gzip.py list [-j N] PATH... (like gzip -l) '''
+
+    parser = argparse.ArgumentParser(prog='gzip.py list', description='list the metadata of .gz files from their header and trailer, without decoding')
+    parser.add_argument('paths', nargs='+', help='files, or directories searched recursively for .gz files')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of threads (default: Python default)')
+    args = parser.parse_args(argv)
+
+    infos = listFiles(args.paths, args.jobs)
+
+    print("%12s %12s %7s  %-19s  %s" % ('compressed', 'uncompressed', 'ratio', 'mtime', 'name'))
+    compressed = uncompressed = failures = 0
+    for info in infos:
+        print(info)
+        if info.error is not None:
+            failures += 1
+        else:
+            compressed += info.compressedSize
+            uncompressed += info.origSize
+
+    total = FileInfo('(totals)')
+    total.compressedSize, total.origSize = compressed, uncompressed
+    print("%12d %12d %6.1f%%  %d file(s)" % (compressed, uncompressed, 100 * total.ratio(), len(infos) - failures))
+    return 1 if failures else 0
+
+
+def headMain(argv):
+    ''' command line for: gzip.py head [-c BYTES] [-s START] FILE '''
+
+    parser = argparse.ArgumentParser(prog='gzip.py head', description='write a range of the decompressed data to stdout, decoding only up to its end')
+    parser.add_argument('file')
+    parser.add_argument('-c', '--bytes', type=int, default=1024, help='number of bytes (default: 1024)')
+    parser.add_argument('-s', '--start', type=int, default=0, help='offset of the first byte (default: 0)')
+    args = parser.parse_args(argv)
+
+    try:
+        data = GZIP(args.file).decompressRange(args.start, args.bytes)
+    except (OSError, ValueError, EOFError, IndexError) as e:
+        print("gzip.py head: %s: %s" % (args.file, str(e) or type(e).__name__), file=sys.stderr)
+        return 1
+    sys.stdout.buffer.write(data)
+    return 0
+
+
+def searchMain(argv):
+    ''' command line for: gzip.py search [-m N] [-i] [-F] PATTERN FILE... (like zgrep -b) '''
+
+    parser = argparse.ArgumentParser(prog='gzip.py search', description='print the lines of .gz files matching a pattern, with their offsets, without writing the decompressed data')
+    parser.add_argument('pattern')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-m', '--max-count', type=int, default=None, help='stop after N matching lines (per file)')
+    parser.add_argument('-i', '--ignore-case', action='store_true')
+    parser.add_argument('-F', '--fixed-strings', action='store_true', help='PATTERN is a literal string')
+    args = parser.parse_args(argv)
+
+    out = sys.stdout.buffer
+    total = 0
+    failures = 0
+    for fileName in args.files:
+        prefix = fileName.encode() + b':' if len(args.files) > 1 else b''
+        def printMatch(offset, line):
+            out.write(prefix + str(offset).encode() + b':' + line + b'\n')
+        try:
+            total += GZIP(fileName).search(args.pattern, args.max_count, args.ignore_case, args.fixed_strings, printMatch)
+        except (OSError, ValueError, EOFError, IndexError) as e:
+            # reported, and the search goes on with the next file
+            out.flush()
+            print("gzip.py search: %s: %s" % (fileName, str(e) or type(e).__name__), file=sys.stderr)
+            failures += 1
+
+    out.flush()
+    # like zgrep: 0 if a line matched, 1 if none did, 2 if a file could not be read
+    return 2 if failures else 0 if total else 1
+
+
+def resumeMain(argv):
+    ''' command line for: gzip.py resume [-o OUT] [-c CHECKPOINT] [-i SECONDS] FILE '''
+
+    parser = argparse.ArgumentParser(prog='gzip.py resume', description='decompress with periodic checkpoints, resuming from the last checkpoint of an interrupted run')
+    parser.add_argument('file')
+    parser.add_argument('-o', '--output', default=None, help='output file (default: name from the header)')
+    parser.add_argument('-c', '--checkpoint', default=None, help='checkpoint file (default: OUTPUT.checkpoint)')
+    parser.add_argument('-i', '--interval', type=float, default=60, help='seconds between checkpoints (default: 60)')
+    args = parser.parse_args(argv)
+
+    try:
+        numBlocks = GZIP(args.file).decompressResumable(args.output, args.checkpoint, args.interval)
+    except (OSError, ValueError, EOFError, IndexError) as e:
+        # the checkpoint is kept: a run after a transient error resumes from it
+        print("gzip.py resume: %s: %s" % (args.file, str(e) or type(e).__name__), file=sys.stderr)
+        return 1
+    print("End: %d block(s) analyzed." % numBlocks)
+    return 0
+
+
+# commands available as gzip.py COMMAND ...; anything else is a file to decompress
+COMMANDS = {
+    'batch': batchMain,
+    'test': testMain,
+    'list': listMain,
+    'head': headMain,
+    'search': searchMain,
+    'resume': resumeMain,
+}
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
+    # gets filename from command line if provided
+    # --pipeline: overlap input reads and output writes with decoding
+    # --progress: show the progress of the decompression on stderr
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    fileName = "sample_large_text.txt.gz"
+    if len(args) > 0:
+        fileName = args[0]
+
+    progress = None
+    if '--progress' in sys.argv:
+        progress = lambda report: print('\r' + str(report), end='\n' if report.done else '', file=sys.stderr, flush=True)
+
+    # decompress file
+    gz = GZIP(fileName)
+    gz.decompress(pipeline='--pipeline' in sys.argv, progress=progress)
@@ -0,0 +1,148 @@
+# Teoria da Informacao, LEI, 2022
+# Order-0 canonical Huffman codec for byte streams (no LZ77): the data is cut in chunks,
+# each one coded with its own code, so that chunks can be encoded and decoded in parallel
+
+import io
+import sys
+import argparse
+import concurrent.futures
+from huffmantree import HuffmanTree
+from gzip import GZIP, cachedHuffmanFromLens
+import encoder
+
+
+MAGIC = b'HF'
+CHUNK_SIZE = 1 << 20
+MASK64 = (1 << 64) - 1
+
+
+def encodeChunk(data):
+    ''' codes a chunk: code lengths header, then the codes of the bytes, LSB first from a byte boundary '''
+
+    freqs = [0] * 256
+    for byte in data:
+        freqs[byte] += 1
+    table = HuffmanTree.fromFrequencies(freqs, encoder.MAX_BITS).encodeTable(256)
+
+    # the 256 code lengths, coded like those of a dynamic deflate block
+    # (read back with GZIP.storeCLENLengths and GZIP.storeTreeCodeLens)
+    out = encoder.BitWriter()
+    encoder.CodeLengthsHeader(table.lengths).write(out)
+    out.alignToByte()
+
+    # BitWriter.writeBits, inlined: one (code, length) lookup per byte, 64 bits written at a time
+    codes = table.codes
+    lengths = table.lengths
+    payload = out.out
+    bits = 0
+    n = 0
+    for byte in data:
+        bits |= codes[byte] << n
+        n += lengths[byte]
+        if n >= 64:
+            payload += (bits & MASK64).to_bytes(8, 'little')
+            bits >>= 64
+            n -= 64
+    payload += bits.to_bytes((n + 7) // 8, 'little')
+    return bytes(payload)
+
+
+def decodeChunk(chunk, size):
+    ''' decodes the size bytes of a chunk written by encodeChunk '''
+
+    gz = GZIP(io.BytesIO(chunk))
+    HCLEN = gz.readBits(4)
+    CLENTree = cachedHuffmanFromLens(tuple(gz.storeCLENLengths(HCLEN)))
+    lens = gz.storeTreeCodeLens(256, CLENTree)
+    gz.alignToByte()
+    pos = gz.bytePosition()
+
+    table = HuffmanTree.fromLengths(lens).decodeTable()
+    entries = table.entries
+    mask = (1 << table.maxLen) - 1
+    out = bytearray(size)
+    bits = 0
+    n = 0
+    for k in range(size):
+        if n < table.maxLen:
+            # refill with up to 7 bytes (past the end, missing bits are read as 0)
+            more = chunk[pos : pos + 7]
+            bits |= int.from_bytes(more, 'little') << n
+            n += 8 * len(more)
+            pos += len(more)
+        entry = entries[bits & mask]
+        if entry is None:
+            raise ValueError('invalid Huffman code in chunk')
+        out[k] = entry[0]
+        bits >>= entry[1]
+        n -= entry[1]
+    return bytes(out)
+
+
+def chunkMap(function, args, workers):
+    ''' maps function over args in a pool of worker processes, or in this process if workers == 1 '''
+    if workers == 1 or len(args) <= 1:
+        return [function(*a) for a in args]
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(function, *zip(*args)))
+
+
+def huffmanEncode(data, chunkSize=CHUNK_SIZE, workers=None):
+    ''' Huffman codes data: MAGIC, size (8 bytes), chunk size (4 bytes) and, for every chunk,
+    its coded size (4 bytes) and the coded chunk. Chunks are coded in parallel if workers != 1 '''
+
+    chunks = [(data[pos : pos + chunkSize],) for pos in range(0, len(data), chunkSize)]
+    blob = bytearray(MAGIC + len(data).to_bytes(8, 'little') + chunkSize.to_bytes(4, 'little'))
+    for coded in chunkMap(encodeChunk, chunks, workers):
+        blob += len(coded).to_bytes(4, 'little') + coded
+    return bytes(blob)
+
+
+def huffmanDecode(blob, workers=None):
+    ''' decodes data coded by huffmanEncode. Raises ValueError if blob is not valid '''
+
+    if blob[:2] != MAGIC or len(blob) < 14:
+        raise ValueError('not a Huffman coded stream')
+    size = int.from_bytes(blob[2:10], 'little')
+    chunkSize = int.from_bytes(blob[10:14], 'little')
+
+    chunks = []
+    pos = 14
+    left = size
+    while left > 0:
+        length = int.from_bytes(blob[pos : pos + 4], 'little')
+        if pos + 4 + length > len(blob):
+            raise ValueError('truncated Huffman coded stream')
+        chunks.append((blob[pos + 4 : pos + 4 + length], min(chunkSize, left)))
+        pos += 4 + length
+        left -= chunkSize
+
+    return b''.join(chunkMap(decodeChunk, chunks, workers))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='order-0 Huffman coding of a file (FILE -> FILE.huf, FILE.huf -> FILE)')
+    parser.add_argument('command', choices=('encode', 'decode'))
+    parser.add_argument('file')
+    parser.add_argument('-o', '--output', default=None)
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    with open(args.file, 'rb') as f:
+        data = f.read()
+
+    try:
+        if args.command == 'encode':
+            result = huffmanEncode(data, workers=args.jobs)
+            outName = args.output or args.file + '.huf'
+        else:
+            result = huffmanDecode(data, workers=args.jobs)
+            outName = args.output or (args.file[:-4] if args.file.endswith('.huf') else args.file + '.out')
+    except (ValueError, EOFError) as e:
+        print("Error: %s: %s" % (args.file, e), file=sys.stderr)
+        sys.exit(1)
+
+    with open(outName, 'wb') as f:
+        f.write(result)
+    print("%s: %d -> %d bytes" % (outName, len(data), len(result)))
@@ -1,209 +1,410 @@
-# Author: Marco Simões
-# Adapted from Java's implementation of Rui Pedro Paiva
-# Teoria da Informacao, LEI, 2022
-
-
-class HFNode:
-	'''class for representation of a Huffman node '''
-
-	index = -1  # if leaf, saves the position in alphabet; otherwise, -1;
-	level = 0 # level of the node in the tree
-	left, right = None, None  # left and right child nodes. If leaf, both are None
-	
-	
-	def __init__(self, i, lv, l=None, r=None):
-		self.index = i
-		self.level = lv
-		self.left = l
-		self.right = r
-	
-	
-	# check if node is leaf
-	def isLeaf(self):
-		return self.left == None and self.right == None
-			
-
-class HuffmanTree:
-	'''class for creating, managing and accessing Huffman trees'''
-	
-	root = curNode = None  
-		
-
-	def __init__(self, root=None, curNode=None):
-		if not root:
-			root = HFNode(-1, 0)
-			curNode = root
-		self.root = root
-		self.curNode = curNode
-		
-	
-
-	def resetCurNode(self):
-		''' position curNode pointer on the root of the tree '''
-		self.curNode = self.root
-	
-	
-	
-	def addNode(self, s, ind, verbose=False):
-		''' Adds a new node to the tree. Gets the code as a string s of zeros and ones and the index of the alphabet.
-			returns: 
-				 0: success
-				-1: node already exists
-				-2: code is not longer prefix code'''
-	
-		tmp = self.root
-		lv = 0 
-		l = len(s)
-
-		found = False
-		pos = -3
-					
-		while lv < l and not found:
-			# trying to create son of leaf --> error, not prefix code
-			if tmp.index != -1:
-				pos = -2
-				found = True
-			else:
-				direction = s[lv]
-				
-				if direction == '0': # LEFT
-
-					if lv != l-1 and tmp.left != None:  # keep on going down
-						tmp = tmp.left
-
-					elif tmp.left != None: # already inserted
-						pos = -1
-						found = True
-					
-					
-					else: # create node in the left
-						if lv == l-1:  # leaf						
-							index = ind
-						else:
-							index = -1
-
-						hf = HFNode(index, lv+1)
-						tmp.left = hf
-						tmp = tmp.left
-				
-				
-				elif direction == '1': # RIGHT
-				
-					if lv != l -1 and tmp.right != None: # keep on going down
-						tmp = tmp.right
-
-					elif tmp.right != None: # already inserted
-						pos = -1
-						found = True
-					
-					else: # create node in the right
-						if lv == l-1:  # leaf
-							index = ind
-						else:
-							index = -1
-
-						hf = HFNode(index, lv+1)
-						tmp.right = hf
-						tmp = tmp.right
-							
-			lv += 1	
-				
-		if not found:
-			pos = tmp.index
-			
-		if verbose:
-			if pos == -1:
-				print("Code '" + s + "' already inserted!!!")
-			elif pos == -2:
-				print("Code '" + s + "' trying to extend leaf - no prefix code!!!")
-			else:
-				print("Code '" + s + "' successfully inserted!!!")
-		
-		return pos	
-		
-	
-	def findNode(self, s, cur=None, verbose=False):
-		''' finds node from cur node following a string of '0's and '1's for traversing left or right, respectfully.
-			returns:
-			-1 if not found
-			-2 if it is prefix of an existing code
-			indice of the alphabet if found '''
-		
-		if cur == None:
-			cur = self.root
-			
-		tmp = cur
-		lv = 0
-		l = len(s)
-		found = True
-		
-		
-		while lv < l and found:
-		
-			direction = s[lv]
-			
-			if direction == '0':
-				if tmp.left != None:
-					tmp = tmp.left
-				else:
-					found = False
-			
-			elif direction == '1':
-				if tmp.right != None:
-					tmp = tmp.right
-				else:
-					found = False
-			
-			
-			lv += 1
-		
-				
-		if not found:
-			pos = -1
-		elif tmp.index == -1:
-			pos = -2
-		else:
-			pos = tmp.index
-			
-		if verbose:
-			if pos == -1:
-				print("Code '" + s + "' not found!!!")
-			elif pos == -2:
-				print("Code '" + s + "': not found but prefix!!!")
-			else:
-				print("Code '" + s + "' found, alphabet position: " + str(pos) )
-						
-		return pos
-
-	
-
-	
-	def nextNode(self, dir):
-		''' updates curNode based on the direction dir to descend the tree '''
-		
-		if self.curNode.isLeaf():
-			return -1
-		
-		if dir == '0':
-			if self.curNode.left != None:
-				self.curNode = self.curNode.left
-				if self.curNode.isLeaf():
-					pos = self.curNode.index
-				else:
-					pos = -2
-			else:
-				pos = -1
-
-		elif dir == '1':
-			if self.curNode.right != None:
-				self.curNode = self.curNode.right
-				if self.curNode.isLeaf():
-					pos = self.curNode.index
-				else:
-					pos = -2
-			
-			else:
-				pos = -1								
-		
-		return pos
-
+# Author: Marco Simões
+# Adapted from Java's implementation of Rui Pedro Paiva
+# Teoria da Informacao, LEI, 2022
+
+
+class HFNode:
+	'''class for representation of a Huffman node '''
+
+	index = -1  # if leaf, saves the position in alphabet; otherwise, -1;
+	level = 0 # level of the node in the tree
+	left, right = None, None  # left and right child nodes. If leaf, both are None
+	
+	
+	def __init__(self, i, lv, l=None, r=None):
+		self.index = i
+		self.level = lv
+		self.left = l
+		self.right = r
+	
+	
+	# check if node is leaf
+	def isLeaf(self):
+		return self.left == None and self.right == None
+			
+
+class HuffmanTable:
+	'''immutable lookup table for decoding the codes of a Huffman tree from a bit stream
+	read least significant bit first (codes packed starting with their first bit, as in deflate)'''
+
+	__slots__ = ('maxLen', 'entries')
+
+
+	def __init__(self, codes):
+		''' codes: list of (code, index) pairs, the code being a string of zeros and ones.
+			entries[bits] is (index, length) for the code that prefixes the next maxLen bits, or None '''
+
+		maxLen = max([len(s) for s, ind in codes], default=0)
+		entries = [None] * (1 << maxLen)
+
+		for s, ind in codes:
+			l = len(s)
+			# the first bit of the code is the least significant bit of the lookup index
+			rev = int(s[::-1], 2) if l > 0 else 0
+			for i in range(rev, 1 << maxLen, 1 << l):
+				entries[i] = (ind, l)
+
+		object.__setattr__(self, 'maxLen', maxLen)
+		object.__setattr__(self, 'entries', tuple(entries))
+
+
+	def __setattr__(self, name, value):
+		raise AttributeError('HuffmanTable is immutable')
+
+
+class HuffmanEncodeTable:
+	'''immutable lookup table for encoding symbols: codes[index] is the code of the symbol, bit-reversed so that it can be
+	written least significant bit first (as in deflate), and lengths[index] its length (0 if the symbol has no code)'''
+
+	__slots__ = ('codes', 'lengths')
+
+
+	def __init__(self, codes, size):
+		''' codes: list of (code, index) pairs, the code being a string of zeros and ones; size: size of the alphabet '''
+
+		revCodes = [0] * size
+		lengths = [0] * size
+		for s, ind in codes:
+			revCodes[ind] = int(s[::-1], 2) if s else 0
+			lengths[ind] = len(s)
+
+		object.__setattr__(self, 'codes', tuple(revCodes))
+		object.__setattr__(self, 'lengths', tuple(lengths))
+
+
+	def __setattr__(self, name, value):
+		raise AttributeError('HuffmanEncodeTable is immutable')
+
+
+	def encodedBits(self, freqs):
+		''' size in bits of the symbols counted in freqs '''
+		return sum(f * l for f, l in zip(freqs, self.lengths))
+
+
+
+def packageMerge(freqs, maxLen):
+	''' optimal code lengths for the symbol frequencies freqs with no code longer than maxLen (package-merge).
+		Symbols with frequency 0 get no code; a single symbol gets a code of length 1.
+
+		The leaves, sorted by weight, are merged level by level (deepest first) with the packages of pairs of items of the level
+		below: O(n) per level, O(n*maxLen) in all. Only whether each item is a package is kept, which is enough to walk back up:
+		the first 2n-2 items of the last level are taken, and taking the first k items of a level takes its leaves among them
+		(one more bit for each of those symbols) and the items of the packages among them from the level below '''
+
+	symbols = sorted((f, i) for i, f in enumerate(freqs) if f)
+	n = len(symbols)
+	lens = [0] * len(freqs)
+	if n == 0:
+		return lens
+	if n == 1:
+		lens[symbols[0][1]] = 1
+		return lens
+	if n > 1 << maxLen:
+		raise ValueError('%d symbols do not fit in codes of at most %d bits' % (n, maxLen))
+
+	weights = [f for f, i in symbols]
+	levels = []	# isPackage flags of the items of each level, deepest first
+	items = []	# weights of the items of the previous level
+	for level in range(maxLen):
+		packages = [items[k] + items[k + 1] for k in range(0, len(items) - 1, 2)]
+		merged = []
+		flags = []
+		a = b = 0
+		while a < n or b < len(packages):
+			if b == len(packages) or (a < n and weights[a] <= packages[b]):
+				merged.append(weights[a])
+				flags.append(False)
+				a += 1
+			else:
+				merged.append(packages[b])
+				flags.append(True)
+				b += 1
+		levels.append(flags)
+		items = merged
+
+	take = 2 * n - 2
+	for flags in reversed(levels):
+		numPackages = sum(flags[:take])
+		for k in range(take - numPackages):
+			lens[symbols[k][1]] += 1
+		take = 2 * numPackages
+
+	return lens
+
+
+
+def canonicalCodes(lens):
+	''' canonical Huffman codes (RFC 1951, 3.2.2) for an array of code lengths: list of (code, index) pairs, codes as strings '''
+
+	maxLen = max(lens, default=0)
+	blCount = [0] * (maxLen + 1)
+	for l in lens:
+		if l:
+			blCount[l] += 1
+
+	code = 0
+	nextCode = [0] * (maxLen + 1)
+	for bits in range(1, maxLen + 1):
+		code = (code + blCount[bits - 1]) << 1
+		nextCode[bits] = code
+
+	codes = []
+	for ind, l in enumerate(lens):
+		if l:
+			codes.append((format(nextCode[l], '0%db' % l), ind))
+			nextCode[l] += 1
+	return codes
+
+
+
+class HuffmanTree:
+	'''class for creating, managing and accessing Huffman trees'''
+	
+	root = curNode = None  
+		
+
+	def __init__(self, root=None, curNode=None):
+		if not root:
+			root = HFNode(-1, 0)
+			curNode = root
+		self.root = root
+		self.curNode = curNode
+		self.table = None  # decode table, built on first use by decodeTable
+		self.encTable = None  # encode table, built on first use by encodeTable
+	
+	
+	
+	@staticmethod
+	def fromLengths(lens):
+		''' builds the canonical Huffman tree for an array of code lengths (index: symbol of the alphabet) '''
+
+		tree = HuffmanTree()
+		for s, ind in canonicalCodes(lens):
+			tree.addNode(s, ind)
+		return tree
+	
+	
+	
+	@staticmethod
+	def fromFrequencies(freqs, maxLen=15):
+		''' builds an optimal canonical Huffman tree for the symbol frequencies freqs (index: symbol of the alphabet)
+			with codes of at most maxLen bits (15 for the deflate literal/length and distance codes, 7 for the code lengths code) '''
+
+		return HuffmanTree.fromLengths(packageMerge(freqs, maxLen))
+		
+	
+
+	def resetCurNode(self):
+		''' position curNode pointer on the root of the tree '''
+		self.curNode = self.root
+	
+	
+	
+	def addNode(self, s, ind, verbose=False):
+		''' Adds a new node to the tree. Gets the code as a string s of zeros and ones and the index of the alphabet.
+			returns: 
+				 0: success
+				-1: node already exists
+				-2: code is not longer prefix code'''
+	
+		self.table = None
+		self.encTable = None
+		tmp = self.root
+		lv = 0 
+		l = len(s)
+
+		found = False
+		pos = -3
+					
+		while lv < l and not found:
+			# trying to create son of leaf --> error, not prefix code
+			if tmp.index != -1:
+				pos = -2
+				found = True
+			else:
+				direction = s[lv]
+				
+				if direction == '0': # LEFT
+
+					if lv != l-1 and tmp.left != None:  # keep on going down
+						tmp = tmp.left
+
+					elif tmp.left != None: # already inserted
+						pos = -1
+						found = True
+					
+					
+					else: # create node in the left
+						if lv == l-1:  # leaf						
+							index = ind
+						else:
+							index = -1
+
+						hf = HFNode(index, lv+1)
+						tmp.left = hf
+						tmp = tmp.left
+				
+				
+				elif direction == '1': # RIGHT
+				
+					if lv != l -1 and tmp.right != None: # keep on going down
+						tmp = tmp.right
+
+					elif tmp.right != None: # already inserted
+						pos = -1
+						found = True
+					
+					else: # create node in the right
+						if lv == l-1:  # leaf
+							index = ind
+						else:
+							index = -1
+
+						hf = HFNode(index, lv+1)
+						tmp.right = hf
+						tmp = tmp.right
+							
+			lv += 1	
+				
+		if not found:
+			pos = tmp.index
+			
+		if verbose:
+			if pos == -1:
+				print("Code '" + s + "' already inserted!!!")
+			elif pos == -2:
+				print("Code '" + s + "' trying to extend leaf - no prefix code!!!")
+			else:
+				print("Code '" + s + "' successfully inserted!!!")
+		
+		return pos	
+		
+	
+	def findNode(self, s, cur=None, verbose=False):
+		''' finds node from cur node following a string of '0's and '1's for traversing left or right, respectfully.
+			returns:
+			-1 if not found
+			-2 if it is prefix of an existing code
+			indice of the alphabet if found '''
+		
+		if cur == None:
+			cur = self.root
+			
+		tmp = cur
+		lv = 0
+		l = len(s)
+		found = True
+		
+		
+		while lv < l and found:
+		
+			direction = s[lv]
+			
+			if direction == '0':
+				if tmp.left != None:
+					tmp = tmp.left
+				else:
+					found = False
+			
+			elif direction == '1':
+				if tmp.right != None:
+					tmp = tmp.right
+				else:
+					found = False
+			
+			
+			lv += 1
+		
+				
+		if not found:
+			pos = -1
+		elif tmp.index == -1:
+			pos = -2
+		else:
+			pos = tmp.index
+			
+		if verbose:
+			if pos == -1:
+				print("Code '" + s + "' not found!!!")
+			elif pos == -2:
+				print("Code '" + s + "': not found but prefix!!!")
+			else:
+				print("Code '" + s + "' found, alphabet position: " + str(pos) )
+						
+		return pos
+
+	
+
+	
+	def nextNode(self, dir):
+		''' updates curNode based on the direction dir to descend the tree '''
+		
+		if self.curNode.isLeaf():
+			return -1
+		
+		if dir == '0':
+			if self.curNode.left != None:
+				self.curNode = self.curNode.left
+				if self.curNode.isLeaf():
+					pos = self.curNode.index
+				else:
+					pos = -2
+			else:
+				pos = -1
+
+		elif dir == '1':
+			if self.curNode.right != None:
+				self.curNode = self.curNode.right
+				if self.curNode.isLeaf():
+					pos = self.curNode.index
+				else:
+					pos = -2
+			
+			else:
+				pos = -1								
+		
+		return pos
+
+
+
+	def codes(self):
+		''' returns the list of (code, index) pairs of the leaves of the tree, codes as strings of '0's and '1's '''
+
+		codes = []
+		stack = [(self.root, '')]
+
+		while stack:
+			node, s = stack.pop()
+			if node.isLeaf():
+				if node.index != -1:
+					codes.append((s, node.index))
+			else:
+				if node.right != None:
+					stack.append((node.right, s + '1'))
+				if node.left != None:
+					stack.append((node.left, s + '0'))
+
+		return codes
+
+
+
+	def decodeTable(self):
+		''' returns an immutable HuffmanTable for the tree (built once and kept until a node is added). Unlike nextNode, decoding with the table
+			does not use the curNode cursor, so a table can be shared by concurrent decoders '''
+
+		if self.table is None:
+			self.table = HuffmanTable(self.codes())
+		return self.table
+
+
+
+	def encodeTable(self, size=None):
+		''' returns an immutable HuffmanEncodeTable for the tree, for an alphabet of size symbols
+			(default: up to the largest index in the tree) '''
+
+		if self.encTable is None or (size is not None and len(self.encTable.codes) != size):
+			codes = self.codes()
+			if size is None:
+				size = max([ind for s, ind in codes], default=-1) + 1
+			self.encTable = HuffmanEncodeTable(codes, size)
+		return self.encTable
@@ -0,0 +1,145 @@
+# Teoria da Informacao, LEI, 2022
+# Recompression of .gz files (gz -> gz) in one pass: the chunks leaving the decoder go straight
+# into the encoder, so the decompressed data never reaches the disk nor is held whole in memory
+
+import os
+import sys
+import zlib
+import argparse
+from gzip import GZIP
+import encoder
+import bgzf
+
+
+FORMATS = ('gzip', 'members', 'bgzf')
+MEMBER_SIZE = 1 << 20
+
+
+class MemberWriter:
+    ''' writes data to the binary file f as a series of gzip members of memberSize uncompressed
+    bytes each (gzip -d reads them as one file; they can also be decoded in parallel) '''
+
+    def __init__(self, f, level=6, fName='', mTime=0, memberSize=MEMBER_SIZE, strategy=encoder.DEFAULT_STRATEGY):
+        self.f = f
+        self.level = level
+        self.fName = fName
+        self.mTime = mTime
+        self.memberSize = memberSize
+        self.strategy = strategy
+        self.member = None
+        self.left = 0      # bytes still to go in the current member
+
+    def write(self, data):
+        pos = 0
+        while pos < len(data):
+            if self.member is None:
+                self.member = encoder.GzipWriter(self.f, self.level, self.fName, self.mTime, self.strategy)
+                self.left = self.memberSize
+            take = min(self.left, len(data) - pos)
+            self.member.write(data[pos : pos + take])
+            pos += take
+            self.left -= take
+            if self.left == 0:
+                self.member.close()
+                self.member = None
+
+    def close(self):
+        if self.member is not None:
+            self.member.close()
+            self.member = None
+
+
+def openWriter(outName, outFormat, level, fName, mTime, memberSize, strategy, rsyncable):
+    ''' returns a writer for one of FORMATS, writing to its file writer.f '''
+
+    if outFormat == 'bgzf':
+        # BGZF headers have a fixed layout: no FNAME, MTIME 0
+        return bgzf.BGZFWriter(outName, level)
+    f = open(outName, 'wb')
+    try:
+        if outFormat == 'members':
+            return MemberWriter(f, level, fName, mTime, memberSize, strategy)
+        return encoder.GzipWriter(f, level, fName, mTime, strategy, rsyncable)
+    except BaseException:
+        f.close()
+        os.remove(outName)
+        raise
+
+
+def recompress(inName, outName, level=6, outFormat='gzip', memberSize=MEMBER_SIZE,
+               strategy=encoder.DEFAULT_STRATEGY, rsyncable=False):
+    ''' decodes every member of inName and compresses the data into outName: a single gzip member,
+    members of memberSize bytes or BGZF. FNAME and MTIME are copied from the first member of inName.
+    The CRC32 and ISIZE of each input member are checked as its trailer is reached; on error,
+    ValueError is raised and outName is removed. Returns (decompressed size, compressed size) '''
+
+    # before outName is created: the BGZF writer only uses the level on its first block
+    if not 0 <= level <= 9:
+        raise ValueError('compression level must be between 0 and 9')
+
+    gz = GZIP(inName)
+    try:
+        if gz.getHeader() != 0:
+            raise ValueError('Formato invalido!')
+        writer = openWriter(outName, outFormat, level, gz.gzh.fName, gz.gzh.mTime, memberSize, strategy, rsyncable)
+
+        # [member CRC, member size, total size]
+        state = [0, 0, 0]
+        def write(data):
+            state[0] = zlib.crc32(data, state[0])
+            state[1] += len(data)
+            writer.write(data)
+
+        try:
+            while True:
+                state[0] = state[1] = 0
+                gz.inflate(write)
+                state[2] += state[1]
+
+                gz.alignToByte()
+                trailer = gz.readBytes(8)
+                if int.from_bytes(trailer[0:4], 'little') != state[0]:
+                    raise ValueError('CRC32 mismatch at offset %d' % (gz.bytePosition() - 8))
+                if int.from_bytes(trailer[4:8], 'little') != state[1] & 0xffffffff:
+                    raise ValueError('ISIZE mismatch at offset %d' % (gz.bytePosition() - 4))
+
+                # concatenated members (and BGZF blocks): continue while another gzip header follows
+                if not gz.nextHeader():
+                    break
+
+            writer.close()
+        except BaseException:
+            writer.f.close()
+            os.remove(outName)
+            raise
+        writer.f.close()
+
+    finally:
+        gz.f.close()
+
+    return state[2], os.path.getsize(outName)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='recompress a .gz file (another level, multi-member or BGZF) without temporary files')
+    parser.add_argument('file')
+    parser.add_argument('-o', '--output', default=None, help='output file (default: FILE with .gz replaced by .recompressed.gz)')
+    parser.add_argument('-l', '--level', type=int, default=6)
+    parser.add_argument('-f', '--format', choices=FORMATS, default='gzip',
+                        help='gzip: one member; members: one member per --member-size bytes; bgzf: blocked gzip')
+    parser.add_argument('--member-size', type=int, default=MEMBER_SIZE, help='uncompressed bytes per member (-f members)')
+    parser.add_argument('--strategy', choices=encoder.STRATEGIES, default=encoder.DEFAULT_STRATEGY)
+    parser.add_argument('--rsyncable', action='store_true', help='cut the stream at content defined points (-f gzip)')
+    args = parser.parse_args()
+
+    outName = args.output or (args.file[:-3] if args.file.endswith('.gz') else args.file) + '.recompressed.gz'
+    try:
+        size, outSize = recompress(args.file, outName, args.level, args.format, args.member_size, args.strategy, args.rsyncable)
+    except (OSError, ValueError, EOFError, IndexError) as e:
+        print("Error: %s: %s" % (args.file, e), file=sys.stderr)
+        sys.exit(1)
+
+    inSize = os.path.getsize(args.file)
+    print("%s: %d -> %d bytes (%d decompressed, %.2f%% -> %.2f%%)"
+          % (outName, inSize, outSize, size, 100 * inSize / size if size else 0, 100 * outSize / size if size else 0))
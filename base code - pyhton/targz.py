@@ -0,0 +1,239 @@
+# Teoria da Informacao, LEI, 2022
+# Streaming reader of tar archives inside gzip files (.tar.gz): the tar headers are parsed
+# from the decompressed chunks as they leave the decoder, nothing is written to disk
+# unless a member is extracted
+
+import os
+import sys
+import argparse
+from gzip import GZIP, StopDecoding
+
+
+BLOCK_SIZE = 512
+
+
+class TarMember:
+    ''' tar member header fields '''
+
+    def __init__(self):
+        self.name = ''
+        self.size = 0
+        self.mode = 0
+        self.mTime = 0
+        self.type = '0'       # '0': regular file, '5': directory, '2': symbolic link, ...
+        self.linkName = ''
+        self.offset = 0       # offset of the member data in the tar stream
+
+    def isFile(self):
+        return self.type in ('0', '\0', '7')
+
+    def __str__(self):
+        return "%12d  %s" % (self.size, self.name.rstrip('/') + '/' if self.type == '5' else self.name)
+
+
+def parseNumber(field):
+    ''' numeric header field: octal text, or base-256 if the first bit is set (GNU, large sizes) '''
+    if field[0] & 0x80:
+        value = field[0] & 0x7f
+        for byte in field[1:]:
+            value = (value << 8) | byte
+        return value
+    field = field.split(b'\0', 1)[0].strip()
+    return int(field, 8) if field else 0
+
+
+def parseString(field):
+    return field.split(b'\0', 1)[0].decode('utf-8', 'surrogateescape')
+
+
+class TarStream:
+    ''' output sink parsing a tar archive (ustar, with GNU long names and pax path records) from chunks
+
+    onMember(member) is called for every member and returns a function that will receive the member
+    data in chunks, or None to skip it (the data is then only decoded, never copied).
+    onMemberEnd(member) is called when the data of a member that was not skipped is complete '''
+
+    def __init__(self, onMember, onMemberEnd=None):
+        self.onMember = onMember
+        self.onMemberEnd = onMemberEnd
+        self.header = bytearray()
+        self.member = None
+        self.sink = None
+        self.dataLeft = 0        # data bytes of the current member still to come
+        self.padLeft = 0         # padding bytes up to the next 512-byte boundary
+        self.offset = 0          # offset in the tar stream
+        self.zeroBlocks = 0
+        self.finished = False
+        self.extension = None    # data of a GNU long name or pax header, for the next member
+        self.pathOverride = None
+
+    def write(self, data):
+        pos = 0
+        n = len(data)
+        while pos < n and not self.finished:
+            if self.dataLeft:
+                take = min(self.dataLeft, n - pos)
+                if self.sink is not None:
+                    self.sink(data[pos : pos + take])
+                pos += take
+                self.offset += take
+                self.dataLeft -= take
+                if self.dataLeft == 0:
+                    self.endMember()
+
+            elif self.padLeft:
+                take = min(self.padLeft, n - pos)
+                pos += take
+                self.offset += take
+                self.padLeft -= take
+
+            else:
+                take = min(BLOCK_SIZE - len(self.header), n - pos)
+                self.header += data[pos : pos + take]
+                pos += take
+                self.offset += take
+                if len(self.header) == BLOCK_SIZE:
+                    self.parseHeader(bytes(self.header))
+                    self.header = bytearray()
+
+    def parseHeader(self, block):
+        ''' parses a 512-byte header block and starts the member '''
+
+        # two zero blocks mark the end of the archive
+        if block.count(0) == BLOCK_SIZE:
+            self.zeroBlocks += 1
+            if self.zeroBlocks == 2:
+                self.finished = True
+            return
+        self.zeroBlocks = 0
+
+        # checksum: sum of the header bytes, with the checksum field itself taken as spaces
+        if parseNumber(block[148:156]) != sum(block[:148]) + 8 * 32 + sum(block[156:]):
+            raise ValueError('invalid tar header at offset %d' % (self.offset - BLOCK_SIZE))
+
+        member = TarMember()
+        member.name = parseString(block[0:100])
+        member.mode = parseNumber(block[100:108])
+        member.size = parseNumber(block[124:136])
+        member.mTime = parseNumber(block[136:148])
+        member.type = chr(block[156])
+        member.linkName = parseString(block[157:257])
+        if block[257:262] == b'ustar' and block[345]:
+            member.name = parseString(block[345:500]) + '/' + member.name
+        if self.pathOverride is not None:
+            member.name = self.pathOverride
+            self.pathOverride = None
+        member.offset = self.offset
+
+        self.member = member
+        self.dataLeft = member.size
+        self.padLeft = -member.size % BLOCK_SIZE
+
+        if member.type in ('L', 'x'):
+            # GNU long name / pax extended header: collected, applies to the next member
+            self.extension = bytearray()
+            self.sink = self.extension.extend
+        else:
+            self.sink = self.onMember(member)
+
+        if self.dataLeft == 0:
+            self.endMember()
+
+    def endMember(self):
+        member = self.member
+        if member.type == 'L':
+            self.pathOverride = parseString(bytes(self.extension))
+        elif member.type == 'x':
+            # records "LENGTH key=value\n"
+            for record in bytes(self.extension).split(b'\n'):
+                key, sep, value = record.partition(b' ')[2].partition(b'=')
+                if key == b'path':
+                    self.pathOverride = value.decode('utf-8', 'surrogateescape')
+        elif self.sink is not None and self.onMemberEnd is not None:
+            self.onMemberEnd(member)
+        self.sink = None
+
+
+def readTar(fileName, onMember, onMemberEnd=None):
+    ''' decodes a .tar.gz file through a TarStream (decoding stops at the end of the archive
+    or when a callback raises StopDecoding) '''
+
+    stream = TarStream(onMember, onMemberEnd)
+
+    def feed(data):
+        stream.write(data)
+        if stream.finished:
+            raise StopDecoding()
+
+    gz = GZIP(fileName)
+    try:
+        if gz.getHeader() != 0:
+            raise ValueError('Formato invalido!')
+        gz.inflateMembers(feed)
+    except StopDecoding:
+        pass
+    finally:
+        gz.f.close()
+
+    return stream
+
+
+def listMembers(fileName):
+    ''' returns the TarMember list of a .tar.gz file (member data is decoded but never copied) '''
+    members = []
+    def add(member):
+        members.append(member)
+        return None
+    readTar(fileName, add)
+    return members
+
+
+def extractMember(fileName, name, f):
+    ''' writes the data of member name to the binary file f and stops decoding as soon as it is complete.
+    Returns the TarMember, or None if there is no such member '''
+
+    found = []
+    def select(member):
+        if member.name == name and member.isFile():
+            found.append(member)
+            return f.write
+        return None
+
+    def done(member):
+        raise StopDecoding()
+
+    readTar(fileName, select, done)
+    return found[0] if found else None
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='list or extract members of a .tar.gz file without decompressing it to disk')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cmd = commands.add_parser('list', help='list the members')
+    cmd.add_argument('file')
+
+    cmd = commands.add_parser('extract', help='extract one member')
+    cmd.add_argument('file')
+    cmd.add_argument('member')
+    cmd.add_argument('-o', '--output', default=None, help='output file (default: the member base name; - for stdout)')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for member in listMembers(args.file):
+            print(member)
+
+    elif args.command == 'extract':
+        if args.output == '-':
+            member = extractMember(args.file, args.member, sys.stdout.buffer)
+        else:
+            outName = args.output or args.member.rstrip('/').split('/')[-1]
+            with open(outName, 'wb') as f:
+                member = extractMember(args.file, args.member, f)
+        if member is None:
+            if args.output != '-':
+                os.remove(outName)
+            print("Error: %s: no member named %s" % (args.file, args.member), file=sys.stderr)
+            sys.exit(1)
@@ -0,0 +1,141 @@
+import os
+import zlib
+import random
+import tempfile
+import bgzf
+
+
+rng = random.Random(2022)
+
+words = b'the of and a to in is you that it was for on are as with they at be this have from or one had by word but not what all'.split()
+records = [b' '.join(rng.choice(words) for i in range(rng.randint(1, 100))) + b'\n' for k in range(2000)]
+data = b''.join(records)
+
+tmp = tempfile.mkdtemp()
+inName = os.path.join(tmp, 'data.txt')
+outName = os.path.join(tmp, 'data.txt.bgz')
+
+
+# ------------------- writer: the virtual offset of every record
+
+writer = bgzf.BGZFWriter(outName, 1)
+offsets = []
+for record in records:
+	offsets.append(writer.tell())
+	writer.write(record)
+end = writer.tell()
+writer.close()
+
+assert len(data) > 3 * bgzf.BLOCK_DATA_SIZE
+with open(outName, 'rb') as f:
+	blob = f.read()
+assert blob.endswith(bgzf.EOF_BLOCK)
+
+# every block is a gzip member that zlib decodes on its own
+output = b''
+rest = blob
+while rest:
+	d = zlib.decompressobj(31)
+	output += d.decompress(rest)
+	assert d.eof
+	rest = d.unused_data
+assert output == data
+print("BGZF writer: OK")
+
+
+# ------------------- reader: seeks to virtual offsets
+
+reader = bgzf.BGZFReader(outName)
+assert reader.size == len(data)
+
+starts = [0]
+for record in records:
+	starts.append(starts[-1] + len(record))
+
+# the reader and the writer agree on the virtual offset of every position
+for k in range(len(records)):
+	assert reader.virtualOffset(starts[k]) == offsets[k], k
+
+# (in order, so that each block is decoded once; then back to the start and forward to the end)
+for k in sorted(rng.sample(range(len(records)), 300)) + [0, len(records) - 1]:
+	reader.seek(offsets[k])
+	assert reader.tell() == offsets[k], k
+	assert reader.read(len(records[k])) == records[k], k
+
+# reads that span several blocks, and to the end
+reader.seek(offsets[10])
+assert reader.read(2 * bgzf.BLOCK_DATA_SIZE) == data[starts[10] : starts[10] + 2 * bgzf.BLOCK_DATA_SIZE]
+reader.seek(offsets[len(records) // 2])
+assert reader.read() == data[starts[len(records) // 2]:]
+assert reader.read(10) == b''
+
+# the offset after the last byte: the EOF block
+reader.seek(end)
+assert reader.read() == b''
+assert reader.tell() == bgzf.makeVirtualOffset(len(blob) - len(bgzf.EOF_BLOCK), 0)
+
+try:
+	reader.seek(bgzf.makeVirtualOffset(1, 0))
+	assert False, 'no block at offset 1'
+except ValueError:
+	pass
+reader.close()
+print("BGZF seeks: OK")
+
+
+# ------------------- files
+
+with open(inName, 'wb') as f:
+	f.write(data)
+bgzf.compressFile(inName, outName, 1)
+os.remove(inName)
+assert bgzf.decompressParallel(outName, inName, workers=2) == len(data) // bgzf.BLOCK_DATA_SIZE + 1
+with open(inName, 'rb') as f:
+	assert f.read() == data
+
+
+# fewer blocks in flight than there are blocks
+bgzf.BLOCKS_PER_WORKER = 1
+assert bgzf.decompressParallel(outName, inName, workers=2) == len(data) // bgzf.BLOCK_DATA_SIZE + 1
+with open(inName, 'rb') as f:
+	assert f.read() == data
+print("BGZF files: OK")
+
+
+# ------------------- the trailer of every block is checked
+
+reader = bgzf.BGZFReader(outName)
+second, secondStart = reader.index[1]
+third = reader.index[2][0]
+reader.close()
+
+for pos, error in ((third - 8, 'CRC32'), (third - 1, 'ISIZE')):
+	with open(outName, 'rb') as f:
+		bad = bytearray(f.read())
+	bad[pos] ^= 1
+	with open(outName, 'wb') as f:
+		f.write(bad)
+
+	reader = bgzf.BGZFReader(outName)
+	assert reader.read(secondStart) == data[:secondStart]
+	try:
+		reader.read(10)
+		assert False, error + ' mismatch not found'
+	except ValueError as e:
+		assert error in str(e) and str(second) in str(e), e
+	reader.close()
+
+	try:
+		bgzf.decompressParallel(outName, inName, workers=2)
+		assert False, error + ' mismatch not found'
+	except ValueError as e:
+		assert error in str(e), e
+
+	bad[pos] ^= 1
+	with open(outName, 'wb') as f:
+		f.write(bad)
+print("BGZF trailers: OK")
+
+os.remove(inName)
+os.remove(outName)
+os.rmdir(tmp)
@@ -0,0 +1,147 @@
+import io
+import zlib
+import random
+import encoder
+import framing
+from gzip import GZIP
+
+
+rng = random.Random(2022)
+
+# text: the FAQ followed by random words
+words = b'the of and a to in is you that it was for on are as with they at be this have from or one had by word but not what all were we when your can said there use each which she do how their if will up other about out many then them these so some her would make like into time has look two more write go see number no way could people my than first water been call who its now find long down day did get come made may part'.split()
+with open('FAQ.txt', 'rb') as f:
+	text = f.read() + b' '.join(rng.choice(words) for i in range(40000))
+with open('sample_image.jpeg', 'rb') as f:
+	image = f.read(1 << 16)
+
+samples = {
+	'empty': b'',
+	'one byte': b'a',
+	'short': b'abcabcabcabd',
+	'text': text[:50000],
+	'image': image,
+	'random': bytes(rng.getrandbits(8) for i in range(20000)),
+	'runs': b''.join(bytes((rng.randint(0, 3),)) * rng.randint(1, 600) for i in range(300)),
+	'skewed': bytes(rng.choice(b'aaaaaaaabbbbccd') for i in range(10000)),
+	'long match': text[:3000] * 10,
+}
+
+
+# raw deflate decoded by zlib and by the decoder in gzip.py
+def check_raw(name, data, cdata, dictionary=b''):
+
+	d = zlib.decompressobj(-15, zdict=dictionary) if dictionary else zlib.decompressobj(-15)
+	assert d.decompress(cdata) == data and d.eof and not d.unused_data, name
+	assert framing.rawDecompress(cdata, dictionary) == data, name
+
+
+# gzip members decoded by zlib and checked (CRC32, ISIZE) by GZIP.test
+def check_gzip(name, data, blob):
+
+	output = b''
+	rest = blob
+	while rest:
+		d = zlib.decompressobj(31)
+		output += d.decompress(rest)
+		assert d.eof, name
+		rest = d.unused_data
+	assert output == data, name
+	output = []
+	result = GZIP(io.BytesIO(blob)).test(output.append)
+	assert result.ok, (name, str(result))
+	assert b''.join(output) == data, name
+
+
+# ------------------- levels (default strategy)
+
+for name, data in samples.items():
+	for level in range(10):
+		check_raw('%s, level %d' % (name, level), data, encoder.deflate(data, level))
+print("levels 0-9: OK")
+
+
+# ------------------- incompressible data
+
+# stored: never more than the stored blocks overhead
+random_data = samples['random']
+assert len(encoder.deflate(random_data, 6)) <= len(random_data) + 5 * (len(random_data) // encoder.MAX_STORED + 1)
+print("incompressible data: OK")
+
+
+# ------------------- strategies
+
+for name, data in samples.items():
+	for strategy in encoder.STRATEGIES:
+		if strategy == encoder.ULTRA:
+			# the optimal parse is slow: a few KiB of each sample
+			cdata = encoder.deflate(data[:4000], 9, strategy=strategy, iterations=2)
+			check_raw('%s, %s' % (name, strategy), data[:4000], cdata)
+		else:
+			check_raw('%s, %s' % (name, strategy), data, encoder.deflate(data, 6, strategy=strategy))
+
+# the optimal parse is never worse than the greedy one on text
+assert len(encoder.deflate(text[:20000], 9, strategy=encoder.ULTRA, iterations=2)) <= len(encoder.deflate(text[:20000], 9))
+print("strategies: OK")
+
+
+# ------------------- preset dictionary
+
+dictionary = text[100000:130000]
+for name in ('text', 'short', 'empty'):
+	data = samples[name]
+	check_raw('%s, dictionary' % name, data, encoder.deflate(data, 6, dictionary=dictionary), dictionary)
+assert len(encoder.deflate(text[110000:120000], 6, dictionary=dictionary)) < 200
+
+# zlib streams with a dictionary, both ways
+blob = framing.zlibCompress(text[:20000], 6, dictionary)
+d = zlib.decompressobj(zdict=dictionary)
+assert d.decompress(blob) == text[:20000]
+c = zlib.compressobj(6, zlib.DEFLATED, 15, zdict=dictionary)
+assert framing.zlibDecompress(c.compress(text[:20000]) + c.flush(), dictionary) == text[:20000]
+print("preset dictionary: OK")
+
+
+# ------------------- rsyncable
+
+data = text
+cdata = encoder.deflate(data, 6, rsyncable=True)
+check_raw('rsyncable', data, cdata)
+check_gzip('rsyncable gzip', data, encoder.gzipCompress(data, 6, rsyncable=True))
+
+# a change at the start only changes the output up to a few cut points
+changed = encoder.deflate(b'X' + data[1:], 6, rsyncable=True)
+check_raw('rsyncable, changed', b'X' + data[1:], changed)
+suffix = 0
+while suffix < min(len(cdata), len(changed)) and cdata[-1 - suffix] == changed[-1 - suffix]:
+	suffix += 1
+assert suffix > len(cdata) // 2, (suffix, len(cdata))
+print("rsyncable: OK")
+
+
+# ------------------- gzip
+
+for name, data in samples.items():
+	check_gzip(name, data, encoder.gzipCompress(data, 6, fName='sample', mTime=1))
+
+# GzipWriter: several members in one file
+out = io.BytesIO()
+for part in (text[:3000], b'', text[3000:70000]):
+	with encoder.GzipWriter(out, 6, 'sample') as writer:
+		writer.write(part[:1000])
+		writer.write(part[1000:])
+check_gzip('members', text[:70000], out.getvalue())
+print("gzip: OK")
+
+
+# ------------------- zlib -> decoder
+
+for name, data in samples.items():
+	for level in (0, 1, 6, 9):
+		c = zlib.compressobj(level, zlib.DEFLATED, -15)
+		assert framing.rawDecompress(c.compress(data) + c.flush()) == data, (name, level)
+	c = zlib.compressobj(6, zlib.DEFLATED, -15, strategy=zlib.Z_HUFFMAN_ONLY)
+	assert framing.rawDecompress(c.compress(data) + c.flush()) == data, name
+	c = zlib.compressobj(6, zlib.DEFLATED, -15, strategy=zlib.Z_FIXED)
+	assert framing.rawDecompress(c.compress(data) + c.flush()) == data, name
+print("zlib streams decoded: OK")
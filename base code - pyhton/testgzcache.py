@@ -0,0 +1,139 @@
+import os
+import zlib
+import random
+import tempfile
+import gzcache
+from gzcache import DecompressionCache
+
+
+rng = random.Random(2022)
+
+tmp = tempfile.mkdtemp()
+cacheDir = os.path.join(tmp, 'cache')
+
+
+def gz(data):
+	c = zlib.compressobj(6, zlib.DEFLATED, 31)
+	return c.compress(data) + c.flush()
+
+
+# writes a .gz file of data and returns its name
+def gz_file(name, data):
+	fileName = os.path.join(tmp, name + '.gz')
+	with open(fileName, 'wb') as f:
+		f.write(gz(data))
+	return fileName
+
+
+def cached():
+	return sorted(os.listdir(cacheDir))
+
+
+contents = [bytes(rng.choice(b'abcdefgh \n') for i in range(10000)) for k in range(4)]
+names = [gz_file('file%d' % k, data) for k, data in enumerate(contents)]
+
+
+# ------------------- hits and misses
+
+cache = DecompressionCache(cacheDir, maxBytes=1 << 20)
+assert cache.lookup(names[0]) is None
+path = cache.get(names[0])
+assert cache.get(names[0]) == path and cache.read(names[0]) == contents[0]
+assert cache.stats()['misses'] == 2 and cache.stats()['hits'] == 2
+
+# another object on the same directory finds the entry
+other = DecompressionCache(cacheDir)
+assert other.lookup(names[0]) == path and other.hits == 1
+
+# outputs copied or linked; a copy can be written without touching the entry
+outName = os.path.join(tmp, 'out')
+cache.decompress(names[0], outName)
+with open(outName, 'r+b') as f:
+	f.write(b'changed')
+assert cache.read(names[0]) == contents[0]
+cache.decompress(names[0], outName, link=True)
+with open(outName, 'rb') as f:
+	assert f.read() == contents[0]
+os.remove(outName)
+
+# the key depends on the compressed file, not its name
+copy = gz_file('copy', contents[0])
+assert cache.lookup(copy) == path
+print("hits: OK")
+
+
+# ------------------- LRU eviction
+
+cache.clear()
+cache = DecompressionCache(cacheDir, maxBytes=3 * 10000)
+paths = [cache.get(name) for name in names[:3]]
+# last uses 0, 2, 1 (least recent first)
+for k, age in ((0, 30), (1, 10), (2, 20)):
+	os.utime(paths[k], (1e9 - age, 1e9 - age))
+
+# over the budget: the least recently used entry goes
+paths.append(cache.get(names[3]))
+assert cache.evictions == 1 and not os.path.exists(paths[0])
+assert all(os.path.exists(path) for path in paths[1:])
+
+# a hit makes an entry the most recently used
+assert cache.lookup(names[2]) == paths[2]
+cache.get(names[0])
+assert cache.evictions == 2 and not os.path.exists(paths[1]) and os.path.exists(paths[2])
+assert cache.stats()['bytes'] <= cache.maxBytes
+
+# an entry larger than the budget is kept, alone
+small = DecompressionCache(cacheDir, maxBytes=100)
+path = small.get(names[1])
+assert cached() == [os.path.basename(path)]
+print("LRU eviction: OK")
+
+
+# ------------------- corrupt files are never cached
+
+cache.clear()
+bad = bytearray(gz(contents[0]))
+bad[-8] ^= 1
+badName = os.path.join(tmp, 'bad.gz')
+with open(badName, 'wb') as f:
+	f.write(bad)
+try:
+	cache.get(badName)
+	assert False, 'CRC32 mismatch not found'
+except ValueError as e:
+	assert 'CRC32' in str(e)
+assert cached() == []
+
+with open(badName, 'wb') as f:
+	f.write(b'not a gzip file')
+try:
+	cache.get(badName)
+	assert False, 'invalid header not found'
+except ValueError:
+	pass
+assert cached() == []
+
+# an input that cannot be opened: the temporary file is removed and closed
+def failing(fileName):
+	raise OSError('cannot open ' + fileName)
+
+fds = os.listdir('/proc/self/fd') if os.path.isdir('/proc/self/fd') else None
+GZIP = gzcache.GZIP
+gzcache.GZIP = failing
+try:
+	cache.get(names[0])
+	assert False, 'no error'
+except OSError:
+	pass
+finally:
+	gzcache.GZIP = GZIP
+assert cached() == []
+if fds is not None:
+	assert len(os.listdir('/proc/self/fd')) == len(fds)
+print("corrupt files: OK")
+
+for name in os.listdir(tmp):
+	if name != 'cache':
+		os.remove(os.path.join(tmp, name))
+os.rmdir(cacheDir)
+os.rmdir(tmp)
@@ -0,0 +1,72 @@
+import random
+from huffcodec import huffmanEncode, huffmanDecode, MAGIC
+
+
+rng = random.Random(2022)
+
+
+def roundtrip(data, chunkSize=1 << 20, workers=1):
+	blob = huffmanEncode(data, chunkSize, workers)
+	assert huffmanDecode(blob, workers) == data, (len(data), chunkSize)
+	return blob
+
+
+# ------------------- edge cases
+
+# empty input: just the header, no chunks
+assert roundtrip(b'') == MAGIC + bytes(8) + (1 << 20).to_bytes(4, 'little')
+
+# a single symbol, once and repeated: its code has 1 bit
+roundtrip(b'a')
+blob = roundtrip(b'x' * 10000)
+assert len(blob) < 14 + 4 + 100 + 10000 // 8 + 1
+for byte in (0, 255):
+	roundtrip(bytes([byte]) * 100)
+
+# two symbols, and every byte value
+roundtrip(b'ab' * 1000 + b'b')
+roundtrip(bytes(range(256)))
+roundtrip(bytes(range(256)) * 50)
+print("edge cases: OK")
+
+
+# ------------------- chunks
+
+words = b'the of and a to in is you that it was for on are as with they at be this have from or one had by word but not what all'.split()
+text = b' '.join(rng.choice(words) for i in range(20000))
+binary = bytes(rng.getrandbits(8) for i in range(30000))
+
+blob = roundtrip(text)
+assert len(blob) < len(text) * 5 // 8
+assert len(roundtrip(binary)) < len(binary) + 200
+
+# chunk sizes that do and do not divide the data, down to one byte per chunk
+for chunkSize in (1, 7, 1000, len(text), len(text) - 1):
+	roundtrip(text[:5000] if chunkSize < 10 else text, chunkSize)
+
+# skewed frequencies: the longest codes are limited to 15 bits
+fib = [1, 1]
+while len(fib) < 30:
+	fib.append(fib[-1] + fib[-2])
+skewed = bytearray()
+for byte, count in enumerate(fib):
+	skewed += bytes([byte]) * min(count, 50000)
+rng.shuffle(skewed)
+roundtrip(bytes(skewed), chunkSize=len(skewed))
+
+# parallel encoding and decoding give the same stream
+assert huffmanEncode(text, 4096, workers=2) == huffmanEncode(text, 4096, workers=1)
+assert huffmanDecode(huffmanEncode(text, 4096, workers=2), workers=2) == text
+print("chunks: OK")
+
+
+# ------------------- invalid streams
+
+blob = huffmanEncode(text, 4096, workers=1)
+for bad in (b'', b'XX' + blob[2:], blob[:13], blob[:len(blob) // 2]):
+	try:
+		huffmanDecode(bad, workers=1)
+		assert False, 'invalid stream accepted'
+	except ValueError:
+		pass
+print("invalid streams: OK")
@@ -1,84 +1,194 @@
-from huffmantree import HuffmanTree
-
-
-hft = HuffmanTree()
-
-verbose = True
-
-# insert new code
-code = "000"		
-erro = hft.addNode(code, 0, verbose)
-
-# insert code already present
-code = "000"
-erro = hft.addNode(code, 1, verbose)
-
-# try add child to leaf
-code = "00001"
-erro = hft.addNode(code, 1, verbose)
-
-
-# insert new code
-code = "11100"
-erro = hft.addNode(code, 3, verbose)
-
-# insert code already present
-code = "11100"
-erro = hft.addNode(code, 3, verbose)
-
-# try add child to leaf
-code = "111001"
-erro = hft.addNode(code, 3, verbose)
-
-
-# ------------------- Search
-
-code = "000"
-pos = hft.findNode(code, None, verbose)
-
-code = "11100"
-pos = hft.findNode(code, None, verbose)
-
-code = "111"
-pos = hft.findNode(code, None, verbose)
-
-
-# search code bit by bit
-def search_bit_by_bit(buffer, verbose=False):
-
-	lv = 0
-	l = len(buffer)
-	terminate = False
-	code = ""
-
-
-	while not terminate and lv < l:
-		
-		nextBit = buffer[lv]
-		code = code + nextBit
-		
-		pos = hft.nextNode(nextBit)
-					
-		if pos != -2:
-			terminate = True
-		else:
-			lv = lv + 1
-
-	if verbose:
-		if pos == -1:
-			print("Code '" + buffer + "' not found!!!")
-		elif pos == -2:
-			print("Code '" + buffer + "': not found but prefix!!!")
-		else:
-			print("Code '" + buffer + "' found, alphabet position: " + str(pos) )
-
-	return pos	
-
-
-
-code = "111000100"
-pos = search_bit_by_bit(code, True)
-
-
-code = "1110"
-pos = search_bit_by_bit(code, True)
+import heapq
+import random
+import itertools
+from fractions import Fraction
+from huffmantree import HuffmanTree, packageMerge, canonicalCodes, HuffmanEncodeTable
+
+
+hft = HuffmanTree()
+
+verbose = True
+
+# insert new code
+code = "000"		
+erro = hft.addNode(code, 0, verbose)
+
+# insert code already present
+code = "000"
+erro = hft.addNode(code, 1, verbose)
+
+# try add child to leaf
+code = "00001"
+erro = hft.addNode(code, 1, verbose)
+
+
+# insert new code
+code = "11100"
+erro = hft.addNode(code, 3, verbose)
+
+# insert code already present
+code = "11100"
+erro = hft.addNode(code, 3, verbose)
+
+# try add child to leaf
+code = "111001"
+erro = hft.addNode(code, 3, verbose)
+
+
+# ------------------- Search
+
+code = "000"
+pos = hft.findNode(code, None, verbose)
+
+code = "11100"
+pos = hft.findNode(code, None, verbose)
+
+code = "111"
+pos = hft.findNode(code, None, verbose)
+
+
+# search code bit by bit
+def search_bit_by_bit(buffer, verbose=False):
+
+	lv = 0
+	l = len(buffer)
+	terminate = False
+	code = ""
+
+
+	while not terminate and lv < l:
+		
+		nextBit = buffer[lv]
+		code = code + nextBit
+		
+		pos = hft.nextNode(nextBit)
+					
+		if pos != -2:
+			terminate = True
+		else:
+			lv = lv + 1
+
+	if verbose:
+		if pos == -1:
+			print("Code '" + buffer + "' not found!!!")
+		elif pos == -2:
+			print("Code '" + buffer + "': not found but prefix!!!")
+		else:
+			print("Code '" + buffer + "' found, alphabet position: " + str(pos) )
+
+	return pos	
+
+
+
+code = "111000100"
+pos = search_bit_by_bit(code, True)
+
+
+code = "1110"
+pos = search_bit_by_bit(code, True)
+
+
+
+# ------------------- packageMerge
+
+# cost of an unrestricted Huffman code (sum of the weights of the merged nodes)
+def huffman_cost(freqs):
+
+	heap = [f for f in freqs if f]
+	if len(heap) == 1:
+		return heap[0]
+	heapq.heapify(heap)
+	cost = 0
+	while len(heap) > 1:
+		w = heapq.heappop(heap) + heapq.heappop(heap)
+		cost += w
+		heapq.heappush(heap, w)
+	return cost
+
+
+# cost of the best code with no length above maxLen, trying every array of lengths
+def brute_force_cost(freqs, maxLen):
+
+	used = [f for f in freqs if f]
+	best = None
+	for lens in itertools.product(range(1, maxLen + 1), repeat=len(used)):
+		if sum(1 << (maxLen - l) for l in lens) <= 1 << maxLen:
+			cost = sum(f * l for f, l in zip(used, lens))
+			if best is None or cost < best:
+				best = cost
+	return best
+
+
+def kraft_sum(lens):
+	return sum(Fraction(1, 2 ** l) for l in lens if l)
+
+
+def check_lengths(freqs, maxLen):
+
+	lens = packageMerge(freqs, maxLen)
+	used = sum(1 for f in freqs if f)
+	assert len(lens) == len(freqs)
+	assert all((l > 0) == (f > 0) for f, l in zip(freqs, lens)), (freqs, lens)
+	assert max(lens, default=0) <= maxLen, (freqs, maxLen, lens)
+	# complete code (the Kraft sum is exactly 1) unless there is a single symbol
+	assert kraft_sum(lens) == (1 if used >= 2 else Fraction(used, 2)), (freqs, lens)
+	return lens
+
+
+rng = random.Random(2022)
+
+# small alphabets: optimal among every code that respects the limit
+for trial in range(300):
+	n = rng.randint(1, 6)
+	freqs = [rng.choice((0, 1, 1, 2, 3, 5, 8, 13, 100)) for i in range(n)]
+	maxLen = rng.randint(max(1, (sum(1 for f in freqs if f) - 1).bit_length()), 5)
+	lens = check_lengths(freqs, maxLen)
+	if any(freqs):
+		assert sum(f * l for f, l in zip(freqs, lens)) == brute_force_cost(freqs, maxLen), (freqs, maxLen, lens)
+
+# with a limit that is never reached, the cost is the one of an unrestricted Huffman code
+for trial in range(200):
+	n = rng.randint(2, 60)
+	freqs = [rng.randint(0, 1000) for i in range(n)]
+	lens = check_lengths(freqs, 30)
+	if sum(1 for f in freqs if f) >= 2:
+		assert sum(f * l for f, l in zip(freqs, lens)) == huffman_cost(freqs), (freqs, lens)
+
+# skewed frequencies (Fibonacci) need long codes: the limit is enforced
+fib = [1, 1]
+while len(fib) < 40:
+	fib.append(fib[-1] + fib[-2])
+for maxLen in (7, 9, 15):
+	check_lengths(fib, maxLen)
+check_lengths([1] * 286, 15)
+check_lengths([rng.randint(1, 1 << 20) for i in range(286)], 15)
+
+try:
+	packageMerge([1] * 9, 3)
+	assert False, 'too many symbols for the limit'
+except ValueError:
+	pass
+
+
+# ------------------- canonical codes
+
+for trial in range(50):
+	freqs = [rng.randint(0, 50) for i in range(rng.randint(2, 300))]
+	lens = packageMerge(freqs, 15)
+	codes = canonicalCodes(lens)
+
+	# prefix free, one code per used symbol, of the right length
+	assert sorted(ind for s, ind in codes) == [i for i, l in enumerate(lens) if l]
+	assert all(len(s) == lens[ind] for s, ind in codes)
+	strings = sorted(s for s, ind in codes)
+	assert all(not b.startswith(a) for a, b in zip(strings, strings[1:]))
+
+	# the tree finds every code; the encode table holds the codes bit-reversed
+	tree = HuffmanTree.fromLengths(lens)
+	table = HuffmanEncodeTable(codes, len(lens))
+	assert table.lengths == tuple(lens)
+	for s, ind in codes:
+		assert tree.findNode(s) == ind
+		assert format(table.codes[ind], '0%db' % len(s))[::-1] == s
+
+print("packageMerge and canonical codes: OK")
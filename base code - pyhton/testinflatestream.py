@@ -0,0 +1,132 @@
+import io
+import zlib
+import random
+import encoder
+from gzip import InflateStream
+
+
+rng = random.Random(2022)
+
+words = b'the of and a to in is you that it was for on are as with they at be this have from or one had by word but not what all'.split()
+lines = [b' '.join(rng.choice(words) for i in range(rng.randint(1, 30))) + b'\n' for k in range(1500)]
+data = b''.join(lines)
+
+
+# ------------------- sync and full flushes
+
+for level in (0, 1, 6):
+	for mode in encoder.FLUSH_MODES:
+		enc = encoder.DeflateEncoder(level)
+		stream = InflateStream()
+		decoded = b''
+		sent = b''
+		flushes = []      # (end of the flushed output, bytes written so far)
+		pos = 0
+		for k, line in enumerate(lines):
+			out = enc.write(line)
+			pos += len(line)
+			if k % 97 == 0:
+				out += enc.flush(mode)
+			sent += out
+			decoded += stream.feed(out)
+			if k % 97 == 0:
+				# everything written so far can be decoded, by zlib too
+				assert decoded == data[:pos], (level, mode, k)
+				assert zlib.decompressobj(-15).decompress(sent) == data[:pos], (level, mode, k)
+				flushes.append((len(sent), pos))
+		out = enc.finish()
+		sent += out
+		decoded += stream.feed(out)
+		assert decoded == data and stream.finished, (level, mode)
+		assert zlib.decompress(sent, -15) == data
+
+		# after a full flush, the rest of the stream decodes on its own
+		if mode == encoder.FULL_FLUSH:
+			for end, pos in flushes[1::5]:
+				assert InflateStream().feed(sent[end:]) == data[pos:], (level, end)
+
+print("sync and full flushes: OK")
+
+
+# ------------------- the stream cut anywhere
+
+cdata = encoder.deflate(data[:4000], 6)
+for trial in range(3):
+	stream = InflateStream()
+	decoded = b''
+	pos = 0
+	while pos < len(cdata):
+		n = rng.choice((1, 2, 7, 100, 1000))
+		decoded += stream.feed(cdata[pos : pos + n])
+		# never anything that was not sent
+		assert data[:4000].startswith(decoded)
+		pos += n
+	assert decoded == data[:4000] and stream.finished
+
+# byte by byte, a stream with several blocks
+enc = encoder.DeflateEncoder(6)
+cdata = b''.join(enc.write(line) + (enc.flush() if k % 40 == 0 else b'') for k, line in enumerate(lines[:120])) + enc.finish()
+stream = InflateStream()
+decoded = b''.join(stream.feed(cdata[k : k + 1]) for k in range(len(cdata)))
+assert decoded == b''.join(lines[:120]) and stream.finished
+
+# the data of a block is returned as it arrives, before the block ends
+cdata = encoder.deflate(data, 6)
+stream = InflateStream()
+decoded = b''
+for k in range(0, len(cdata), 512):
+	new = stream.feed(cdata[k : k + 512])
+	if 0 < k < len(cdata) - 512:
+		assert new, k
+	decoded += new
+assert decoded == data and stream.finished
+
+# a preset dictionary
+dictionary = data[-8000:]
+cdata = encoder.deflate(data[:5000], 6, dictionary=dictionary)
+stream = InflateStream(dictionary=dictionary)
+assert b''.join(stream.feed(cdata[k : k + 50]) for k in range(0, len(cdata), 50)) == data[:5000]
+print("stream cut anywhere: OK")
+
+
+# ------------------- gzip members
+
+f = io.BytesIO()
+writer = encoder.GzipWriter(f, 6, 'lines.txt')
+stream = InflateStream(gzipMember=True)
+decoded = b''
+sent = 0
+for k, line in enumerate(lines):
+	writer.write(line)
+	if k % 200 == 0:
+		writer.flush()
+	blob = f.getvalue()
+	if len(blob) > sent:
+		decoded += stream.feed(blob[sent:])
+		sent = len(blob)
+	if k % 200 == 0:
+		assert decoded == b''.join(lines[:k + 1]), k
+writer.close()
+blob = f.getvalue()
+decoded += stream.feed(blob[sent:])
+assert decoded == data and stream.finished
+assert stream.gzh.fName == 'lines.txt'
+
+# the header and the trailer cut in pieces
+stream = InflateStream(gzipMember=True)
+pieces = [blob[k : k + 1] for k in range(20)] + [blob[20:-8]] + [blob[k : k + 1] for k in range(len(blob) - 8, len(blob))]
+decoded = b''
+for piece in pieces:
+	assert not stream.finished
+	decoded += stream.feed(piece)
+assert decoded == data and stream.finished
+
+# a wrong CRC32 in the trailer
+bad = bytearray(blob)
+bad[-8] ^= 1
+try:
+	InflateStream(gzipMember=True).feed(bytes(bad))
+	assert False, 'CRC32 mismatch not found'
+except ValueError as e:
+	assert 'CRC32' in str(e)
+print("gzip members: OK")
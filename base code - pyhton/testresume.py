@@ -0,0 +1,141 @@
+import os
+import zlib
+import random
+import tempfile
+import gzip
+from gzip import GZIP
+
+
+rng = random.Random(2022)
+
+# mostly literals: zlib ends a block every 16K symbols or so
+data = bytes(rng.choice(b'abcdefghijklmnopqrstuvwxyz .\n') for i in range(120000))
+
+tmp = tempfile.mkdtemp()
+gzName = os.path.join(tmp, 'data.txt.gz')
+outName = os.path.join(tmp, 'data.txt')
+checkpointName = outName + '.checkpoint'
+
+
+def member(data):
+	c = zlib.compressobj(6, zlib.DEFLATED, 31)
+	return c.compress(data) + c.flush()
+
+
+def write_file(blob):
+	with open(gzName, 'wb') as f:
+		f.write(blob)
+
+
+def read_output():
+	with open(outName, 'rb') as f:
+		return f.read()
+
+
+class Crash(Exception):
+	pass
+
+
+# runs decompressResumable with a checkpoint at every block, crashing after the given number of checkpoints
+def crash_after(saves):
+
+	save = gzip.saveCheckpoint
+	count = [0]
+	def crashing(name, snapshot):
+		if count[0] == saves:
+			raise Crash()
+		save(name, snapshot)
+		count[0] += 1
+
+	gzip.saveCheckpoint = crashing
+	try:
+		GZIP(gzName).decompressResumable(outName, interval=0)
+		assert False, 'no crash'
+	except Crash:
+		pass
+	finally:
+		gzip.saveCheckpoint = save
+
+
+# ------------------- crash and resume
+
+blob = member(data)
+write_file(blob)
+total = GZIP(gzName).decompressResumable(outName, interval=0)
+assert read_output() == data and not os.path.exists(checkpointName)
+assert total > 4
+
+for saves in (1, total // 2, total - 2):
+	crash_after(saves)
+	assert os.path.exists(checkpointName)
+	numBlocks = GZIP(gzName).decompressResumable(outName, interval=0)
+	assert numBlocks == total - saves, (saves, numBlocks)
+	assert read_output() == data and not os.path.exists(checkpointName)
+
+# two crashes in a row, then a member boundary in between
+crash_after(2)
+crash_after(2)
+assert GZIP(gzName).decompressResumable(outName, interval=0) == total - 4
+assert read_output() == data
+
+write_file(member(data[:60000]) + member(b'') + member(data[60000:]))
+crash_after(total // 2)
+GZIP(gzName).decompressResumable(outName, interval=0)
+assert read_output() == data and not os.path.exists(checkpointName)
+print("crash and resume: OK")
+
+
+# ------------------- checkpoints that do not apply
+
+# of another file (the size or time differs): decoding starts over
+write_file(blob)
+crash_after(3)
+write_file(blob + member(b'more'))
+GZIP(gzName).decompressResumable(outName, interval=0)
+assert read_output() == data + b'more'
+
+# the output is shorter than the checkpoint says
+write_file(blob)
+crash_after(3)
+with open(outName, 'r+b') as f:
+	f.truncate(10)
+GZIP(gzName).decompressResumable(outName, interval=0)
+assert read_output() == data and not os.path.exists(checkpointName)
+print("stale checkpoints: OK")
+
+
+# ------------------- every trailer is checked
+
+first = bytearray(member(data[:50000]))
+first[-8] ^= 1
+write_file(bytes(first) + member(data[50000:]))
+try:
+	GZIP(gzName).decompressResumable(outName, interval=0)
+	assert False, 'CRC32 mismatch not found'
+except ValueError as e:
+	assert 'CRC32' in str(e)
+
+bad = bytearray(blob)
+bad[-1] ^= 1
+write_file(bytes(bad))
+try:
+	GZIP(gzName).decompressResumable(outName, interval=0)
+	assert False, 'ISIZE mismatch not found'
+except ValueError as e:
+	assert 'ISIZE' in str(e)
+
+# after a resume too: the CRC32 of the member is kept in the checkpoint
+bad = bytearray(blob)
+bad[-5] ^= 1
+write_file(bytes(bad))
+crash_after(3)
+try:
+	GZIP(gzName).decompressResumable(outName, interval=0)
+	assert False, 'CRC32 mismatch not found'
+except ValueError as e:
+	assert 'CRC32' in str(e)
+print("trailers: OK")
+
+for name in os.listdir(tmp):
+	os.remove(os.path.join(tmp, name))
+os.rmdir(tmp)
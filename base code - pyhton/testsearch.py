@@ -0,0 +1,89 @@
+import io
+import re
+import zlib
+import random
+from gzip import GZIP, LineSearch, StopDecoding
+
+
+rng = random.Random(2022)
+
+
+def gz(data):
+	c = zlib.compressobj(6, zlib.DEFLATED, 31)
+	return c.compress(data) + c.flush()
+
+
+# the lines of data matching pattern, with their offsets, searched line by line
+def expected(pattern, data):
+
+	result = []
+	offset = 0
+	for line in data.split(b'\n'):
+		if re.search(pattern, line):
+			result.append((offset, line))
+		offset += len(line) + 1
+	if data.endswith(b'\n'):
+		result = [(o, l) for o, l in result if o < len(data)]
+	return result
+
+
+# feeds data to a LineSearch in pieces of the given sizes
+def search_pieces(pattern, data, sizes):
+
+	found = []
+	searcher = LineSearch(re.compile(pattern, re.MULTILINE), onMatch=lambda offset, line: found.append((offset, line)))
+	pos = 0
+	while pos < len(data):
+		n = rng.choice(sizes)
+		searcher.write(data[pos : pos + n])
+		pos += n
+	searcher.close()
+	return found
+
+
+# ------------------- matches that straddle chunks
+
+words = b'foo bar baz needle hay stack the of and a'.split()
+data = b'\n'.join(b' '.join(rng.choice(words) for i in range(rng.randint(0, 12))) for k in range(2000))
+
+for pattern in (rb'needle', rb'^foo', rb'bar$', rb'needle \w+ needle', rb'^$', rb'$', rb'a.b'):
+	for sizes in ((1,), (1, 2, 3), (7, 100), (5000,)):
+		assert search_pieces(pattern, data, sizes) == expected(pattern, data), (pattern, sizes)
+	assert search_pieces(pattern, data + b'\n', (13,)) == expected(pattern, data + b'\n'), pattern
+print("matches across chunks: OK")
+
+
+# ------------------- matches never cross a newline
+
+data = b'foo\nbar\nfoo bar\nfo\nob\n'
+for pattern in (rb'foo\sbar', rb'o[^a]b', rb'o\s*b', rb'foo[\s\S]*bar'):
+	assert search_pieces(pattern, data, (3, 100)) == expected(pattern, data), pattern
+assert GZIP(io.BytesIO(gz(b'foo\nbar\n'))).search(rb'foo\sbar') == []
+assert GZIP(io.BytesIO(gz(b'foo\nbar\n'))).search(rb'o[^a]b') == []
+print("matches within lines: OK")
+
+
+# ------------------- a long line without newlines
+
+blob = bytes(rng.getrandbits(8) for i in range(1 << 16)).replace(b'\n', b' ')
+found = search_pieces(re.escape(blob[40000:40010]), blob * 4, (1000, 65536))
+assert found == [(0, blob * 4)]
+print("long line: OK")
+
+
+# ------------------- max count, ignore case, fixed strings
+
+data = b''.join(b'line %d: %s\n' % (k, rng.choice(words)) for k in range(5000))
+assert GZIP(io.BytesIO(gz(data))).search(rb'needle') == expected(rb'needle', data)
+assert GZIP(io.BytesIO(gz(data))).search(rb'needle', maxCount=3) == expected(rb'needle', data)[:3]
+assert GZIP(io.BytesIO(gz(data))).search('NEEDLE', ignoreCase=True) == expected(rb'needle', data)
+assert GZIP(io.BytesIO(gz(b'a.b\naxb\n'))).search('a.b', fixed=True) == [(0, b'a.b')]
+assert GZIP(io.BytesIO(gz(data))).search(rb'needle', maxCount=0) == []
+
+searcher = LineSearch(re.compile(rb'x'), maxCount=1, onMatch=lambda offset, line: None)
+try:
+	searcher.write(b'axb\nxx\n')
+	assert False, 'StopDecoding not raised'
+except StopDecoding:
+	assert searcher.count == 1
+print("search options: OK")